@@ -1,16 +1,82 @@
 """Estrutura principal da API Flask."""
 
+import atexit
 import os
-from flask import Flask, jsonify, make_response
+from flask import Flask, Response, g, jsonify, make_response, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 from services.relatorios_service import RelatoriosService  # Serviço centralizado
 from extratores.extrator_stract import ExtratorDadosStract  # Implementação concreta
+from services.atualizador import AtualizadorSnapshots
+from utils.cache_persistente import CachePersistente
+from utils.concorrencia import LacoEventos
+from utils.metricas import encerrar_perfil, iniciar_perfil, registro
+from constants.diretorios import CACHE_DIR
+from constants.configuracoes import (
+    ATUALIZACAO_INTERVALO_SEGUNDOS,
+    CACHE_PERSISTENTE,
+    CACHE_PERSISTENTE_MAX_MB,
+    EXTRATOR_ASYNC,
+    TTL_CAMPOS_SEGUNDOS,
+    TTL_PLATAFORMAS_SEGUNDOS,
+    TTL_SNAPSHOT_PERSISTENTE_SEGUNDOS,
+)
+
+# Cache em disco das respostas da API e dos relatórios base (opcional)
+cache_persistente = None
+if CACHE_PERSISTENTE:
+    cache_persistente = CachePersistente(
+        os.path.join(CACHE_DIR, "cache.sqlite3"),
+        int(CACHE_PERSISTENTE_MAX_MB * 1024 * 1024),
+        {
+            # Respostas da API, por endpoint. As páginas de contas ('accounts') não
+            # são salvas: trazem o token de cada conta, que fica só em memória.
+            # Os insights também não: os dados já ficam nos relatórios base, cuja
+            # idade vem da consulta à API (uma resposta salva a esconderia).
+            "platforms": TTL_PLATAFORMAS_SEGUNDOS,
+            "fields": TTL_CAMPOS_SEGUNDOS,
+            # Relatórios base (ver services.snapshots.RepositorioSnapshots)
+            "snapshot": TTL_SNAPSHOT_PERSISTENTE_SEGUNDOS,
+        },
+    )
+    atexit.register(cache_persistente.fechar)
 
 # Inicializa o service para criação de relatórios(pode ser usado em várias rotas)
-extractor = ExtratorDadosStract()
-relatorios_service = RelatoriosService(extractor)
+extractor = ExtratorDadosStract(cache_persistente=cache_persistente)
+extractor_async = None
+laco_eventos = None
+if EXTRATOR_ASYNC:
+    from extratores.extrator_stract_async import ExtratorDadosStractAsync
+
+    # Um único laço de eventos atende às consultas de todas as requisições;
+    # o cache de metadados e o limite de taxa são compartilhados com o extrator síncrono
+    laco_eventos = LacoEventos()
+    extractor_async = ExtratorDadosStractAsync(
+        cache_metadados=extractor.cache_metadados,
+        cache_persistente=cache_persistente,
+        limitador=extractor.limitador,
+    )
+
+    @atexit.register
+    def _encerrar_extrator_async():
+        """Fecha as conexões do extrator assíncrono e encerra o laço de eventos."""
+        laco_eventos.executar(extractor_async.fechar())
+        laco_eventos.parar(5)
+
+relatorios_service = RelatoriosService(
+    extractor, extractor_async, laco_eventos, cache_persistente
+)
+# Atualizador dos relatórios em segundo plano (iniciado em create_app, se configurado)
+atualizador = AtualizadorSnapshots(relatorios_service, ATUALIZACAO_INTERVALO_SEGUNDOS)
+
+
+def _processo_do_reloader() -> bool:
+    """Indica se este é o processo do reloader do Werkzeug, que só reinicia o servidor."""
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        return False  # Processo filho, que atende as requisições
+    depuracao = os.environ.get("FLASK_DEBUG", "").lower() in ("1", "true")
+    return __name__ == "__main__" or depuracao
 
 
 def create_app():
@@ -29,6 +95,33 @@ def create_app():
     app.register_blueprint(plataformas_bp)
     app.register_blueprint(geral_bp)
 
+    # Inicia a atualização periódica dos relatórios e a encerra junto com o processo
+    # (no modo de depuração, só no processo filho do reloader, e não nos dois)
+    if (
+        ATUALIZACAO_INTERVALO_SEGUNDOS > 0
+        and not atualizador.ativo
+        and not _processo_do_reloader()
+    ):
+        atualizador.iniciar()
+        atexit.register(atualizador.parar, 5)
+
+    # Grava as cópias de CSV ainda pendentes antes de encerrar o processo
+    if relatorios_service.arquivo is not None:
+        atexit.register(relatorios_service.arquivo.parar, 5)
+
+    @app.before_request
+    def iniciar_perfil_requisicao():
+        """Com '?profile=1', mede o tempo de cada etapa da requisição."""
+        if request.args.get("profile") == "1":
+            g.token_perfil = iniciar_perfil()
+
+    @app.teardown_request
+    def encerrar_perfil_requisicao(_erro=None):
+        """Desativa o perfil da requisição, se houver."""
+        token = g.pop("token_perfil", None)
+        if token is not None:
+            encerrar_perfil(token)
+
     @app.route("/")
     def index():
         """Rota raiz que retorna informações pessoais."""
@@ -39,6 +132,36 @@ def create_app():
         }
         return jsonify(info)
 
+    @app.route("/status")
+    def status():
+        """Rota com o estado do serviço (JSON)."""
+        arquivo = relatorios_service.arquivo
+        limitador = extractor.limitador
+        return jsonify(
+            {
+                "extrator": extractor.estatisticas(),
+                "extrator_async": (
+                    extractor_async.estatisticas() if extractor_async else None
+                ),
+                "cache_metadados": extractor.cache_metadados.estatisticas(),
+                "cache_persistente": (
+                    cache_persistente.estatisticas() if cache_persistente else None
+                ),
+                "geracoes": relatorios_service.estatisticas_geracoes(),
+                "atualizador": atualizador.status(),
+                "arquivo_csv": arquivo.estatisticas() if arquivo else None,
+                "limite_api": limitador.estatisticas() if limitador else None,
+                "snapshots": relatorios_service.snapshots.estatisticas(),
+            }
+        )
+
+    @app.route("/metrics")
+    def metrics():
+        """Rota com as métricas da aplicação no formato texto do Prometheus."""
+        return Response(
+            registro.exportar(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
     # Adicionando manipuladores de erro
     @app.errorhandler(404)
     def not_found(error):
@@ -0,0 +1,283 @@
+"""
+Benchmark de carga dos endpoints de relatório, com a API da Stract simulada.
+
+Sobe o stub da API (benchmarks.stub_stract) e o servidor da aplicação em processos
+separados, e chama cada endpoint de plataformas_bp e geral_bp com concorrência
+crescente. Para cada endpoint e nível de concorrência, mede vazão, latências
+(p50/p99) e o pico de memória (RSS) do servidor. Os resultados são salvos em JSON
+e podem ser comparados com os de outro commit.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_carga --concorrencia 1 4 16 --requisicoes 200
+    python -m benchmarks.bench_carga --comparar benchmarks/resultados/<anterior>.json
+    python -m benchmarks.bench_carga --env TTL_SNAPSHOT_SEGUNDOS=0 --contas 200
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from benchmarks.stub_stract import (
+    PLATAFORMAS,
+    adicionar_argumentos,
+    configuracao_de_argumentos,
+)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+# Configuração padrão do servidor durante o benchmark (sobrescrita por '--env')
+AMBIENTE_PADRAO = {
+    "TOKEN_AUTORIZACAO": "benchmark",
+    "CSV_ARQUIVO": "0",  # Não grava cópias dos relatórios na pasta csv
+    "ATUALIZACAO_INTERVALO_SEGUNDOS": "0",
+    "CACHE_PERSISTENTE": "0",
+}
+
+
+def endpoints_padrao() -> List[str]:
+    """Todos os endpoints de plataformas_bp e geral_bp, para as plataformas do stub."""
+    endpoints = []
+    for plataforma in PLATAFORMAS:
+        endpoints += [f"/{plataforma['value']}", f"/{plataforma['value']}/resumo"]
+    return endpoints + ["/geral", "/geral/resumo"]
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _aguardar(url: str, processo: subprocess.Popen, timeout: float = 30.0) -> None:
+    """Aguarda até que 'url' responda (ou falha se o processo terminar)."""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"O processo terminou antes de responder em {url}.")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} não respondeu em {timeout:.0f}s.")
+
+
+def _memoria_mb(pid: int) -> Dict[str, Optional[float]]:
+    """RSS atual e pico de RSS do processo (Linux: /proc/<pid>/status)."""
+    memoria: Dict[str, Optional[float]] = {"rss_mb": None, "rss_pico_mb": None}
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for linha in status:
+                nome, _, valor = linha.partition(":")
+                if nome in ("VmRSS", "VmHWM"):
+                    chave = "rss_mb" if nome == "VmRSS" else "rss_pico_mb"
+                    memoria[chave] = round(int(valor.split()[0]) / 1024, 1)  # kB -> MB
+    except OSError:
+        pass  # Fora do Linux, a memória não é medida
+    return memoria
+
+
+def _percentil(valores: List[float], p: float) -> Optional[float]:
+    """Percentil 'p' (0-100) pelo método do posto mais próximo."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posto = max(int(round(p / 100 * len(ordenados) + 0.5)) - 1, 0)
+    return ordenados[min(posto, len(ordenados) - 1)]
+
+
+def _ms(segundos: Optional[float]) -> Optional[float]:
+    return round(segundos * 1000, 2) if segundos is not None else None
+
+
+def medir_endpoint(
+    url: str, concorrencia: int, requisicoes: int, timeout: float
+) -> Dict[str, Any]:
+    """Faz 'requisicoes' GETs com 'concorrencia' clientes e resume as latências."""
+    locais = threading.local()  # Uma sessão (keep-alive) por cliente
+
+    def chamar(_: int):
+        sessao = getattr(locais, "sessao", None)
+        if sessao is None:
+            sessao = locais.sessao = requests.Session()
+        inicio = time.perf_counter()
+        try:
+            resposta = sessao.get(url, timeout=timeout)
+            tamanho, sucesso = len(resposta.content), resposta.ok
+        except requests.RequestException:
+            tamanho, sucesso = 0, False
+        return time.perf_counter() - inicio, tamanho, sucesso
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(chamar, range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+
+    latencias = [latencia for latencia, _, sucesso in resultados if sucesso]
+    return {
+        "requisicoes": requisicoes,
+        "erros": sum(1 for _, _, sucesso in resultados if not sucesso),
+        "duracao_segundos": round(duracao, 3),
+        "vazao_rps": round(len(latencias) / duracao, 2) if duracao else None,
+        "latencia_p50_ms": _ms(_percentil(latencias, 50)),
+        "latencia_p99_ms": _ms(_percentil(latencias, 99)),
+        "latencia_max_ms": _ms(max(latencias, default=None)),
+        "bytes_resposta": max((tamanho for _, tamanho, _ in resultados), default=0),
+    }
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual: Dict[str, Any], anterior: Dict[str, Any]) -> None:
+    """Imprime a variação de vazão e de p99 em relação a um resultado anterior."""
+    anteriores = {(r["endpoint"], r["concorrencia"]): r for r in anterior["resultados"]}
+    print(f"\nComparação com {anterior.get('commit') or '?'} ({anterior.get('data')}):")
+    print(f"{'endpoint':<22} {'conc':>5} {'vazão':>9} {'p99':>9}")
+    for resultado in atual["resultados"]:
+        base = anteriores.get((resultado["endpoint"], resultado["concorrencia"]))
+        if base is None:
+            continue
+        variacoes = []
+        for campo in ("vazao_rps", "latencia_p99_ms"):
+            if base[campo] and resultado[campo] is not None:
+                variacoes.append(f"{(resultado[campo] / base[campo] - 1) * 100:+8.1f}%")
+            else:
+                variacoes.append(f"{'-':>9}")
+        print(f"{resultado['endpoint']:<22} {resultado['concorrencia']:>5} {' '.join(variacoes)}")
+
+
+def servir_aplicacao(porta: int) -> None:
+    """Modo '--servir': roda a aplicação (com threads) neste processo."""
+    import logging
+
+    from werkzeug.serving import make_server
+
+    from app import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # Sem log por requisição
+    make_server("127.0.0.1", porta, create_app(), threaded=True).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument(
+        "--requisicoes", type=int, default=100, help="Requisições por endpoint e nível."
+    )
+    parser.add_argument("--endpoints", nargs="+", default=None)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="CHAVE=VALOR",
+        help="Variável de ambiente do servidor (ex: EXTRATOR_ASYNC=1).",
+    )
+    parser.add_argument("--saida", default=None, help="Arquivo JSON dos resultados.")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior.")
+    parser.add_argument("--servir", type=int, default=None, help=argparse.SUPPRESS)
+    adicionar_argumentos(parser)  # Opções do stub (--contas, --latencia-ms, ...)
+    args = parser.parse_args()
+
+    if args.servir is not None:
+        return servir_aplicacao(args.servir)
+
+    porta_stub, porta_app = _porta_livre(), _porta_livre()
+    configuracao = configuracao_de_argumentos(args)
+    ambiente_app = dict(AMBIENTE_PADRAO)
+    ambiente_app.update(item.split("=", 1) for item in args.env)
+    ambiente_app["STRACT_BASE_URL"] = f"http://127.0.0.1:{porta_stub}/api"
+
+    opcoes_stub = [
+        f"--{nome.replace('_', '-')}={valor}" for nome, valor in vars(configuracao).items()
+    ]
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_stract", f"--porta={porta_stub}"]
+        + opcoes_stub,
+        cwd=RAIZ,
+        stdout=subprocess.DEVNULL,
+    )
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_carga", f"--servir={porta_app}"],
+        cwd=RAIZ,
+        env={**os.environ, **ambiente_app},
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{porta_app}"
+    resultados = []
+    try:
+        _aguardar(f"{ambiente_app['STRACT_BASE_URL']}/_stats", stub)
+        _aguardar(f"{base_url}/", servidor)
+
+        print(
+            f"{'endpoint':<22} {'conc':>5} {'vazão/s':>9} {'p50 ms':>9} {'p99 ms':>9} "
+            f"{'erros':>6} {'RSS pico':>9}"
+        )
+        for concorrencia in args.concorrencia:
+            for endpoint in args.endpoints or endpoints_padrao():
+                resultado = {"endpoint": endpoint, "concorrencia": concorrencia}
+                resultado.update(
+                    medir_endpoint(
+                        base_url + endpoint, concorrencia, args.requisicoes, args.timeout
+                    )
+                )
+                resultado.update(_memoria_mb(servidor.pid))
+                resultados.append(resultado)
+                print(
+                    f"{endpoint:<22} {concorrencia:>5} {resultado['vazao_rps']!s:>9} "
+                    f"{resultado['latencia_p50_ms']!s:>9} {resultado['latencia_p99_ms']!s:>9} "
+                    f"{resultado['erros']:>6} {resultado['rss_pico_mb']!s:>9}"
+                )
+        stub_stats = requests.get(f"{ambiente_app['STRACT_BASE_URL']}/_stats").json()
+    finally:
+        servidor.terminate()
+        stub.terminate()
+        servidor.wait(10)
+        stub.wait(10)
+
+    relatorio = {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "stub": stub_stats,
+        "ambiente": {k: v for k, v in ambiente_app.items() if k != "TOKEN_AUTORIZACAO"},
+        "resultados": resultados,
+    }
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS,
+        f"{datetime.now():%Y%m%d_%H%M%S}_{relatorio['commit'] or 'sem-commit'}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados salvos em: {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(relatorio, json.load(arquivo))
+
+
+if __name__ == "__main__":
+    main()
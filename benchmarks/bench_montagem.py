@@ -0,0 +1,115 @@
+"""
+Micro-benchmark da montagem do DataFrame de uma plataforma.
+
+Compara a montagem antiga (um DataFrame por conta, pd.concat dentro do laço e
+'Cost Per Click' calculado linha a linha com df.apply) com o MontadorColunar.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_montagem --linhas 10000 100000 1000000
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+from services.montador_colunar import MontadorColunar
+
+CAMPOS = [
+    {"value": "adName", "text": "Ad Name"},
+    {"value": "clicks", "text": "Clicks"},
+    {"value": "spend", "text": "Spend"},
+    {"value": "impressions", "text": "Impressions"},
+    {"value": "status", "text": "Status"},
+]
+
+
+def gerar_contas(
+    total_linhas: int, linhas_por_conta: int
+) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Gera contas sintéticas com os seus insights, no formato retornado pela API."""
+    rnd = random.Random(42)
+    contas = []
+    for i in range(0, total_linhas, linhas_por_conta):
+        conta = {"id": i, "name": f"Conta {i // linhas_por_conta}"}
+        insights = [
+            {
+                "id": f"{i}-{j}",
+                "adName": f"Anúncio {j}",
+                "clicks": rnd.randint(0, 500),
+                "spend": round(rnd.random() * 1000, 2),
+                "impressions": rnd.randint(0, 100000),
+                "status": "ACTIVE",
+            }
+            for j in range(min(linhas_por_conta, total_linhas - i))
+        ]
+        contas.append((conta, insights))
+    return contas
+
+
+def montar_legado(contas, campos, platform_text: str) -> pd.DataFrame:
+    """Reproduz a montagem anterior ao MontadorColunar."""
+    df_total = pd.DataFrame()
+    for conta, insights in contas:
+        df = pd.DataFrame(insights)
+        df.rename(columns={c["value"]: c["text"] for c in campos}, inplace=True)
+        df["Plataforma"] = platform_text
+        df["Conta"] = conta["name"]
+        df["Cost Per Click"] = df.apply(
+            lambda row: row["Spend"] / row["Clicks"] if row["Clicks"] != 0 else 0,
+            axis=1,
+        )
+        df_total = pd.concat([df_total, df], ignore_index=True)
+    cols = ["Plataforma", "Conta"] + [
+        col for col in df_total.columns if col not in ["Plataforma", "Conta"]
+    ]
+    return df_total[cols]
+
+
+def montar_colunar(contas, campos, platform_text: str) -> pd.DataFrame:
+    """Monta o DataFrame com o MontadorColunar."""
+    montador = MontadorColunar(campos, platform_text)
+    for conta, insights in contas:
+        montador.adicionar(insights, conta["name"])
+    return montador.construir()
+
+
+def medir(func, *args) -> Tuple[float, pd.DataFrame]:
+    """Executa a função e retorna o tempo gasto (em segundos) e o resultado."""
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--linhas-por-conta", type=int, default=100)
+    parser.add_argument(
+        "--max-linhas-legado",
+        type=int,
+        default=100_000,
+        help="Acima deste total a montagem antiga (quadrática) não é executada.",
+    )
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'legado (s)':>12} {'colunar (s)':>12} {'ganho':>8}")
+    for total in args.linhas:
+        contas = gerar_contas(total, args.linhas_por_conta)
+        tempo_colunar, df_colunar = medir(montar_colunar, contas, CAMPOS, "Facebook Ads")
+
+        if total <= args.max_linhas_legado:
+            tempo_legado, df_legado = medir(montar_legado, contas, CAMPOS, "Facebook Ads")
+            pd.testing.assert_frame_equal(df_legado, df_colunar, check_dtype=False)
+            legado, ganho = f"{tempo_legado:12.3f}", f"{tempo_legado / tempo_colunar:7.1f}x"
+        else:
+            legado, ganho = f"{'-':>12}", f"{'-':>8}"
+        print(f"{total:>10} {legado} {tempo_colunar:12.3f} {ganho}")
+
+
+if __name__ == "__main__":
+    main()
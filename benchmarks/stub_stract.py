@@ -0,0 +1,262 @@
+"""
+Servidor local que imita a API da Stract, para benchmarks sem o token real.
+
+Implementa '/platforms', '/accounts', '/fields' e '/insights' (com paginação),
+com quantidade de contas, linhas por conta, latência e taxas de erro configuráveis.
+Os dados são determinísticos (dependem apenas da semente).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.stub_stract --porta 8765 --contas 50 --linhas-por-conta 200
+    STRACT_BASE_URL=http://127.0.0.1:8765/api TOKEN_AUTORIZACAO=x python app.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PLATAFORMAS = [
+    {"value": "meta_ads", "text": "Facebook Ads"},
+    {"value": "ga4", "text": "Google Analytics"},
+    {"value": "tiktok", "text": "TikTok"},
+]
+CAMPOS = {
+    "meta_ads": [
+        {"value": "adName", "text": "Ad Name"},
+        {"value": "clicks", "text": "Clicks"},
+        {"value": "spend", "text": "Spend"},
+        {"value": "impressions", "text": "Impressions"},
+        {"value": "status", "text": "Status"},
+    ],
+    "ga4": [
+        {"value": "adName", "text": "Ad Name"},
+        {"value": "clicks", "text": "Clicks"},
+        {"value": "cost", "text": "Spend"},
+        {"value": "cpc", "text": "Cost Per Click"},
+        {"value": "sessions", "text": "Sessions"},
+    ],
+    "tiktok": [
+        {"value": "adName", "text": "Ad Name"},
+        {"value": "clicks", "text": "Clicks"},
+        {"value": "spend", "text": "Spend"},
+        {"value": "impressions", "text": "Impressions"},
+    ],
+}
+_CAMPOS_TEXTO = {"adName", "status"}
+_CAMPOS_INTEIROS = {"clicks", "impressions", "sessions"}
+
+
+@dataclass
+class ConfiguracaoStub:
+    """Volume de dados, paginação, latência e erros simulados pelo stub."""
+
+    contas: int = 10  # Contas por plataforma
+    linhas_por_conta: int = 50  # Insights por conta
+    contas_por_pagina: int = 10
+    campos_por_pagina: int = 3
+    latencia_ms: float = 50.0  # Latência de cada resposta
+    jitter_ms: float = 10.0  # Variação aleatória (+/-) da latência
+    taxa_erro: float = 0.0  # Fração das respostas com 503
+    taxa_429: float = 0.0  # Fração das respostas com 429
+    retry_after: float = 1.0  # 'Retry-After' (segundos) das respostas 429
+    contas_inexistentes: int = 0  # Últimas contas de cada plataforma respondem 404
+    semente: int = 42
+
+
+class EstadoStub:
+    """Configuração e contadores compartilhados pelas threads do servidor."""
+
+    def __init__(self, configuracao: ConfiguracaoStub):
+        self.configuracao = configuracao
+        self._lock = threading.Lock()
+        self._aleatorio = random.Random(configuracao.semente)
+        self._contadores: Dict[str, int] = {}
+
+    def contar(self, evento: str) -> None:
+        with self._lock:
+            self._contadores[evento] = self._contadores.get(evento, 0) + 1
+
+    def sortear(self) -> float:
+        """Número aleatório em [0, 1) (seguro entre threads)."""
+        with self._lock:
+            return self._aleatorio.random()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            contadores = dict(self._contadores)
+        return {"configuracao": asdict(self.configuracao), "contadores": contadores}
+
+
+def _pagina(itens: List[Any], pagina: int, por_pagina: int) -> Tuple[List[Any], int]:
+    """Itens da página (a partir de 1) e o total de páginas."""
+    por_pagina = max(por_pagina, 1)
+    total = max((len(itens) + por_pagina - 1) // por_pagina, 1)
+    return itens[(pagina - 1) * por_pagina : pagina * por_pagina], total
+
+
+def _contas(plataforma: str, configuracao: ConfiguracaoStub) -> List[Dict[str, Any]]:
+    return [
+        {"id": str(i), "name": f"{plataforma} conta {i}", "token": f"token-{plataforma}-{i}"}
+        for i in range(configuracao.contas)
+    ]
+
+
+def _sortear(chave: str) -> float:
+    """Número em [0, 1) determinado pela chave (mais barato que um random.Random)."""
+    resumo = hashlib.blake2b(chave.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(resumo, "big") / 2**64
+
+
+def _insights(
+    plataforma: str, conta: int, campos: List[str], configuracao: ConfiguracaoStub
+) -> List[Dict[str, Any]]:
+    """
+    Insights determinísticos da conta, apenas com os campos pedidos. Cada valor
+    depende só de (plataforma, conta, linha, campo): o mesmo com ou sem '?fields='.
+    """
+    insights = []
+    for linha in range(configuracao.linhas_por_conta):
+        insight: Dict[str, Any] = {"id": f"{conta}-{linha}"}
+        for campo in campos:
+            if campo == "adName":
+                insight[campo] = f"Anúncio {linha % 25}"
+            elif campo == "status":
+                insight[campo] = "ACTIVE" if linha % 4 else "PAUSED"
+            else:
+                sorteio = _sortear(
+                    f"{configuracao.semente}-{plataforma}-{conta}-{linha}-{campo}"
+                )
+                if campo in _CAMPOS_INTEIROS:
+                    insight[campo] = int(sorteio * 5001)
+                else:
+                    insight[campo] = round(sorteio * 1000, 2)
+        insights.append(insight)
+    return insights
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Mantém as conexões abertas (keep-alive)
+    disable_nagle_algorithm = True
+    estado: EstadoStub  # Definido em criar_servidor
+
+    def log_message(self, *args) -> None:
+        pass  # Sem log por requisição
+
+    def _responder(
+        self, status: int, corpo: Any, cabecalhos: Optional[Dict[str, str]] = None
+    ) -> None:
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self) -> None:
+        configuracao = self.estado.configuracao
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        params = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+
+        if endpoint == "_stats":  # Contadores do stub (sem latência nem erros)
+            return self._responder(200, self.estado.estatisticas())
+
+        self.estado.contar(endpoint)
+        latencia = configuracao.latencia_ms + configuracao.jitter_ms * (
+            2 * self.estado.sortear() - 1
+        )
+        time.sleep(max(latencia, 0.0) / 1000)
+
+        sorteio = self.estado.sortear()
+        if sorteio < configuracao.taxa_429:
+            self.estado.contar("respostas_429")
+            return self._responder(
+                429, {"error": "rate limited"}, {"Retry-After": f"{configuracao.retry_after:g}"}
+            )
+        if sorteio < configuracao.taxa_429 + configuracao.taxa_erro:
+            self.estado.contar("respostas_503")
+            return self._responder(503, {"error": "unavailable"})
+
+        pagina = int(params.get("page", 1))
+        plataforma = params.get("platform")
+        if endpoint == "platforms":
+            return self._responder(200, {"platforms": PLATAFORMAS})
+        if plataforma not in CAMPOS:
+            return self._responder(404, {"error": "platform not found"})
+
+        if endpoint == "accounts":
+            itens, total = _pagina(
+                _contas(plataforma, configuracao), pagina, configuracao.contas_por_pagina
+            )
+            return self._responder(
+                200, {"accounts": itens, "pagination": {"current": pagina, "total": total}}
+            )
+        if endpoint == "fields":
+            itens, total = _pagina(CAMPOS[plataforma], pagina, configuracao.campos_por_pagina)
+            return self._responder(
+                200, {"fields": itens, "pagination": {"current": pagina, "total": total}}
+            )
+        if endpoint == "insights":
+            conta = int(params.get("account", -1))
+            existentes = configuracao.contas - configuracao.contas_inexistentes
+            if not 0 <= conta < existentes:
+                return self._responder(404, {"error": "account not found"})
+            campos = [campo for campo in params.get("fields", "").split(",") if campo]
+            return self._responder(
+                200, {"insights": _insights(plataforma, conta, campos, configuracao)}
+            )
+        self._responder(404, {"error": "not found"})
+
+
+def criar_servidor(
+    configuracao: ConfiguracaoStub, host: str = "127.0.0.1", porta: int = 0
+) -> ThreadingHTTPServer:
+    """Cria o servidor (porta 0: escolhida pelo sistema); use serve_forever para iniciar."""
+    handler = type("Handler", (_Handler,), {"estado": EstadoStub(configuracao)})
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def adicionar_argumentos(parser: argparse.ArgumentParser) -> None:
+    """Adiciona ao parser uma opção para cada campo de ConfiguracaoStub."""
+    padrao = ConfiguracaoStub()
+    for nome, valor in asdict(padrao).items():
+        parser.add_argument(
+            "--" + nome.replace("_", "-"), dest=nome, type=type(valor), default=valor
+        )
+
+
+def configuracao_de_argumentos(args: argparse.Namespace) -> ConfiguracaoStub:
+    """Cria a ConfiguracaoStub a partir das opções de 'adicionar_argumentos'."""
+    return ConfiguracaoStub(**{nome: getattr(args, nome) for nome in asdict(ConfiguracaoStub())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    servidor = criar_servidor(configuracao_de_argumentos(args), args.host, args.porta)
+    host, porta = servidor.server_address[:2]
+    print(f"Stub da API da Stract em http://{host}:{porta}/api", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,35 @@
 """Blueprint para rotas de relatórios gerais."""
 
-from flask import Blueprint, jsonify, make_response
-from utils.utils import _criar_resposta_csv, get_valid_platforms
+from flask import Blueprint, jsonify, make_response, request
+from utils.utils import _criar_resposta_relatorio, get_valid_platforms
 from app import relatorios_service
+from services.filtros import FiltroRelatorio
 
 geral_bp = Blueprint("geral", __name__)
 
 
 @geral_bp.route("/geral")
 def relatorio_geral():
-    """Retorna um relatório geral em formato CSV para todas as plataformas."""
+    """
+    Retorna um relatório geral para todas as plataformas (CSV por padrão).
+    Aceita os filtros '?fields=', '?conta=' e '?plataforma='.
+    """
 
     try:
-        relatorio_csv = relatorios_service.gerar_relatorio_geral()
-        return _criar_resposta_csv(relatorio_csv)
+        filtro = FiltroRelatorio.de_parametros(request.args)
+        relatorio = relatorios_service.gerar_relatorio_geral(filtro)
+        return _criar_resposta_relatorio(relatorio)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Erro interno ao gerar relatório."}), 500
 
 
 @geral_bp.route("/geral/resumo")
 def relatorio_geral_resumo():
-    """Retorna um relatório geral resumido em formato CSV para todas as plataformas."""
+    """Retorna um relatório geral resumido para todas as plataformas (CSV por padrão)."""
     try:
-        relatorio_csv = relatorios_service.gerar_relatorio_geral_resumo()
-        return _criar_resposta_csv(relatorio_csv)
+        relatorio = relatorios_service.gerar_relatorio_geral_resumo()
+        return _criar_resposta_relatorio(relatorio)
     except Exception as e:
         return jsonify({"error": "Erro interno ao gerar relatório."}), 500
@@ -1,8 +1,9 @@
 """Blueprint para rotas relacionadas a plataformas específicas."""
 
-from flask import Blueprint, jsonify, make_response, abort
-from utils.utils import _criar_resposta_csv, get_valid_platforms
+from flask import Blueprint, jsonify, make_response, abort, request
+from utils.utils import _criar_resposta_relatorio, get_valid_platforms
 from app import relatorios_service
+from services.filtros import FiltroRelatorio
 
 plataformas_bp = Blueprint("plataformas", __name__)
 
@@ -10,7 +11,8 @@ plataformas_bp = Blueprint("plataformas", __name__)
 @plataformas_bp.route("/<string:plataforma_value>")
 def relatorio_plataforma(plataforma_value: str):
     """
-    Retorna um relatório em formato CSV para uma plataforma específica.
+    Retorna um relatório para uma plataforma específica (CSV por padrão).
+    Aceita os filtros '?fields=' e '?conta='.
 
     Args:
         plataforma (str): O nome da plataforma (ex: 'meta_ads').
@@ -20,8 +22,11 @@ def relatorio_plataforma(plataforma_value: str):
         abort(404, description="Plataforma não encontrada.")
 
     try:
-        relatorio_csv = relatorios_service.gerar_relatorio_plataforma(plataforma_value)
-        return _criar_resposta_csv(relatorio_csv)
+        filtro = FiltroRelatorio.de_parametros(request.args)
+        relatorio = relatorios_service.gerar_relatorio_plataforma(
+            plataforma_value, filtro
+        )
+        return _criar_resposta_relatorio(relatorio)
 
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -32,7 +37,7 @@ def relatorio_plataforma(plataforma_value: str):
 @plataformas_bp.route("/<string:plataforma_value>/resumo")
 def relatorio_plataforma_resumo(plataforma_value: str):
     """
-    Retorna um relatório resumido em formato CSV para uma plataforma específica.
+    Retorna um relatório resumido para uma plataforma específica (CSV por padrão).
 
     Args:
         plataforma (str): O nome da plataforma.
@@ -42,10 +47,10 @@ def relatorio_plataforma_resumo(plataforma_value: str):
         abort(404, description="Plataforma não encontrada.")
 
     try:
-        relatorio_csv = relatorios_service.gerar_relatorio_plataforma_resumo(
+        relatorio = relatorios_service.gerar_relatorio_plataforma_resumo(
             plataforma_value
         )
-        return _criar_resposta_csv(relatorio_csv)
+        return _criar_resposta_relatorio(relatorio)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
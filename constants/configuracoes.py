@@ -0,0 +1,81 @@
+import os
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env antes de ler as configurações
+load_dotenv()
+
+# Número máximo de requisições simultâneas à API da Stract
+MAX_REQUISICOES_SIMULTANEAS = int(os.getenv("MAX_REQUISICOES_SIMULTANEAS", "8"))
+
+# Endereço base da API da Stract (pode apontar para um stub local em testes)
+STRACT_BASE_URL = os.getenv("STRACT_BASE_URL", "https://sidebar.stract.to/api")
+
+# Consulta a API com o extrator assíncrono (1), em um laço de eventos compartilhado,
+# em vez de uma thread por requisição simultânea (0)
+EXTRATOR_ASYNC = os.getenv("EXTRATOR_ASYNC", "0") == "1"
+
+# Timeouts (em segundos) para abrir a conexão e para ler a resposta da API
+TIMEOUT_CONEXAO_SEGUNDOS = float(os.getenv("TIMEOUT_CONEXAO_SEGUNDOS", "5"))
+TIMEOUT_LEITURA_SEGUNDOS = float(os.getenv("TIMEOUT_LEITURA_SEGUNDOS", "30"))
+
+# Novas tentativas para erros 5xx, 429 e falhas de conexão
+MAX_TENTATIVAS = int(os.getenv("MAX_TENTATIVAS", "3"))
+BACKOFF_BASE_SEGUNDOS = float(os.getenv("BACKOFF_BASE_SEGUNDOS", "0.5"))
+BACKOFF_MAX_SEGUNDOS = float(os.getenv("BACKOFF_MAX_SEGUNDOS", "10"))
+RETRY_AFTER_MAX_SEGUNDOS = float(os.getenv("RETRY_AFTER_MAX_SEGUNDOS", "60"))
+
+# Limite de requisições por segundo à API. Com o teto em 0, não há limite até o
+# primeiro 429. A taxa cai pela metade com um 429 (uma vez por janela: os 429 que
+# chegam até 'LIMITE_JANELA_REDUCAO_SEGUNDOS' depois do fim do 'Retry-After' não a
+# reduzem de novo), até o mínimo, e volta a subir 'LIMITE_AUMENTO_POR_SEGUNDO'
+# requisições por segundo a cada segundo; 'LIMITE_RAJADA' é quantas requisições
+# podem sair de uma vez depois de um período ocioso
+LIMITE_TAXA_MAX_POR_SEGUNDO = float(os.getenv("LIMITE_TAXA_MAX_POR_SEGUNDO", "0"))
+LIMITE_TAXA_MIN_POR_SEGUNDO = float(os.getenv("LIMITE_TAXA_MIN_POR_SEGUNDO", "1"))
+LIMITE_RAJADA = float(os.getenv("LIMITE_RAJADA", "16"))
+LIMITE_AUMENTO_POR_SEGUNDO = float(os.getenv("LIMITE_AUMENTO_POR_SEGUNDO", "5"))
+LIMITE_JANELA_REDUCAO_SEGUNDOS = float(
+    os.getenv("LIMITE_JANELA_REDUCAO_SEGUNDOS", "2")
+)
+
+# Cache em memória dos metadados da API (TTL em segundos; 0 desativa o tipo)
+CACHE_METADADOS_MAX_ITENS = int(os.getenv("CACHE_METADADOS_MAX_ITENS", "256"))
+TTL_PLATAFORMAS_SEGUNDOS = float(os.getenv("TTL_PLATAFORMAS_SEGUNDOS", "600"))
+TTL_CAMPOS_SEGUNDOS = float(os.getenv("TTL_CAMPOS_SEGUNDOS", "600"))
+TTL_CONTAS_SEGUNDOS = float(os.getenv("TTL_CONTAS_SEGUNDOS", "120"))
+
+# Cache persistente em disco (SQLite em CACHE_DIR) das plataformas e dos campos da API
+# e dos relatórios base, que sobrevive a reinícios (1 ativa). Os metadados usam os TTLs acima.
+CACHE_PERSISTENTE = os.getenv("CACHE_PERSISTENTE", "0") == "1"
+CACHE_PERSISTENTE_MAX_MB = float(os.getenv("CACHE_PERSISTENTE_MAX_MB", "256"))
+# Por quanto tempo um relatório base salvo em disco pode ser recarregado após um reinício
+TTL_SNAPSHOT_PERSISTENTE_SEGUNDOS = float(
+    os.getenv("TTL_SNAPSHOT_PERSISTENTE_SEGUNDOS", "86400")
+)
+
+# Validade (em segundos) dos relatórios base já gerados; 0 desativa o reaproveitamento
+TTL_SNAPSHOT_SEGUNDOS = float(os.getenv("TTL_SNAPSHOT_SEGUNDOS", "60"))
+
+# Relatórios filtrados ('?fields=', '?conta=', '?plataforma=') mantidos em memória
+# (pelo mesmo TTL dos snapshots, com descarte LRU)
+CACHE_RECORTES_MAX_ITENS = int(os.getenv("CACHE_RECORTES_MAX_ITENS", "32"))
+
+# Linhas de detalhe (de várias contas) reunidas antes de cada agregação parcial dos
+# resumos montados sem snapshot da plataforma; lotes maiores custam menos CPU e mais memória
+RESUMO_LINHAS_POR_LOTE = int(os.getenv("RESUMO_LINHAS_POR_LOTE", "20000"))
+
+# Envia o CSV em blocos de linhas à medida que é serializado (1) ou de uma só vez (0)
+CSV_STREAMING = os.getenv("CSV_STREAMING", "1") == "1"
+CSV_LINHAS_POR_BLOCO = int(os.getenv("CSV_LINHAS_POR_BLOCO", "5000"))
+
+# Cópias dos relatórios em CSV_DIR, gravadas em segundo plano, uma vez por conteúdo (1)
+# ou desativadas (0). A retenção remove as mais antigas (0 desativa cada limite).
+CSV_ARQUIVO = os.getenv("CSV_ARQUIVO", "1") == "1"
+CSV_ARQUIVO_MAX_PENDENTES = int(os.getenv("CSV_ARQUIVO_MAX_PENDENTES", "32"))
+CSV_RETENCAO_DIAS = float(os.getenv("CSV_RETENCAO_DIAS", "7"))
+CSV_RETENCAO_MAX_ARQUIVOS = int(os.getenv("CSV_RETENCAO_MAX_ARQUIVOS", "500"))
+CSV_RETENCAO_MAX_MB = float(os.getenv("CSV_RETENCAO_MAX_MB", "512"))
+
+# Intervalo (em segundos) entre as atualizações em segundo plano dos relatórios;
+# 0 desativa o atualizador
+ATUALIZACAO_INTERVALO_SEGUNDOS = float(os.getenv("ATUALIZACAO_INTERVALO_SEGUNDOS", "0"))
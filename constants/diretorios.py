@@ -3,3 +3,6 @@ import os
 # Diretório de arquivos csv
 const_dir = os.path.dirname(os.path.abspath(__file__))
 CSV_DIR = os.path.join(const_dir, "..", "csv")
+
+# Diretório do cache persistente (ao lado do diretório de csv)
+CACHE_DIR = os.path.join(const_dir, "..", "cache")
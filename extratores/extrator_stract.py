@@ -1,18 +1,54 @@
 """Implementação do extrator de dados usando a API Stract."""
 
+import hashlib
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Any, Optional
 from urllib.parse import urlencode  # Importe urlencode
 import os
 from dotenv import load_dotenv
 
+from constants.configuracoes import (
+    MAX_REQUISICOES_SIMULTANEAS,
+    STRACT_BASE_URL,
+    TIMEOUT_CONEXAO_SEGUNDOS,
+    TIMEOUT_LEITURA_SEGUNDOS,
+    MAX_TENTATIVAS,
+    BACKOFF_BASE_SEGUNDOS,
+    BACKOFF_MAX_SEGUNDOS,
+    RETRY_AFTER_MAX_SEGUNDOS,
+    LIMITE_TAXA_MAX_POR_SEGUNDO,
+    LIMITE_TAXA_MIN_POR_SEGUNDO,
+    LIMITE_RAJADA,
+    LIMITE_AUMENTO_POR_SEGUNDO,
+    LIMITE_JANELA_REDUCAO_SEGUNDOS,
+    CACHE_METADADOS_MAX_ITENS,
+    TTL_PLATAFORMAS_SEGUNDOS,
+    TTL_CAMPOS_SEGUNDOS,
+    TTL_CONTAS_SEGUNDOS,
+)
+from utils.cache import CacheTTL
+from utils.cache_persistente import CachePersistente
+from utils.concorrencia import ExecutorConcorrente
+from utils.limitador import LimitadorAdaptativo
+from utils.metricas import API_PAGINAS, API_REQUISICOES, medir
+
 
 class ExtratorDadosStract:
     """Extrator de dados para a API da Stract."""
 
-    BASE_URL = "https://sidebar.stract.to/api"
+    BASE_URL = STRACT_BASE_URL
 
-    def __init__(self):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache_persistente: Optional[CachePersistente] = None,
+    ):
         load_dotenv()  # Carrega variáveis de ambiente do arquivo .env
         self.TOKEN_AUTORIZACAO = os.getenv(
             "TOKEN_AUTORIZACAO"
@@ -21,15 +57,102 @@ class ExtratorDadosStract:
             raise ValueError(
                 "A variável de ambiente TOKEN_AUTORIZACAO não está definida."
             )
+        if base_url:
+            self.BASE_URL = base_url.rstrip("/")  # Permite apontar para um stub local
+        # Limite global de requisições em andamento (compartilhado por todas as threads)
+        self.concorrencia = ExecutorConcorrente(MAX_REQUISICOES_SIMULTANEAS)
+        # Limite de requisições por segundo, que se adapta às respostas 429 da API
+        # (sem teto configurado, só passa a limitar depois do primeiro 429).
+        # As requisições dos usuários passam à frente das atualizações em segundo plano.
+        taxa_min = LIMITE_TAXA_MIN_POR_SEGUNDO
+        if LIMITE_TAXA_MAX_POR_SEGUNDO > 0:
+            taxa_min = min(taxa_min, LIMITE_TAXA_MAX_POR_SEGUNDO)
+        self.limitador: Optional[LimitadorAdaptativo] = LimitadorAdaptativo(
+            LIMITE_TAXA_MAX_POR_SEGUNDO,
+            taxa_min,
+            LIMITE_RAJADA,
+            aumento_por_segundo=LIMITE_AUMENTO_POR_SEGUNDO,
+            janela_reducao=LIMITE_JANELA_REDUCAO_SEGUNDOS,
+        )
+
+        # Sessão compartilhada: mantém as conexões abertas (keep-alive) entre requisições.
+        # O pool comporta todas as requisições simultâneas permitidas.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=MAX_REQUISICOES_SIMULTANEAS,
+            max_retries=0,  # As novas tentativas são feitas em _fazer_requisicao
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Authorization"] = f"Bearer {self.TOKEN_AUTORIZACAO}"
+
+        # Cache dos metadados (plataformas, campos e contas), que mudam raramente
+        self.cache_metadados = CacheTTL(
+            CACHE_METADADOS_MAX_ITENS,
+            {
+                "plataformas": TTL_PLATAFORMAS_SEGUNDOS,
+                "campos": TTL_CAMPOS_SEGUNDOS,
+                "contas": TTL_CONTAS_SEGUNDOS,
+            },
+        )
+        # Cache em disco das respostas da API (opcional), que sobrevive a reinícios
+        self.cache_persistente = cache_persistente
+
+        self._lock_contadores = threading.Lock()
+        self._contadores = {"requisicoes": 0, "novas_tentativas": 0, "respostas_429": 0}
+
+    def _incrementar(self, contador: str) -> None:
+        """Incrementa um dos contadores internos de forma segura entre threads."""
+        with self._lock_contadores:
+            self._contadores[contador] += 1
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna os contadores de requisições, novas tentativas e reuso de conexões."""
+        with self._lock_contadores:
+            stats = dict(self._contadores)
+
+        # O urllib3 conta, por pool, quantas conexões foram abertas e quantas requisições
+        # foram feitas; a diferença são as requisições que reaproveitaram uma conexão.
+        conexoes_abertas = 0
+        requisicoes_http = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for chave in list(pools.keys()):
+                pool = pools.get(chave)
+                if pool is not None:
+                    conexoes_abertas += pool.num_connections
+                    requisicoes_http += pool.num_requests
+        stats["conexoes_abertas"] = conexoes_abertas
+        stats["conexoes_reutilizadas"] = max(requisicoes_http - conexoes_abertas, 0)
+        return stats
+
+    @staticmethod
+    def _tempo_backoff(tentativa: int) -> float:
+        """Calcula a espera exponencial com jitter para a tentativa informada."""
+        limite = min(BACKOFF_MAX_SEGUNDOS, BACKOFF_BASE_SEGUNDOS * (2**tentativa))
+        return random.uniform(limite / 2, limite)  # Jitter evita rajadas sincronizadas
+
+    @staticmethod
+    def _tempo_retry_after(response: requests.Response) -> Optional[float]:
+        """Lê o cabeçalho 'Retry-After' (segundos ou data HTTP), se existir."""
+        valor = response.headers.get("Retry-After")
+        if not valor:
+            return None
+        try:
+            segundos = float(valor)
+        except ValueError:
+            try:
+                data = parsedate_to_datetime(valor)
+            except (TypeError, ValueError):
+                return None
+            segundos = (data - datetime.now(timezone.utc)).total_seconds()
+        return min(max(segundos, 0.0), RETRY_AFTER_MAX_SEGUNDOS)
 
     def _fazer_requisicao(
         self, endpoint: str, params: Optional[Dict[str, Any]] = None
     ) -> Any:
-        """Faz uma requisição GET para a API."""
-        headers = {
-            "Authorization": f"Bearer {self.TOKEN_AUTORIZACAO}"
-        }  # Define o cabeçalho de autorização
-
+        """Faz uma requisição GET para a API, repetindo-a em falhas temporárias."""
         # Adiciona 'page' aos parâmetros, se necessário, mas não sobrescreve se já existir.
         if params is None:
             params = {}
@@ -42,57 +165,110 @@ class ExtratorDadosStract:
                 params
             )  # Adiciona os parâmetros à URL, se houver
 
-        response = requests.get(full_url, headers=headers)  # Faz a requisição GET
+        # Resposta salva no cache persistente (por tipo de endpoint e hash da URL)
+        chave_cache = None
+        if self.cache_persistente is not None:
+            chave_cache = hashlib.sha256(full_url.encode("utf-8")).hexdigest()
+            resposta = self.cache_persistente.obter(endpoint, chave_cache)
+            if resposta is not None:
+                return resposta
+
+        rotulos = {"endpoint": endpoint, "plataforma": params.get("platform", "")}
+        tentativa = 0
+        while True:
+            self._incrementar("requisicoes")
+            if self.limitador is not None:
+                self.limitador.adquirir()  # Aguarda a vez (pela prioridade do trabalho)
+            try:
+                with self.concorrencia.limite():  # Aguarda uma vaga antes de chamar a API
+                    with medir("api", API_REQUISICOES, **rotulos):
+                        response = self.session.get(
+                            full_url,
+                            timeout=(TIMEOUT_CONEXAO_SEGUNDOS, TIMEOUT_LEITURA_SEGUNDOS),
+                        )  # Faz a requisição GET
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ):
+                if tentativa >= MAX_TENTATIVAS:
+                    raise
+                espera = self._tempo_backoff(tentativa)
+            else:
+                retry_after = None
+                if response.status_code == 429:
+                    self._incrementar("respostas_429")
+                    retry_after = self._tempo_retry_after(response)
+                if self.limitador is not None:
+                    self.limitador.registrar_resposta(response.status_code, retry_after)
+                if response.status_code != 429 and response.status_code < 500:
+                    break
+                if tentativa >= MAX_TENTATIVAS:
+                    break  # Esgotou as tentativas: raise_for_status trata o erro
+                espera = self._tempo_backoff(tentativa)
+                if retry_after is not None:
+                    espera = retry_after  # Respeita o tempo pedido pela API
+
+            # A espera acontece fora do limite de concorrência, liberando a vaga
+            tentativa += 1
+            self._incrementar("novas_tentativas")
+            time.sleep(espera)
+
         response.raise_for_status()  # Lança exceção para códigos de status de erro (4xx ou 5xx)
-        return response.json()  # Retorna a resposta como JSON
+        API_PAGINAS.incrementar(**rotulos)
+        resposta = response.json()
+        if chave_cache is not None:
+            self.cache_persistente.definir(endpoint, chave_cache, resposta)
+        return resposta  # Retorna a resposta como JSON
 
-    def extrair_contas(self, plataforma: str) -> List[Dict[str, Any]]:
-        """Extrai todas as contas de uma plataforma, lidando com paginação."""
-        todas_contas = []  # Lista para armazenar todas as contas
-        pagina_atual = 1  # Inicializa a página atual
-        total_paginas = 1  # Inicializa o total de páginas (será atualizado)
+    def _extrair_paginado(
+        self, endpoint: str, plataforma: str, descricao: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Extrai todos os itens de um endpoint paginado.
+        Lê a primeira página para descobrir o total e busca as demais em paralelo.
+        """
 
-        while pagina_atual <= total_paginas:
+        def buscar_pagina(pagina: int) -> List[Dict[str, Any]]:
             resposta = self._fazer_requisicao(
-                "accounts", {"platform": plataforma, "page": pagina_atual}
-            )  # Faz a requisição para a página atual
-            contas = resposta.get(
-                "accounts", []
-            )  # Obtém a lista de contas da resposta (ou [] se não houver)
-            if not isinstance(
-                contas, list
-            ):  # Validação: verifica se 'contas' é uma lista
-                raise ValueError("Resposta da API para contas não é uma lista.")
-
-            todas_contas.extend(contas)  # Adiciona as contas da página à lista total
-            total_paginas = resposta.get("pagination", {}).get(
-                "total", 1
-            )  # Atualiza o total de páginas (fallback para 1 se não encontrar)
-            pagina_atual += 1  # Incrementa a página atual
-
-        return todas_contas  # Retorna a lista completa de contas
+                endpoint, {"platform": plataforma, "page": pagina}
+            )  # Faz a requisição para a página
+            itens = resposta.get(endpoint, [])  # Obtém a lista de itens (ou [] se não houver)
+            if not isinstance(itens, list):  # Validação: verifica se é uma lista
+                raise ValueError(f"Resposta da API para {descricao} não é uma lista.")
+            return itens
 
-    def extrair_campos(self, plataforma: str) -> List[Dict[str, str]]:
-        """Extrai todos os campos de uma plataforma, lidando com paginação."""
-        todos_campos = []  # Lista para armazenar todos os campos
-        pagina_atual = 1  # Inicializa a página atual
-        total_paginas = 1  # Inicializa o total de páginas
+        primeira = self._fazer_requisicao(endpoint, {"platform": plataforma, "page": 1})
+        todos_itens = primeira.get(endpoint, [])
+        if not isinstance(todos_itens, list):
+            raise ValueError(f"Resposta da API para {descricao} não é uma lista.")
+        total_paginas = primeira.get("pagination", {}).get(
+            "total", 1
+        )  # Total de páginas (fallback para 1 se não encontrar)
 
-        while pagina_atual <= total_paginas:
-            resposta = self._fazer_requisicao(
-                "fields", {"platform": plataforma, "page": pagina_atual}
-            )  # Faz a requisição para a página atual
-            campos = resposta.get("fields", [])  # Obtém a lista de campos da resposta
-            if not isinstance(campos, list):  # Validação
-                raise ValueError("Resposta da API para campos não é uma lista.")
+        # Busca as páginas restantes em paralelo; 'mapear' devolve na ordem das páginas
+        paginas = self.concorrencia.mapear(buscar_pagina, range(2, total_paginas + 1))
+        for itens in paginas:
+            todos_itens.extend(itens)  # Junta as páginas na ordem original
 
-            todos_campos.extend(campos)  # Adiciona os campos da página à lista total
-            total_paginas = resposta.get("pagination", {}).get(
-                "total", 1
-            )  # Atualiza o total
-            pagina_atual += 1  # Incrementa a página
+        return todos_itens  # Retorna a lista completa
 
-        return todos_campos  # Retorna a lista completa de campos
+    def extrair_contas(self, plataforma: str) -> List[Dict[str, Any]]:
+        """Extrai todas as contas de uma plataforma, lidando com paginação (com cache)."""
+        contas = self.cache_metadados.obter_ou_calcular(
+            "contas",
+            plataforma,
+            lambda: self._extrair_paginado("accounts", plataforma, "contas"),
+        )
+        return list(contas)  # Cópia, para que o chamador não altere o cache
+
+    def extrair_campos(self, plataforma: str) -> List[Dict[str, str]]:
+        """Extrai todos os campos de uma plataforma, lidando com paginação (com cache)."""
+        campos = self.cache_metadados.obter_ou_calcular(
+            "campos",
+            plataforma,
+            lambda: self._extrair_paginado("fields", plataforma, "campos"),
+        )
+        return list(campos)  # Cópia, para que o chamador não altere o cache
 
     def extrair_insights(
         self, plataforma: str, conta: Dict[str, Any], campos: List[Dict[str, str]]
@@ -142,10 +318,17 @@ class ExtratorDadosStract:
         insights_validos = [insight for insight in insights if insight]
         return insights_validos  # Retorna a lista de insights válidos
 
-    def extrair_todas_plataformas(self) -> List[Dict[str, str]]:
-        """Extrai todas as plataformas disponíveis."""
+    def _extrair_plataformas_api(self) -> List[Dict[str, str]]:
+        """Consulta a API para obter todas as plataformas disponíveis."""
         resposta = self._fazer_requisicao("platforms")  # Faz a requisição
         plataformas = resposta.get("platforms", [])  # Obtém a lista de plataformas
         if not isinstance(plataformas, list):  # Validação
             raise ValueError("Resposta da API para plataformas não é uma lista.")
         return plataformas  # Retorna a lista de plataformas
+
+    def extrair_todas_plataformas(self) -> List[Dict[str, str]]:
+        """Extrai todas as plataformas disponíveis (com cache)."""
+        plataformas = self.cache_metadados.obter_ou_calcular(
+            "plataformas", None, self._extrair_plataformas_api
+        )
+        return list(plataformas)  # Cópia, para que o chamador não altere o cache
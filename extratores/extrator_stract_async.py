@@ -0,0 +1,309 @@
+"""Implementação assíncrona (asyncio + httpx) do extrator de dados da API Stract."""
+
+import asyncio
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+from dotenv import load_dotenv
+
+from constants.configuracoes import (
+    MAX_REQUISICOES_SIMULTANEAS,
+    STRACT_BASE_URL,
+    TIMEOUT_CONEXAO_SEGUNDOS,
+    TIMEOUT_LEITURA_SEGUNDOS,
+    MAX_TENTATIVAS,
+    CACHE_METADADOS_MAX_ITENS,
+    TTL_PLATAFORMAS_SEGUNDOS,
+    TTL_CAMPOS_SEGUNDOS,
+    TTL_CONTAS_SEGUNDOS,
+)
+from extratores.extrator_stract import ExtratorDadosStract
+from utils.cache import CacheTTL
+from utils.cache_persistente import CachePersistente
+from utils.limitador import LimitadorAdaptativo, VagasPrioritariasAsync
+from utils.metricas import API_PAGINAS, API_REQUISICOES, medir
+
+
+class ExtratorDadosStractAsync:
+    """
+    Extrator assíncrono para a API da Stract, com os mesmos métodos do
+    ExtratorDadosStract (como corrotinas).
+
+    O cliente HTTP e o limite de concorrência pertencem ao laço de eventos em que
+    são usados pela primeira vez: use sempre o mesmo laço (ver utils.concorrencia.LacoEventos).
+    """
+
+    BASE_URL = STRACT_BASE_URL
+
+    # Mesma política de espera entre tentativas do extrator síncrono
+    _tempo_backoff = staticmethod(ExtratorDadosStract._tempo_backoff)
+    _tempo_retry_after = staticmethod(ExtratorDadosStract._tempo_retry_after)
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache_metadados: Optional[CacheTTL] = None,
+        cache_persistente: Optional[CachePersistente] = None,
+        limitador: Optional[LimitadorAdaptativo] = None,
+    ):
+        load_dotenv()  # Carrega variáveis de ambiente do arquivo .env
+        self.TOKEN_AUTORIZACAO = os.getenv("TOKEN_AUTORIZACAO")
+        if not self.TOKEN_AUTORIZACAO:
+            raise ValueError(
+                "A variável de ambiente TOKEN_AUTORIZACAO não está definida."
+            )
+        if base_url:
+            self.BASE_URL = base_url.rstrip("/")  # Permite apontar para um stub local
+
+        # Limite de requisições em andamento e cliente HTTP (criado no primeiro uso)
+        # (as vagas livres vão primeiro para os trabalhos mais prioritários)
+        self._vagas = VagasPrioritariasAsync(MAX_REQUISICOES_SIMULTANEAS)
+        self._cliente: Optional[httpx.AsyncClient] = None
+
+        # Cache dos metadados; pode ser o mesmo do extrator síncrono
+        self.cache_metadados = cache_metadados or CacheTTL(
+            CACHE_METADADOS_MAX_ITENS,
+            {
+                "plataformas": TTL_PLATAFORMAS_SEGUNDOS,
+                "campos": TTL_CAMPOS_SEGUNDOS,
+                "contas": TTL_CONTAS_SEGUNDOS,
+            },
+        )
+        # Consultas de metadados em andamento, por (tipo, chave); só são usadas no laço
+        self._calculos: Dict[Tuple[str, Hashable], "asyncio.Future[Any]"] = {}
+        # Cache em disco das respostas da API (opcional), com as mesmas chaves do síncrono
+        self.cache_persistente = cache_persistente
+        # Limite de requisições por segundo; deve ser o mesmo do extrator síncrono,
+        # para que os dois respeitem uma única taxa
+        self.limitador = limitador
+
+        self._lock_contadores = threading.Lock()
+        self._contadores = {"requisicoes": 0, "novas_tentativas": 0, "respostas_429": 0}
+
+    def _incrementar(self, contador: str) -> None:
+        """Incrementa um dos contadores internos de forma segura entre threads."""
+        with self._lock_contadores:
+            self._contadores[contador] += 1
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna os contadores de requisições e novas tentativas."""
+        with self._lock_contadores:
+            return dict(self._contadores)
+
+    @property
+    def cliente(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartilhado: mantém as conexões abertas (keep-alive)."""
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.TOKEN_AUTORIZACAO}"},
+                timeout=httpx.Timeout(
+                    TIMEOUT_LEITURA_SEGUNDOS, connect=TIMEOUT_CONEXAO_SEGUNDOS
+                ),
+                limits=httpx.Limits(
+                    max_connections=MAX_REQUISICOES_SIMULTANEAS,
+                    max_keepalive_connections=MAX_REQUISICOES_SIMULTANEAS,
+                ),
+            )
+        return self._cliente
+
+    async def fechar(self) -> None:
+        """Fecha as conexões do cliente HTTP."""
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+
+    async def _fazer_requisicao(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Faz uma requisição GET para a API, repetindo-a em falhas temporárias."""
+        params = dict(params or {})
+        params.setdefault("page", 1)
+        url = f"{self.BASE_URL}/{endpoint}"
+
+        # Resposta salva no cache persistente (por tipo de endpoint e hash da URL)
+        chave_cache = None
+        if self.cache_persistente is not None:
+            url_completa = f"{url}?{urlencode(params)}"
+            chave_cache = hashlib.sha256(url_completa.encode("utf-8")).hexdigest()
+            # SQLite e pickle bloqueiam: rodam em uma thread, fora do laço de eventos
+            resposta = await asyncio.to_thread(
+                self.cache_persistente.obter, endpoint, chave_cache
+            )
+            if resposta is not None:
+                return resposta
+
+        rotulos = {"endpoint": endpoint, "plataforma": params.get("platform", "")}
+        tentativa = 0
+        while True:
+            self._incrementar("requisicoes")
+            if self.limitador is not None:
+                await self.limitador.adquirir_async()
+            try:
+                async with self._vagas.reservar():  # Aguarda uma vaga antes de chamar a API
+                    with medir("api", API_REQUISICOES, **rotulos):
+                        response = await self.cliente.get(url, params=params)
+            except httpx.TransportError:  # Falhas de conexão e timeouts
+                if tentativa >= MAX_TENTATIVAS:
+                    raise
+                espera = self._tempo_backoff(tentativa)
+            else:
+                retry_after = None
+                if response.status_code == 429:
+                    self._incrementar("respostas_429")
+                    retry_after = self._tempo_retry_after(response)
+                if self.limitador is not None:
+                    self.limitador.registrar_resposta(response.status_code, retry_after)
+                if response.status_code != 429 and response.status_code < 500:
+                    break
+                if tentativa >= MAX_TENTATIVAS:
+                    break  # Esgotou as tentativas: raise_for_status trata o erro
+                espera = self._tempo_backoff(tentativa)
+                if retry_after is not None:
+                    espera = retry_after  # Respeita o tempo pedido pela API
+
+            # A espera acontece fora do limite de concorrência, liberando a vaga
+            tentativa += 1
+            self._incrementar("novas_tentativas")
+            await asyncio.sleep(espera)
+
+        response.raise_for_status()  # Lança exceção para códigos de status de erro
+        API_PAGINAS.incrementar(**rotulos)
+        resposta = response.json()
+        if chave_cache is not None:
+            await asyncio.to_thread(
+                self.cache_persistente.definir, endpoint, chave_cache, resposta
+            )
+        return resposta
+
+    async def _extrair_paginado(
+        self, endpoint: str, plataforma: str, descricao: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Extrai todos os itens de um endpoint paginado.
+        Lê a primeira página para descobrir o total e busca as demais ao mesmo tempo.
+        """
+
+        async def buscar_pagina(pagina: int) -> List[Dict[str, Any]]:
+            resposta = await self._fazer_requisicao(
+                endpoint, {"platform": plataforma, "page": pagina}
+            )
+            itens = resposta.get(endpoint, [])
+            if not isinstance(itens, list):
+                raise ValueError(f"Resposta da API para {descricao} não é uma lista.")
+            return itens
+
+        primeira = await self._fazer_requisicao(
+            endpoint, {"platform": plataforma, "page": 1}
+        )
+        todos_itens = primeira.get(endpoint, [])
+        if not isinstance(todos_itens, list):
+            raise ValueError(f"Resposta da API para {descricao} não é uma lista.")
+        total_paginas = primeira.get("pagination", {}).get("total", 1)
+
+        # 'gather' devolve os resultados na ordem das páginas
+        paginas = await asyncio.gather(
+            *(buscar_pagina(pagina) for pagina in range(2, total_paginas + 1))
+        )
+        for itens in paginas:
+            todos_itens.extend(itens)
+        return todos_itens
+
+    async def _obter_ou_calcular(self, tipo: str, chave: Any, calcular) -> Any:
+        """
+        Como CacheTTL.obter_ou_calcular, aguardando a corrotina 'calcular'.
+        Corrotinas simultâneas com a mesma chave aguardam uma única consulta.
+        """
+        valor = self.cache_metadados.obter(tipo, chave)
+        if valor is not None:
+            return valor
+
+        async def calcular_e_definir() -> Any:
+            valor = await calcular()
+            self.cache_metadados.definir(tipo, chave, valor)
+            return valor
+
+        tarefa = self._calculos.get((tipo, chave))
+        if tarefa is None:
+            tarefa = self._calculos[(tipo, chave)] = asyncio.ensure_future(
+                calcular_e_definir()
+            )
+            tarefa.add_done_callback(lambda _: self._calculos.pop((tipo, chave), None))
+        # 'shield': o cancelamento de quem espera não cancela a consulta compartilhada
+        return await asyncio.shield(tarefa)
+
+    async def extrair_contas(self, plataforma: str) -> List[Dict[str, Any]]:
+        """Extrai todas as contas de uma plataforma, lidando com paginação (com cache)."""
+        contas = await self._obter_ou_calcular(
+            "contas",
+            plataforma,
+            lambda: self._extrair_paginado("accounts", plataforma, "contas"),
+        )
+        return list(contas)  # Cópia, para que o chamador não altere o cache
+
+    async def extrair_campos(self, plataforma: str) -> List[Dict[str, str]]:
+        """Extrai todos os campos de uma plataforma, lidando com paginação (com cache)."""
+        campos = await self._obter_ou_calcular(
+            "campos",
+            plataforma,
+            lambda: self._extrair_paginado("fields", plataforma, "campos"),
+        )
+        return list(campos)  # Cópia, para que o chamador não altere o cache
+
+    async def extrair_insights(
+        self, plataforma: str, conta: Dict[str, Any], campos: List[Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """Extrai os insights de uma conta, com tratamento de erros e lista vazia."""
+        if not conta or "token" not in conta or "id" not in conta:
+            raise ValueError("Dados da conta inválidos.")
+        if not isinstance(campos, list):
+            raise TypeError("'campos' deve ser uma lista de dicionários.")
+
+        campos_str = ",".join(
+            campo["value"]
+            for campo in campos
+            if isinstance(campo, dict) and "value" in campo
+        )
+
+        try:
+            resposta = await self._fazer_requisicao(
+                "insights",
+                {
+                    "platform": plataforma,
+                    "account": conta["id"],
+                    "token": conta["token"],
+                    "fields": campos_str,
+                },
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:  # Se a conta não for encontrada (404)
+                return []
+            raise
+        except httpx.HTTPError as e:
+            print(f"Erro na requisição: {e}")  # Log do erro
+            raise
+
+        insights = resposta.get("insights", [])
+        if not isinstance(insights, list):
+            raise ValueError("Resposta da API para insights não é uma lista.")
+
+        # Remove insights nulos/vazios (se existirem):
+        return [insight for insight in insights if insight]
+
+    async def _extrair_plataformas_api(self) -> List[Dict[str, str]]:
+        """Consulta a API para obter todas as plataformas disponíveis."""
+        resposta = await self._fazer_requisicao("platforms")
+        plataformas = resposta.get("platforms", [])
+        if not isinstance(plataformas, list):
+            raise ValueError("Resposta da API para plataformas não é uma lista.")
+        return plataformas
+
+    async def extrair_todas_plataformas(self) -> List[Dict[str, str]]:
+        """Extrai todas as plataformas disponíveis (com cache)."""
+        plataformas = await self._obter_ou_calcular(
+            "plataformas", None, self._extrair_plataformas_api
+        )
+        return list(plataformas)  # Cópia, para que o chamador não altere o cache
@@ -0,0 +1,175 @@
+"""Agregação incremental dos relatórios resumidos."""
+
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    is_numeric_dtype,
+)
+
+# Número mínimo de linhas parciais acumuladas antes de uma compactação
+_MIN_LINHAS_COMPACTACAO = 1024
+
+
+def _numerico(tipo) -> bool:
+    """Indica se o tipo é numérico, como em select_dtypes(include=["number"])."""
+    return is_numeric_dtype(tipo) and not is_bool_dtype(tipo)
+
+
+def _ampliar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas numéricas compactas (ex: int8, float32) para int64/float64,
+    para que as somas não estourem nem percam precisão.
+    """
+    tipos = {}
+    for col, tipo in df.dtypes.items():
+        if is_integer_dtype(tipo) and tipo != np.int64:
+            tipos[col] = np.int64
+        elif is_float_dtype(tipo) and tipo != np.float64:
+            tipos[col] = np.float64
+    return df.astype(tipos) if tipos else df
+
+
+def _somar(
+    df: pd.DataFrame, group_cols: List[str], colunas: List[str], sort: bool
+) -> pd.DataFrame:
+    """
+    Agrupa 'df' por 'group_cols' e soma 'colunas'. observed=True: com colunas
+    categóricas, apenas os grupos que aparecem em 'df'.
+    """
+    return df.groupby(group_cols, as_index=False, sort=sort, observed=True)[colunas].sum()
+
+
+class AgregadorIncremental:
+    """
+    Soma, por grupo, as colunas numéricas de lotes de linhas à medida que chegam
+    (por exemplo, os insights de várias contas). Guarda apenas somas parciais, de
+    modo que a memória depende do número de grupos e não do número de linhas.
+
+    O resultado é o mesmo de agrupar e somar o DataFrame com todos os lotes quando
+    cada grupo vem de um único lote (ex: um snapshot por plataforma). Se um grupo
+    for dividido entre lotes, as colunas reais podem diferir na última casa decimal,
+    pois a soma das somas parciais não arredonda como a soma das linhas. Uma coluna
+    é somada quando é numérica em todos os lotes em que tem algum valor; lotes em
+    que ela só tem nulos não definem o seu tipo (a não ser que sejam os únicos).
+    """
+
+    def __init__(self, group_cols: List[str]):
+        self.group_cols = group_cols
+        self._colunas: Dict[str, None] = {}  # União das colunas, na ordem de aparição
+        # Coluna -> {(tem valores?, numérica?)} de cada lote em que apareceu
+        self._tipos: Dict[str, Set[Tuple[bool, bool]]] = {}
+        self._parciais: List[pd.DataFrame] = []
+        self._linhas_parciais = 0
+        self._linhas_compactadas = 0
+        self.linhas = 0  # Total de linhas de detalhe já agregadas
+
+    def adicionar(self, df: pd.DataFrame) -> None:
+        """
+        Incorpora um lote de linhas às somas parciais. Prefira lotes grandes (ex:
+        várias contas): o custo por lote é fixo e independe do número de linhas.
+        """
+        if df.empty:
+            return
+
+        colunas = []
+        for col, tipo in df.dtypes.items():
+            serie = df[col]
+            # A coluna só é percorrida quando a primeira linha é nula
+            tem_valores = bool(pd.notna(serie.iloc[0]) or serie.notna().any())
+            self._tipos.setdefault(col, set()).add((tem_valores, _numerico(tipo)))
+            if _numerico(tipo) and col not in self.group_cols:
+                colunas.append(col)
+        self._colunas.update(dict.fromkeys(df.columns))
+
+        # Inteiros e reais compactos são ampliados antes da soma, para não estourar
+        parcial = _somar(
+            _ampliar(df[self.group_cols + colunas]), self.group_cols, colunas, sort=False
+        )
+        self._acumular([parcial], len(df))
+
+    def incorporar(self, outro: "AgregadorIncremental") -> None:
+        """Incorpora as somas parciais de outro agregador com as mesmas colunas de grupo."""
+        if not outro.linhas:
+            return
+        for col, tipos in outro._tipos.items():
+            self._tipos.setdefault(col, set()).update(tipos)
+        self._colunas.update(outro._colunas)
+        self._acumular(outro._parciais, outro.linhas)
+
+    def _acumular(self, parciais: List[pd.DataFrame], linhas: int) -> None:
+        """Guarda somas parciais, compactando-as quando crescem demais."""
+        self._parciais.extend(parciais)
+        self._linhas_parciais += sum(len(parcial) for parcial in parciais)
+        self.linhas += linhas
+
+        limite = max(_MIN_LINHAS_COMPACTACAO, 2 * self._linhas_compactadas)
+        if self._linhas_parciais > limite:
+            self._compactar()
+
+    def _somaveis(self, colunas) -> List[str]:
+        """Colunas das somas parciais que não são de agrupamento."""
+        return [col for col in colunas if col not in self.group_cols]
+
+    def _compactar(self) -> None:
+        """Junta as somas parciais em uma única linha por grupo."""
+        total = self._concatenar()
+        compactado = _somar(
+            total, self.group_cols, self._somaveis(total.columns), sort=False
+        )
+        self._parciais = [compactado]
+        self._linhas_parciais = self._linhas_compactadas = len(compactado)
+
+    def _concatenar(self) -> pd.DataFrame:
+        """Concatena as somas parciais (ignorando as vazias)."""
+        parciais = [parcial for parcial in self._parciais if not parcial.empty]
+        if not parciais:
+            return pd.DataFrame(columns=self.group_cols)
+        if len(parciais) == 1:
+            return parciais[0]
+        return pd.concat(parciais, ignore_index=True)
+
+    def _colunas_numericas(self) -> List[str]:
+        """Colunas numéricas em todos os lotes em que têm algum valor."""
+        numericas = []
+        for col in self._colunas:
+            tipos = self._tipos[col]
+            com_valores = {numerica for tem_valores, numerica in tipos if tem_valores}
+            if (com_valores or {numerica for _, numerica in tipos}) == {True}:
+                numericas.append(col)
+        return numericas
+
+    def construir(self) -> pd.DataFrame:
+        """
+        Cria o resumo: uma linha por grupo, com as colunas numéricas somadas.
+        Mantém todas as colunas vistas, preenchendo as demais colunas não numéricas
+        (que não são de agrupamento) com string vazia.
+        """
+        if not self.linhas:
+            return pd.DataFrame(columns=[self.group_cols[0]])
+
+        num_cols = self._colunas_numericas()
+        total = self._concatenar()
+
+        # 1. Agrupa e soma:
+        resumo = _somar(
+            total,
+            self.group_cols,
+            [col for col in self._somaveis(num_cols) if col in total.columns],
+            sort=True,
+        )
+
+        # 2. Garante que TODAS as colunas vistas estejam presentes (preenchendo com NaN):
+        resumo = resumo.reindex(columns=list(self._colunas))
+
+        # 3. Preenche NaN com '' APENAS nas colunas que não são numéricas
+        #    E não são colunas de agrupamento:
+        for col in resumo.columns:
+            if col not in num_cols and col not in self.group_cols:
+                resumo[col] = resumo[col].fillna("")
+
+        return resumo
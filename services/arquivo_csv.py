@@ -0,0 +1,183 @@
+"""Arquivo em disco dos relatórios CSV, gravado em segundo plano e com retenção limitada."""
+
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.metricas import BYTES, medir
+
+# Tamanho do prefixo do hash do conteúdo usado no nome dos arquivos
+_TAMANHO_HASH = 16
+# Arquivos gravados pelo ArquivoCSV: <timestamp>_<nome_base>_<hash>.csv
+_PADRAO_ARQUIVO = re.compile(rf"_([0-9a-f]{{{_TAMANHO_HASH}}})\.csv$")
+
+
+class ArquivoCSV:
+    """
+    Guarda em 'diretorio' uma cópia CSV de cada relatório servido.
+
+    A gravação é feita por uma thread em segundo plano, fora da requisição. Cada
+    conteúdo (identificado pelo hash do snapshot) é gravado uma única vez; relatórios
+    iguais não geram novos arquivos. Após cada gravação, os arquivos mais antigos
+    são removidos para respeitar os limites de idade, quantidade e tamanho total.
+    """
+
+    def __init__(
+        self,
+        diretorio: str,
+        max_pendentes: int,
+        max_idade_segundos: float,
+        max_arquivos: int,
+        max_bytes: int,
+    ):
+        self.diretorio = diretorio
+        self.max_idade_segundos = max_idade_segundos
+        self.max_arquivos = max_arquivos
+        self.max_bytes = max_bytes
+        os.makedirs(diretorio, exist_ok=True)
+
+        self._fila: "queue.Queue[Optional[Tuple[str, str, pd.DataFrame]]]" = queue.Queue(
+            max_pendentes
+        )
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pendentes = set()  # Hashes na fila, ainda não gravados
+        self._contadores = {"gravados": 0, "repetidos": 0, "descartados": 0, "removidos": 0}
+        # Hash do conteúdo -> arquivo, reconstruído a partir dos nomes já existentes
+        # (depois de aplicar a retenção aos arquivos de execuções anteriores)
+        self._arquivos: Dict[str, str] = {}
+        self.aplicar_retencao()
+        self._arquivos = self._indexar()
+
+    def _indexar(self) -> Dict[str, str]:
+        """Lê os arquivos já gravados (inclusive por execuções anteriores)."""
+        indice = {}
+        for nome in sorted(os.listdir(self.diretorio)):
+            encontrado = _PADRAO_ARQUIVO.search(nome)
+            if encontrado:
+                indice[encontrado.group(1)] = os.path.join(self.diretorio, nome)
+        return indice
+
+    def arquivar(self, nome_base: str, hash_conteudo: str, df: pd.DataFrame) -> None:
+        """
+        Agenda a gravação do relatório, sem bloquear a requisição.
+        Conteúdos já gravados são ignorados; com a fila cheia, a cópia é descartada.
+        """
+        chave = hash_conteudo[:_TAMANHO_HASH]
+        with self._lock:
+            if chave in self._arquivos or chave in self._pendentes:
+                self._contadores["repetidos"] += 1
+                return
+            try:
+                self._fila.put_nowait((chave, nome_base, df))
+            except queue.Full:
+                self._contadores["descartados"] += 1
+                return
+            self._pendentes.add(chave)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._executar, name="arquivo-csv", daemon=True
+                )
+                self._thread.start()
+
+    def _executar(self) -> None:
+        """Laço da thread: grava os relatórios da fila até receber None."""
+        while True:
+            item = self._fila.get()
+            try:
+                if item is None:
+                    return
+                self._gravar(*item)
+            except Exception as e:  # Uma falha de disco não interrompe as próximas
+                print(f"Erro ao arquivar o relatório: {e}")
+            finally:
+                if item is not None:
+                    with self._lock:
+                        self._pendentes.discard(item[0])
+                self._fila.task_done()
+
+    def _gravar(self, chave: str, nome_base: str, df: pd.DataFrame) -> None:
+        """Grava o CSV (com nome definitivo só ao final) e aplica a retenção."""
+        timestamp = datetime.now().strftime(
+            "%Y%m%d_%H%M%S"
+        )  # Formato: AnoMesDia_HoraMinutoSegundo
+        caminho = os.path.join(self.diretorio, f"{timestamp}_{nome_base}_{chave}.csv")
+        caminho_parcial = f"{caminho}.parcial"
+        try:
+            with medir("gravacao_disco"):
+                # Dropa a coluna de id, como na resposta
+                df.drop("id", axis=1, errors="ignore").to_csv(
+                    caminho_parcial, index=False, encoding="utf-8"
+                )
+                os.replace(caminho_parcial, caminho)
+        finally:
+            if os.path.exists(caminho_parcial):
+                os.remove(caminho_parcial)
+        BYTES.incrementar(os.path.getsize(caminho), destino="arquivo", formato="csv")
+
+        with self._lock:
+            self._arquivos[chave] = caminho
+            self._contadores["gravados"] += 1
+        print(f"Relatório salvo em: {caminho}")  # Log informativo
+        self.aplicar_retencao()
+
+    def aplicar_retencao(self) -> None:
+        """Remove os CSVs mais antigos que excedem a idade, a quantidade ou o tamanho máximos."""
+        arquivos: List[Tuple[float, int, str]] = []
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file() and entrada.name.endswith(".csv"):
+                info = entrada.stat()
+                arquivos.append((info.st_mtime, info.st_size, entrada.path))
+        arquivos.sort()  # Do mais antigo para o mais recente
+
+        limite_idade = time.time() - self.max_idade_segundos
+        total_bytes = sum(tamanho for _, tamanho, _ in arquivos)
+        restantes = len(arquivos)
+        remover = []
+        for modificado_em, tamanho, caminho in arquivos:
+            if (
+                (self.max_idade_segundos > 0 and modificado_em < limite_idade)
+                or (self.max_arquivos > 0 and restantes > self.max_arquivos)
+                or (self.max_bytes > 0 and total_bytes > self.max_bytes)
+            ):
+                remover.append(caminho)
+                restantes -= 1
+                total_bytes -= tamanho
+
+        for caminho in remover:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+        if remover:
+            removidos = set(remover)
+            with self._lock:
+                self._arquivos = {
+                    chave: caminho
+                    for chave, caminho in self._arquivos.items()
+                    if caminho not in removidos
+                }
+                self._contadores["removidos"] += len(remover)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna os contadores de arquivos gravados, repetidos, descartados e removidos."""
+        with self._lock:
+            stats = dict(self._contadores)
+            stats["arquivos"] = len(self._arquivos)
+        stats["pendentes"] = self._fila.qsize()
+        return stats
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """Grava o que ainda está na fila e encerra a thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._fila.put(None)
+        thread.join(timeout)
@@ -0,0 +1,160 @@
+"""Atualização periódica, em segundo plano, dos snapshots dos relatórios."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from services.relatorios_service import RelatoriosService
+from utils.limitador import PRIORIDADE_SEGUNDO_PLANO, prioridade
+
+
+def _formatar_instante(instante: Optional[float]) -> Optional[str]:
+    """Converte um time.time() para ISO 8601 (ou None)."""
+    return datetime.fromtimestamp(instante).isoformat() if instante else None
+
+
+class AtualizadorSnapshots:
+    """
+    Reconstrói os snapshots de todas as plataformas a cada 'intervalo_segundos'
+    e atende aos pedidos de revalidação feitos quando um snapshot expira.
+    """
+
+    def __init__(self, servico: RelatoriosService, intervalo_segundos: float):
+        self.servico = servico
+        self.intervalo_segundos = intervalo_segundos
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._revalidacoes: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pendentes = set()  # Plataformas com revalidação já agendada
+        self._status_plataformas: Dict[str, Dict[str, Any]] = {}
+        self._ultimo_ciclo: Dict[str, Any] = {}
+        self._falhas = 0
+
+    @property
+    def ativo(self) -> bool:
+        """Indica se a thread de atualização está em execução."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self) -> None:
+        """Inicia a thread de atualização e passa a servir snapshots expirados."""
+        if self.ativo:
+            return
+        self._parar.clear()
+        self._revalidacoes = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="revalidacao-snapshots"
+        )
+        self._thread = threading.Thread(
+            target=self._executar, name="atualizador-snapshots", daemon=True
+        )
+        self.servico.atualizador = self
+        self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """Interrompe a atualização e aguarda o fim do ciclo em andamento."""
+        self._parar.set()
+        self.servico.atualizador = None  # Volta a gerar os relatórios na requisição
+        if self._revalidacoes is not None:
+            self._revalidacoes.shutdown(wait=False, cancel_futures=True)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def solicitar(self, plataforma: Dict[str, str]) -> None:
+        """Agenda a atualização de uma plataforma (ignorado se já estiver agendada)."""
+        with self._lock:
+            if plataforma["value"] in self._pendentes or self._parar.is_set():
+                return
+            self._pendentes.add(plataforma["value"])
+        try:
+            self._revalidacoes.submit(self._revalidar, plataforma)
+        except RuntimeError:  # Executor já encerrado
+            with self._lock:
+                self._pendentes.discard(plataforma["value"])
+
+    def _revalidar(self, plataforma: Dict[str, str]) -> None:
+        """Atualiza a plataforma pedida por uma requisição e libera novos pedidos."""
+        try:
+            with prioridade(PRIORIDADE_SEGUNDO_PLANO):  # Cede a vez às requisições dos usuários
+                self._atualizar_plataforma(plataforma)
+        finally:
+            with self._lock:
+                self._pendentes.discard(plataforma["value"])
+
+    def _atualizar_plataforma(self, plataforma: Dict[str, str]) -> bool:
+        """Gera um novo snapshot da plataforma, registrando duração e falhas."""
+        inicio = time.time()
+        erro = None
+        try:
+            self.servico.atualizar_snapshot_plataforma(plataforma)
+        except Exception as e:  # Uma falha não interrompe as demais plataformas
+            erro = e
+            print(f"Erro ao atualizar a plataforma {plataforma['value']}: {e}")
+
+        with self._lock:
+            status = self._status_plataformas.setdefault(
+                plataforma["value"],
+                {"ultima_atualizacao": None, "duracao_segundos": None, "falhas": 0},
+            )
+            if erro is None:
+                status["ultima_atualizacao"] = inicio
+                status["duracao_segundos"] = time.time() - inicio
+            else:
+                status["falhas"] += 1
+                status["ultimo_erro"] = str(erro)
+                self._falhas += 1
+        return erro is None
+
+    def atualizar_todas(self) -> None:
+        """Executa um ciclo completo: todas as plataformas e, em seguida, o geral."""
+        inicio = time.time()
+        sucesso = False
+        try:
+            plataformas = self.servico.extrator.extrair_todas_plataformas()
+            resultados = self.servico.extrator.concorrencia.mapear(
+                self._atualizar_plataforma, plataformas
+            )
+            self.servico.obter_snapshot()  # Remonta o geral com os novos snapshots
+            sucesso = all(resultados)
+        except Exception as e:
+            print(f"Erro no ciclo de atualização dos relatórios: {e}")
+            with self._lock:
+                self._falhas += 1
+
+        with self._lock:
+            self._ultimo_ciclo = {
+                "inicio": inicio,
+                "duracao_segundos": time.time() - inicio,
+                "sucesso": sucesso,
+            }
+
+    def _executar(self) -> None:
+        """Laço da thread: atualiza e espera o intervalo (ou o pedido de parada)."""
+        while not self._parar.is_set():
+            with prioridade(PRIORIDADE_SEGUNDO_PLANO):  # Cede a vez às requisições dos usuários
+                self.atualizar_todas()
+            self._parar.wait(self.intervalo_segundos)
+
+    def status(self) -> Dict[str, Any]:
+        """Retorna o estado do atualizador: último ciclo, durações e falhas."""
+        with self._lock:
+            ultimo_ciclo = dict(self._ultimo_ciclo)
+            plataformas = {
+                valor: dict(status) for valor, status in self._status_plataformas.items()
+            }
+            falhas = self._falhas
+
+        if ultimo_ciclo:
+            ultimo_ciclo["inicio"] = _formatar_instante(ultimo_ciclo["inicio"])
+        for status in plataformas.values():
+            status["ultima_atualizacao"] = _formatar_instante(
+                status["ultima_atualizacao"]
+            )
+        return {
+            "ativo": self.ativo,
+            "intervalo_segundos": self.intervalo_segundos,
+            "falhas": falhas,
+            "ultimo_ciclo": ultimo_ciclo or None,
+            "plataformas": plataformas,
+        }
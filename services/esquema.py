@@ -0,0 +1,146 @@
+"""Tipos compactos (categóricos e numéricos reduzidos) dos DataFrames dos relatórios."""
+
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    infer_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    union_categoricals,
+)
+
+from services.montador_colunar import CAMPOS_DERIVADOS
+
+# Colunas de dimensão: sempre categóricas (poucos valores repetidos em muitas linhas)
+COLUNAS_DIMENSAO = ("Plataforma", "Conta")
+# Colunas de texto dos campos viram categóricas quando têm no máximo esta fração
+# de valores distintos (ex: 'Status'; nomes únicos por linha continuam como texto)
+FRACAO_MAX_CATEGORIAS = 0.5
+
+
+def _compactar_inteiros(serie: pd.Series) -> pd.Series:
+    """Menor tipo inteiro (com sinal) que comporta todos os valores."""
+    return pd.to_numeric(serie, downcast="integer")
+
+
+def _compactar_reais(serie: pd.Series) -> pd.Series:
+    """
+    float32 apenas se nenhum valor mudar, nem na forma como é escrito no CSV
+    (ex: 0.30000001192092896 é exato em float32, mas seria escrito como '0.3').
+    """
+    if serie.dtype == np.float32:
+        return serie
+    reduzida = serie.astype(np.float32)
+    if not np.array_equal(reduzida.to_numpy(np.float64), serie.to_numpy(), equal_nan=True):
+        return serie
+    nao_nulos = serie.notna()
+    if not reduzida[nao_nulos].astype(str).equals(serie[nao_nulos].astype(str)):
+        return serie
+    return reduzida
+
+
+def _compactar_texto(serie: pd.Series) -> pd.Series:
+    """Categórica se a coluna só tiver textos e poucos valores distintos."""
+    if infer_dtype(serie, skipna=True) != "string":
+        return serie
+    if serie.nunique(dropna=True) > FRACAO_MAX_CATEGORIAS * len(serie):
+        return serie
+    return serie.astype("category")
+
+
+class EsquemaRelatorio(NamedTuple):
+    """
+    Tipos das colunas do relatório de uma plataforma, a partir dos campos da API.
+    Dimensões viram categóricas; as colunas dos campos recebem o menor tipo que
+    não altera nenhum valor (nem o CSV gerado). As demais colunas (ex: 'id') não mudam.
+    """
+
+    dimensoes: Tuple[str, ...]
+    campos: Tuple[str, ...]  # 'text' dos campos e colunas derivadas
+
+    @classmethod
+    def de_campos(cls, campos: List[Dict[str, str]]) -> "EsquemaRelatorio":
+        """Cria o esquema com os campos retornados por extrair_campos."""
+        nomes = dict.fromkeys(campo["text"] for campo in campos)
+        nomes.update(dict.fromkeys(CAMPOS_DERIVADOS))
+        return cls(COLUNAS_DIMENSAO, tuple(nomes))
+
+    def aplicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Retorna o DataFrame com os tipos compactos (sem alterar o original)."""
+        if df.empty:
+            return df
+
+        convertidas = {}
+        for col in df.columns:
+            serie = df[col]
+            if col in self.dimensoes:
+                if not isinstance(serie.dtype, pd.CategoricalDtype):
+                    convertidas[col] = serie.astype("category")
+            elif col in self.campos:
+                if is_integer_dtype(serie.dtype):
+                    convertidas[col] = _compactar_inteiros(serie)
+                elif is_float_dtype(serie.dtype):
+                    convertidas[col] = _compactar_reais(serie)
+                elif serie.dtype == object:
+                    convertidas[col] = _compactar_texto(serie)
+        if not convertidas:
+            return df
+        return df.assign(**convertidas)
+
+
+def concatenar(dfs: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    pd.concat que preserva as colunas categóricas: as categorias de cada coluna
+    são unificadas antes (com categorias diferentes, o pandas voltaria para texto).
+    """
+    dfs = list(dfs)
+    categoricas: Dict[str, List[pd.Series]] = {}
+    for df in dfs:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                categoricas.setdefault(col, []).append(df[col])
+
+    unificadas = {}
+    for col, series in categoricas.items():
+        presentes = [df for df in dfs if col in df.columns]
+        if len(series) < len(presentes):
+            continue  # A coluna não é categórica em todos os DataFrames
+        try:
+            categorias = union_categoricals(series, sort_categories=True).categories
+        except TypeError:  # Categorias de tipos diferentes: a coluna volta para texto
+            continue
+        unificadas[col] = pd.CategoricalDtype(categorias)
+
+    if unificadas:
+        dfs = [
+            df.astype({col: tipo for col, tipo in unificadas.items() if col in df.columns})
+            for df in dfs
+        ]
+    return pd.concat(dfs, ignore_index=True)
+
+
+def tipos_estaveis(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Desfaz a compactação: categóricas voltam a texto, inteiros para int64 e reais
+    para float64. Usado nos formatos binários (Parquet/Arrow), cujo esquema não pode
+    variar entre snapshots conforme os valores de cada um.
+    """
+    convertidas = {}
+    for col in df.columns:
+        tipo = df[col].dtype
+        if isinstance(tipo, pd.CategoricalDtype):
+            convertidas[col] = df[col].astype(object)
+        elif is_integer_dtype(tipo) and tipo != np.int64:
+            convertidas[col] = df[col].astype(np.int64)
+        elif is_float_dtype(tipo) and tipo != np.float64:
+            convertidas[col] = df[col].astype(np.float64)
+    if not convertidas:
+        return df
+    return df.assign(**convertidas)
+
+
+def memoria_bytes(df: pd.DataFrame) -> int:
+    """Memória ocupada pelo DataFrame, incluindo o conteúdo dos textos."""
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -0,0 +1,190 @@
+"""Filtros dos relatórios (campos, contas e plataformas) pedidos na query string."""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import pandas as pd
+
+from services.montador_colunar import CAMPOS_DERIVADOS
+
+# Colunas mantidas em qualquer projeção ('id' é removida apenas na serialização)
+_COLUNAS_FIXAS = ("Plataforma", "Conta", "id")
+
+
+def _normalizar(nome: Any) -> str:
+    """Normaliza um nome para comparação (sem espaços nas pontas e sem caixa)."""
+    return str(nome).strip().casefold()
+
+
+def _ler_lista(args, nome: str) -> Tuple[str, ...]:
+    """Lê um parâmetro repetível e separado por vírgulas (ex: '?x=a,b&x=c')."""
+    valores = []
+    for valor in args.getlist(nome):
+        valores.extend(item.strip() for item in valor.split(",") if item.strip())
+    return tuple(dict.fromkeys(valores))  # Remove repetidos, mantendo a ordem
+
+
+class RecortePlataforma(NamedTuple):
+    """Filtro resolvido com as contas e os campos de uma plataforma."""
+
+    contas: List[Dict[str, Any]]  # Contas selecionadas, na ordem da API
+    campos: List[Dict[str, str]]  # Campos a pedir à API (inclui os das colunas derivadas)
+    colunas: Optional[List[str]]  # Colunas de dados, na ordem pedida (None: todas)
+    campos_ausentes: Set[str]  # Nomes pedidos que a plataforma não tem
+    contas_ausentes: Set[str]
+
+
+class FiltroRelatorio(NamedTuple):
+    """
+    Filtro de um relatório: '?fields=', '?conta=' e '?plataforma='.
+    Cada parâmetro aceita vários valores separados por vírgula; vazio significa "todos".
+    """
+
+    campos: Tuple[str, ...] = ()  # 'value' ou 'text' dos campos (ex: 'spend' ou 'Spend')
+    contas: Tuple[str, ...] = ()  # Nome ou id das contas
+    plataformas: Tuple[str, ...] = ()  # 'value' ou 'text' das plataformas
+
+    @classmethod
+    def de_parametros(cls, args) -> "FiltroRelatorio":
+        """Cria o filtro a partir dos parâmetros da requisição (request.args)."""
+        return cls(
+            campos=_ler_lista(args, "fields"),
+            contas=_ler_lista(args, "conta"),
+            plataformas=_ler_lista(args, "plataforma"),
+        )
+
+    @property
+    def vazio(self) -> bool:
+        """Indica se o filtro não restringe nada (relatório completo)."""
+        return not (self.campos or self.contas or self.plataformas)
+
+    @property
+    def chave(self) -> str:
+        """Representação estável do filtro, usada nas chaves de cache."""
+        return "&".join(
+            f"{nome}={','.join(valores)}"
+            for nome, valores in self._asdict().items()
+            if valores
+        )
+
+    def selecionar_plataformas(
+        self, plataformas: List[Dict[str, str]]
+    ) -> List[Dict[str, str]]:
+        """Retorna as plataformas pedidas, na ordem da API."""
+        if not self.plataformas:
+            return plataformas
+
+        pedidas = {_normalizar(nome) for nome in self.plataformas}
+        selecionadas = [
+            p
+            for p in plataformas
+            if _normalizar(p.get("value")) in pedidas
+            or _normalizar(p.get("text")) in pedidas
+        ]
+        encontradas = {
+            _normalizar(p.get(chave)) for p in selecionadas for chave in ("value", "text")
+        }
+        ausentes = [nome for nome in self.plataformas if _normalizar(nome) not in encontradas]
+        if ausentes:
+            raise ValueError(f"Plataforma(s) não encontrada(s): {', '.join(ausentes)}.")
+        return selecionadas
+
+    def resolver(
+        self, contas: List[Dict[str, Any]], campos: List[Dict[str, str]]
+    ) -> RecortePlataforma:
+        """
+        Aplica o filtro às contas e aos campos de uma plataforma, antes de qualquer
+        consulta de insights. Colunas derivadas (ex: 'Cost Per Click') trazem os
+        campos de que dependem, mesmo que não tenham sido pedidos.
+        """
+        contas_ausentes: Set[str] = set()
+        if self.contas:
+            pedidas = {_normalizar(nome) for nome in self.contas}
+            contas = [
+                conta
+                for conta in contas
+                if _normalizar(conta.get("name")) in pedidas
+                or _normalizar(conta.get("id")) in pedidas
+            ]
+            encontradas = {
+                _normalizar(conta.get(chave)) for conta in contas for chave in ("name", "id")
+            }
+            contas_ausentes = {
+                nome for nome in self.contas if _normalizar(nome) not in encontradas
+            }
+
+        if not self.campos:
+            return RecortePlataforma(contas, campos, None, set(), contas_ausentes)
+
+        por_nome: Dict[str, Dict[str, str]] = {}
+        for campo in campos:
+            por_nome.setdefault(_normalizar(campo["value"]), campo)
+            por_nome.setdefault(_normalizar(campo["text"]), campo)
+        por_texto = {campo["text"]: campo for campo in campos}
+        derivados = {_normalizar(nome): nome for nome in CAMPOS_DERIVADOS}
+
+        selecionados: Set[str] = set()  # 'value' dos campos a pedir à API
+        colunas: Dict[str, None] = {}
+        campos_ausentes: Set[str] = set()
+        for nome in self.campos:
+            campo = por_nome.get(_normalizar(nome))
+            derivado = derivados.get(_normalizar(nome))
+            if campo is not None:
+                selecionados.add(campo["value"])
+                colunas[campo["text"]] = None
+            elif derivado and all(e in por_texto for e in CAMPOS_DERIVADOS[derivado]):
+                selecionados.update(por_texto[e]["value"] for e in CAMPOS_DERIVADOS[derivado])
+                colunas[derivado] = None
+            else:
+                campos_ausentes.add(nome)
+
+        return RecortePlataforma(
+            contas,
+            [campo for campo in campos if campo["value"] in selecionados],
+            list(colunas),
+            campos_ausentes,
+            contas_ausentes,
+        )
+
+    def sem_campos(self, recorte: RecortePlataforma) -> bool:
+        """Indica se a plataforma do recorte não tem nenhum dos campos pedidos."""
+        return bool(self.campos) and not recorte.campos
+
+    def validar(self, recortes: Iterable[RecortePlataforma]) -> None:
+        """Lança ValueError para campos ou contas que nenhuma plataforma tem."""
+        recortes = list(recortes)
+        if not recortes:
+            return
+        campos = set.intersection(*(r.campos_ausentes for r in recortes))
+        contas = set.intersection(*(r.contas_ausentes for r in recortes))
+
+        erros = []
+        if campos:
+            nomes = ", ".join(nome for nome in self.campos if nome in campos)
+            erros.append(f"Campo(s) não encontrado(s): {nomes}.")
+        if contas:
+            nomes = ", ".join(nome for nome in self.contas if nome in contas)
+            erros.append(f"Conta(s) não encontrada(s): {nomes}.")
+        if erros:
+            raise ValueError(" ".join(erros))
+
+    def aplicar(self, df: pd.DataFrame, recorte: RecortePlataforma) -> pd.DataFrame:
+        """
+        Filtra as linhas pelas contas e projeta as colunas pedidas do DataFrame.
+        Uma plataforma sem nenhum dos campos pedidos fica vazia, como uma plataforma
+        sem insights (e não com as colunas pedidas em branco).
+        """
+        if df.empty or self.sem_campos(recorte):
+            return pd.DataFrame()
+
+        if self.contas:
+            nomes = [conta.get("name") for conta in recorte.contas]
+            df = df[df["Conta"].isin(nomes)]
+            if df.empty:
+                return pd.DataFrame()  # Como uma plataforma sem insights
+
+        if recorte.colunas is not None:
+            fixas = [col for col in _COLUNAS_FIXAS if col in df.columns]
+            df = df.reindex(
+                columns=fixas + [col for col in recorte.colunas if col not in fixas]
+            )
+        return df.reset_index(drop=True)
@@ -0,0 +1,81 @@
+"""Montagem colunar do DataFrame de uma plataforma a partir dos insights da API."""
+
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+# Colunas calculadas pelo MontadorColunar quando a API não as fornece, e as
+# colunas (pelo 'text' do campo) de que cada uma depende
+CAMPOS_DERIVADOS: Dict[str, Tuple[str, ...]] = {"Cost Per Click": ("Spend", "Clicks")}
+
+
+class MontadorColunar:
+    """
+    Acumula os insights das contas diretamente em listas por coluna e cria um único
+    DataFrame no final, evitando um DataFrame por conta e concatenações repetidas.
+    """
+
+    def __init__(self, campos: List[Dict[str, Any]], platform_text: str):
+        # Mapeia o 'value' de cada campo para o seu 'text' uma única vez por plataforma
+        self._nomes = {c["value"]: c["text"] for c in campos}
+        self.platform_text = platform_text
+        self._colunas: Dict[str, List[Any]] = {}  # Colunas na ordem em que aparecem
+        self._contas: List[Any] = []
+        self._linhas = 0
+
+    @property
+    def linhas(self) -> int:
+        """Número de linhas acumuladas até agora."""
+        return self._linhas
+
+    def adicionar(self, insights: List[Dict[str, Any]], nome_conta: Any) -> None:
+        """Adiciona os registros de insights de uma conta às colunas."""
+        if not insights:
+            return
+
+        n = len(insights)
+        # Chaves presentes no lote, na ordem de aparição (como em pd.DataFrame(insights))
+        chaves = dict.fromkeys(chave for registro in insights for chave in registro)
+
+        for chave in chaves:
+            nome = self._nomes.get(chave, chave)  # Usa o 'text' do campo, se existir
+            coluna = self._colunas.get(nome)
+            if coluna is None:
+                # Coluna nova: as linhas das contas anteriores ficam vazias
+                coluna = self._colunas[nome] = [None] * self._linhas
+            coluna.extend([registro.get(chave) for registro in insights])
+
+        # Colunas que não vieram neste lote ficam vazias nas linhas da conta
+        for coluna in self._colunas.values():
+            if len(coluna) < self._linhas + n:
+                coluna.extend([None] * n)
+
+        self._contas.extend([nome_conta] * n)
+        self._linhas += n
+
+    def construir(self) -> pd.DataFrame:
+        """Cria o DataFrame final, com 'Plataforma' e 'Conta' como primeiras colunas."""
+        if not self._linhas:
+            return pd.DataFrame()  # Nenhuma conta retornou insights
+
+        dados: Dict[str, Any] = {"Plataforma": [self.platform_text] * self._linhas}
+        dados["Conta"] = self._contas
+        for nome, coluna in self._colunas.items():
+            if nome not in dados:
+                dados[nome] = coluna
+        df = pd.DataFrame(dados)
+
+        # Calcula 'Cost Per Click' de uma vez, se a API não o fornecer
+        if (
+            "Cost Per Click" not in df.columns
+            and "Spend" in df.columns
+            and "Clicks" in df.columns
+        ):
+            df["Cost Per Click"] = calcular_cpc(df["Spend"], df["Clicks"])
+        return df
+
+
+def calcular_cpc(spend: pd.Series, clicks: pd.Series) -> pd.Series:
+    """Calcula 'Spend / Clicks' de forma vetorizada, usando 0 quando não há cliques."""
+    sem_cliques = clicks == 0
+    return spend.div(clicks.mask(sem_cliques)).mask(sem_cliques, 0)
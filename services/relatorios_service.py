@@ -1,209 +1,636 @@
 """Serviço para gerar os relatórios."""
 
-from typing import List, Dict, Any, Optional
+from typing import (
+    List,
+    Dict,
+    Any,
+    Iterator,
+    Optional,
+    NamedTuple,
+    Tuple,
+    Union,
+    TYPE_CHECKING,
+)
+import asyncio
 import pandas as pd
-import io
-import os
-from datetime import datetime
+import hashlib
+import time
 from extratores.extrator_stract import ExtratorDadosStract  # Implementação concreta
+from constants.configuracoes import (
+    CACHE_RECORTES_MAX_ITENS,
+    CSV_ARQUIVO,
+    CSV_ARQUIVO_MAX_PENDENTES,
+    CSV_RETENCAO_DIAS,
+    CSV_RETENCAO_MAX_ARQUIVOS,
+    CSV_RETENCAO_MAX_MB,
+    MAX_REQUISICOES_SIMULTANEAS,
+    CSV_LINHAS_POR_BLOCO,
+    CSV_STREAMING,
+    RESUMO_LINHAS_POR_LOTE,
+    TTL_SNAPSHOT_SEGUNDOS,
+)
 from constants.diretorios import CSV_DIR
+from services.agregador import AgregadorIncremental
+from services.arquivo_csv import ArquivoCSV
+from services.esquema import EsquemaRelatorio, concatenar, tipos_estaveis
+from services.filtros import FiltroRelatorio, RecortePlataforma
+from services.montador_colunar import MontadorColunar
+from services.snapshots import RepositorioSnapshots, Snapshot
+from utils.cache import CacheTTL
+from utils.cache_persistente import CachePersistente
+from utils.concorrencia import ChamadaUnica, LacoEventos
+from utils.formatos import (
+    FORMATO_PADRAO,
+    comprimir,
+    para_arrow,
+    para_parquet,
+    verificar_disponivel,
+)
+from utils.metricas import BYTES, LINHAS, medir, medir_blocos
+
+if TYPE_CHECKING:
+    from extratores.extrator_stract_async import ExtratorDadosStractAsync
+    from services.atualizador import AtualizadorSnapshots
+
+
+def _tamanho(dados: Union[str, bytes]) -> int:
+    """Tamanho em bytes do conteúdo (texto em UTF-8), sem copiá-lo quando é ASCII."""
+    if isinstance(dados, bytes) or dados.isascii():
+        return len(dados)
+    return len(dados.encode("utf-8"))
+
+
+class RelatorioGerado(NamedTuple):
+    """Relatório pronto para ser serializado e o snapshot a partir do qual foi gerado."""
+
+    df: pd.DataFrame
+    snapshot: Snapshot
+    nome_base: str  # Nome usado no arquivo salvo em CSV_DIR
+    variante: str  # 'completo' ou 'resumo'
+
+    def etag(self, formato: str) -> str:
+        """ETag forte do relatório: muda junto com o conteúdo do snapshot e o formato."""
+        chave = f"{self.snapshot.hash_conteudo}:{self.variante}:{formato}"
+        return hashlib.sha256(chave.encode("utf-8")).hexdigest()[:32]
 
 
 class RelatoriosService:
     """Serviço para gerar relatórios em formato CSV usando DataFrames."""
 
-    def __init__(self, extrator: Optional[ExtratorDadosStract] = None):
+    def __init__(
+        self,
+        extrator: Optional[ExtratorDadosStract] = None,
+        extrator_async: Optional["ExtratorDadosStractAsync"] = None,
+        laco: Optional[LacoEventos] = None,
+        cache_persistente: Optional[CachePersistente] = None,
+    ):
         # Injeção de dependência do extrator. Se nenhum for fornecido, usa a implementação padrão.
         self.extrator = extrator or ExtratorDadosStract()
-        # Cria o diretório de CSVs se ele não existir (exist_ok=True evita erro se já existir).
-        os.makedirs(CSV_DIR, exist_ok=True)
-
-    def _gerar_e_salvar_csv(self, df: pd.DataFrame, nome_base: str) -> str:
-        """Gera uma string CSV a partir de um DataFrame, salvando em arquivo."""
-        timestamp = datetime.now().strftime(
-            "%Y%m%d_%H%M%S"
-        )  # Formato: AnoMesDia_HoraMinutoSegundo
-        nome_arquivo = f"{timestamp}_{nome_base}.csv"  # Nome do arquivo com timestamp
-        caminho = os.path.join(CSV_DIR, nome_arquivo)  # Caminho completo do arquivo
-
+        # Extrator assíncrono (opcional): quando definido, contas, campos e insights são
+        # consultados no laço de eventos 'laco', sem uma thread por requisição à API
+        if extrator_async is not None and laco is None:
+            raise ValueError("O extrator assíncrono exige um laço de eventos.")
+        self.extrator_async = extrator_async
+        self.laco = laco
+        # Cópias dos relatórios em CSV_DIR, gravadas em segundo plano (opcional)
+        self.arquivo: Optional[ArquivoCSV] = None
+        if CSV_ARQUIVO:
+            self.arquivo = ArquivoCSV(
+                CSV_DIR,
+                CSV_ARQUIVO_MAX_PENDENTES,
+                CSV_RETENCAO_DIAS * 86400,
+                CSV_RETENCAO_MAX_ARQUIVOS,
+                int(CSV_RETENCAO_MAX_MB * 1024 * 1024),
+            )
+        # Agrupa gerações simultâneas do mesmo relatório em uma única execução
+        self._geracoes_em_andamento = ChamadaUnica()
+        # Relatórios base já gerados, reaproveitados pelos endpoints completos e de resumo
+        # (e, com o cache persistente, recarregados do disco após um reinício)
+        self.snapshots = RepositorioSnapshots(TTL_SNAPSHOT_SEGUNDOS, cache_persistente)
+        # Relatórios filtrados, por filtro e versão dos snapshots de origem
+        self._recortes = CacheTTL(
+            CACHE_RECORTES_MAX_ITENS, {"recorte": TTL_SNAPSHOT_SEGUNDOS}
+        )
+        # Atualizador em segundo plano (opcional); quando definido, snapshots expirados
+        # são servidos imediatamente enquanto são atualizados
+        self.atualizador: Optional["AtualizadorSnapshots"] = None
+
+    def estatisticas_geracoes(self) -> Dict[str, int]:
+        """Retorna quantas gerações de relatório foram executadas e quantas compartilhadas."""
+        return self._geracoes_em_andamento.estatisticas()
+
+    def _gerar_csv(self, df: pd.DataFrame) -> Union[str, Iterator[str]]:
+        """
+        Gera o CSV a partir de um DataFrame.
+        Em modo streaming, retorna um gerador que produz o CSV em blocos de linhas;
+        caso contrário, retorna a string CSV completa.
+        """
         # Dropa a coluna de id
-        df = df.drop("id", axis=1)
-
-        df.to_csv(caminho, index=False)  # Salva o DataFrame como CSV (sem o índice)
-        print(f"Relatório salvo em: {caminho}")  # Log informativo
+        df = df.drop("id", axis=1, errors="ignore")
+
+        if CSV_STREAMING:
+            return self._serializar_csv_em_blocos(df)
+        return df.to_csv(index=False)  # Retorna a string CSV
+
+    def _serializar_csv_em_blocos(self, df: pd.DataFrame) -> Iterator[str]:
+        """Serializa o DataFrame em blocos de CSV_LINHAS_POR_BLOCO linhas."""
+        # Ao menos um bloco, para que relatórios vazios tenham o cabeçalho
+        for inicio in range(0, max(len(df), 1), CSV_LINHAS_POR_BLOCO):
+            yield df.iloc[inicio : inicio + CSV_LINHAS_POR_BLOCO].to_csv(
+                index=False, header=(inicio == 0)
+            )
 
-        output = io.StringIO()  # Cria um "arquivo" em memória (string)
-        df.to_csv(output, index=False)  # Escreve o DataFrame como CSV na string
-        return output.getvalue()  # Retorna a string CSV
+    def _process_platform(
+        self,
+        plataforma: Dict[str, str],
+    ) -> pd.DataFrame:
+        """Processa todas as contas de uma plataforma e retorna um DataFrame consolidado."""
 
-    def _extrair_insights_conta(
+        contas, campos = self._obter_metadados(plataforma["value"])
+        return self._montar_plataforma(plataforma, contas, campos)
+
+    def _obter_metadados(
+        self, platform_val: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """Obtém as contas e os campos da plataforma ao mesmo tempo."""
+        if self.extrator_async is not None:
+            return self.laco.executar(self._obter_metadados_async(platform_val))
+        contas, campos = self.extrator.concorrencia.mapear(
+            lambda extrair: extrair(platform_val),
+            [self.extrator.extrair_contas, self.extrator.extrair_campos],
+        )
+        return contas, campos
+
+    async def _obter_metadados_async(
+        self, platform_val: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """Versão assíncrona de _obter_metadados (executada no laço de eventos)."""
+        contas, campos = await asyncio.gather(
+            self.extrator_async.extrair_contas(platform_val),
+            self.extrator_async.extrair_campos(platform_val),
+        )
+        return contas, campos
+
+    def _extrair_insights_contas(
         self,
-        plataforma: str,
-        conta: Dict[str, Any],
-        campos: List[Dict[str, Any]],
-        platform_text: Optional[str] = None,  # Nome da plataforma (opcional)
-    ) -> Optional[pd.DataFrame]:
-        """Extrai os insights de uma conta, renomeia as colunas e adiciona informações."""
-        insights = self.extrator.extrair_insights(
-            plataforma, conta, campos
-        )  # Obtém os insights da API
-        if not insights:
-            return None  # Retorna None se não houver insights
-
-        df = pd.DataFrame(insights)  # Cria um DataFrame a partir dos insights
-        # Renomeia as colunas do DataFrame (usa o 'text' dos campos, em vez do 'value')
-        df.rename(columns={c["value"]: c["text"] for c in campos}, inplace=True)
-        if platform_text:
-            df["Plataforma"] = (
-                platform_text  # Adiciona coluna 'Plataforma' se o nome for fornecido
+        platform_val: str,
+        contas: List[Dict[str, Any]],
+        campos: List[Dict[str, str]],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Produz os insights de cada conta, na ordem das contas, assim que ficam prontos,
+        com poucas contas em andamento ou em memória por vez.
+        """
+        if self.extrator_async is not None:
+            return self.laco.mapear_iter(
+                lambda conta: self.extrator_async.extrair_insights(
+                    platform_val, conta, campos
+                ),
+                contas,
+                MAX_REQUISICOES_SIMULTANEAS,
             )
-        df["Conta"] = conta["name"]  # Adiciona a coluna 'Conta'
-
-        # Calcula 'Cost per Click' se compute_cpc for True e as colunas necessárias existirem
-        if (
-            "Cost Per Click" not in df.columns
-            and "Spend" in df.columns
-            and "Clicks" in df.columns
-        ):
-            df["Cost Per Click"] = df.apply(
-                lambda row: (
-                    row["Spend"] / row["Clicks"] if row["Clicks"] != 0 else 0
-                ),  # Evita divisão por zero
-                axis=1,  # Aplica a função linha a linha
+        return self.extrator.concorrencia.mapear_iter(
+            lambda conta: self.extrator.extrair_insights(platform_val, conta, campos),
+            contas,
+        )
+
+    async def _extrair_todos_insights_async(
+        self,
+        platform_val: str,
+        contas: List[Dict[str, Any]],
+        campos: List[Dict[str, str]],
+    ) -> List[List[Dict[str, Any]]]:
+        """Extrai os insights de todas as contas ao mesmo tempo, na ordem das contas."""
+        return await asyncio.gather(
+            *(
+                self.extrator_async.extrair_insights(platform_val, conta, campos)
+                for conta in contas
             )
-        return df  # Retorna o DataFrame modificado
+        )
 
-    def _process_platform(
+    def _montar_plataforma(
         self,
-        plataforma: str,
+        plataforma: Dict[str, str],
+        contas: List[Dict[str, Any]],
+        campos: List[Dict[str, str]],
     ) -> pd.DataFrame:
-        """Processa todas as contas de uma plataforma e retorna um DataFrame consolidado."""
-
+        """Extrai os insights das contas informadas e monta o DataFrame da plataforma."""
         platform_val = plataforma["value"]  # Valor da plataforma (ex: 'meta_ads')
         platform_text = plataforma["text"]  # Nome da plataforma (ex: 'Facebook Ads')
 
-        df_total = pd.DataFrame()  # DataFrame vazio para armazenar os resultados
-        contas = self.extrator.extrair_contas(
-            platform_val
-        )  # Obtém as contas da plataforma
-        campos = self.extrator.extrair_campos(
-            platform_val
-        )  # Obtém os campos da plataforma
-
-        for conta in contas:
-            # Extrai os insights para cada conta e adiciona ao DataFrame total
-            df_insights = self._extrair_insights_conta(
-                platform_val, conta, campos, platform_text
+        # Extrai os insights das contas em paralelo (limitado pelo extrator),
+        # mantendo a ordem original das contas nos resultados
+        if self.extrator_async is not None:
+            insights_por_conta = self.laco.executar(
+                self._extrair_todos_insights_async(platform_val, contas, campos)
+            )
+        else:
+            insights_por_conta = self.extrator.concorrencia.mapear(
+                lambda conta: self.extrator.extrair_insights(platform_val, conta, campos),
+                contas,
             )
-            if df_insights is not None:
-                df_total = pd.concat(
-                    [df_total, df_insights], ignore_index=True
-                )  # Concatena (ignore_index=True)
 
-        # Garante a ordem correta das colunas no DataFrame final
-        if not df_total.empty:
-            cols = ["Plataforma", "Conta"] + [
-                col for col in df_total.columns if col not in ["Plataforma", "Conta"]
-            ]
+        # Acumula os insights em colunas e cria um único DataFrame no final
+        with medir("montagem"):
+            montador = MontadorColunar(campos, platform_text)
+            for conta, insights in zip(contas, insights_por_conta):
+                montador.adicionar(insights, conta["name"])
+            df = montador.construir()
+        LINHAS.incrementar(len(df), plataforma=platform_val)
+
+        # Tipos compactos (categóricos e numéricos reduzidos), pois o DataFrame fica em cache
+        with medir("esquema"):
+            return EsquemaRelatorio.de_campos(campos).aplicar(df)
+
+    def _combinar_plataformas(self, dfs_plataformas: List[pd.DataFrame]) -> pd.DataFrame:
+        """Concatena os DataFrames das plataformas, na ordem recebida, no relatório geral."""
+        # Uma única concatenação, ignorando as plataformas sem dados
+        dfs = [df_plat for df_plat in dfs_plataformas if not df_plat.empty]
+        if not dfs:
+            return pd.DataFrame()
+        with medir("combinacao"):
+            df_total = concatenar(dfs)  # Mantém as colunas categóricas
 
-            df_total = df_total[cols]  # Reordena as colunas
-        return df_total  # Retorna o DataFrame completo
+        # Garante a ordem das colunas para o relatório geral
+        cols = ["Plataforma", "Conta"] + [
+            col for col in df_total.columns if col not in ["Plataforma", "Conta"]
+        ]
+        return df_total[cols]  # Retorna o DataFrame completo
+
+    def _gerar_snapshot_plataforma(self, plataforma: Dict[str, str]) -> Snapshot:
+        """Consulta a API e salva um novo snapshot da plataforma."""
+        inicio = time.time()  # Os dados passam a valer a partir do início da coleta
+        df = self._process_platform(plataforma)
+        return self.snapshots.salvar(plataforma["value"], df, criado_em=inicio)
+
+    def atualizar_snapshot_plataforma(self, plataforma: Dict[str, str]) -> Snapshot:
+        """Gera um novo snapshot da plataforma, mesmo que o atual ainda seja válido."""
+        return self._geracoes_em_andamento.executar(
+            plataforma["value"], lambda: self._gerar_snapshot_plataforma(plataforma)
+        )
+
+    def _snapshot_disponivel(self, plataforma: Dict[str, str]) -> Optional[Snapshot]:
+        """
+        Retorna o snapshot da plataforma que pode ser usado sem consultar a API: o válido
+        ou, com o atualizador ativo, o último expirado (pedindo a sua revalidação).
+        """
+        snapshot = self.snapshots.obter(plataforma["value"])
+        if snapshot is None and self.atualizador is not None:
+            snapshot = self.snapshots.obter_ultimo(plataforma["value"])
+            if snapshot is not None:
+                self.atualizador.solicitar(plataforma)  # Revalida em segundo plano
+        return snapshot
+
+    def _snapshot_existente(self, plataforma: Dict[str, str]) -> Optional[Snapshot]:
+        """
+        Retorna o snapshot disponível da plataforma ou, se um estiver sendo gerado,
+        aguarda a geração em andamento. Nunca inicia uma nova consulta à API.
+        """
+        snapshot = self._snapshot_disponivel(plataforma)
+        if snapshot is None:
+            snapshot = self._geracoes_em_andamento.aguardar(plataforma["value"])
+        return snapshot
 
-    def _gerar_relatorio_base(self, plataforma: Optional[str] = None) -> pd.DataFrame:
+    def _obter_snapshot_plataforma(self, plataforma: Dict[str, str]) -> Snapshot:
         """
-        Gera o DataFrame base do relatório.
-        Se 'plataforma' for informado, gera relatório específico; caso contrário, gera relatório geral.
+        Retorna o snapshot válido da plataforma, gerando um novo se necessário.
+        Com o atualizador em segundo plano ativo, um snapshot expirado é servido
+        imediatamente enquanto a atualização é feita em segundo plano.
         """
+        platform_val = plataforma["value"]
+
+        def gerar() -> Snapshot:
+            # Outra requisição pode ter salvo o snapshot enquanto esta esperava
+            snapshot = self.snapshots.obter(platform_val)
+            if snapshot is None:
+                snapshot = self._gerar_snapshot_plataforma(plataforma)
+            return snapshot
+
+        snapshot = self._snapshot_disponivel(plataforma)
+        if snapshot is not None:
+            return snapshot
 
+        # Requisições simultâneas para a mesma plataforma compartilham a geração
+        return self._geracoes_em_andamento.executar(platform_val, gerar)
+
+    def _obter_snapshot_geral(self) -> Snapshot:
+        """
+        Retorna o snapshot do relatório geral, montado a partir dos snapshots das plataformas.
+        Só é remontado quando algum snapshot de plataforma muda de versão.
+        """
         plataformas = (
             self.extrator.extrair_todas_plataformas()
         )  # Obtém todas as plataformas
 
-        if plataforma:
-            plataforma = [p for p in plataformas if p.get("value") == plataforma]
-            # Se 'plataforma' foi especificada
-            return self._process_platform(
-                plataforma[0]
-            )  # Retorna o relatório da plataforma
-
-        # Se 'plataforma' não foi especificada, gera o relatório geral
-        df_total = pd.DataFrame()
+        # Obtém (ou gera) os snapshots das plataformas em paralelo; as requisições
+        # de todas elas disputam o mesmo limite global de concorrência do extrator
+        snapshots = self.extrator.concorrencia.mapear(
+            self._obter_snapshot_plataforma, plataformas
+        )
+        fontes = tuple(snapshot.versao for snapshot in snapshots)
+
+        def combinar() -> Snapshot:
+            # As versões das fontes já garantem que o geral está atualizado
+            geral = self.snapshots.obter_ultimo("geral")
+            if geral is None or geral.fontes != fontes:
+                geral = self.snapshots.salvar(
+                    "geral",
+                    self._combinar_plataformas([snapshot.df for snapshot in snapshots]),
+                    # A idade do geral é a do snapshot de plataforma mais antigo
+                    criado_em=min(
+                        (snapshot.criado_em for snapshot in snapshots), default=None
+                    ),
+                    fontes=fontes,
+                )
+            return geral
+
+        geral = self.snapshots.obter_ultimo("geral")
+        if geral is None or geral.fontes != fontes:
+            geral = self._geracoes_em_andamento.executar("geral", combinar)
+        return geral
+
+    def obter_snapshot(self, plataforma: Optional[str] = None) -> Snapshot:
+        """
+        Retorna o snapshot do relatório base.
+        Se 'plataforma' for informado, retorna o da plataforma; caso contrário, o geral.
+        O DataFrame do snapshot é compartilhado e não deve ser modificado pelo chamador.
+        """
+        if not plataforma:
+            return self._obter_snapshot_geral()
+        return self._obter_snapshot_plataforma(self._buscar_plataforma(plataforma))
+
+    def _buscar_plataforma(self, plataforma_value: str) -> Dict[str, str]:
+        """Retorna os dados ('value' e 'text') da plataforma informada."""
+        plataformas = self.extrator.extrair_todas_plataformas()
+        encontradas = [p for p in plataformas if p.get("value") == plataforma_value]
+        if not encontradas:
+            raise ValueError(f"Plataforma '{plataforma_value}' não encontrada.")
+        return encontradas[0]
+
+    def _resolver_recortes(
+        self, plataformas: List[Dict[str, str]], filtro: FiltroRelatorio
+    ) -> List[RecortePlataforma]:
+        """Aplica o filtro às contas e aos campos (em cache) de cada plataforma."""
+        metadados = self.extrator.concorrencia.mapear(
+            lambda plataforma: self._obter_metadados(plataforma["value"]), plataformas
+        )
+        recortes = [filtro.resolver(contas, campos) for contas, campos in metadados]
+        filtro.validar(recortes)  # Falha antes de consultar qualquer insight
+        return recortes
+
+    def _obter_recorte_plataforma(
+        self,
+        plataforma: Dict[str, str],
+        filtro: FiltroRelatorio,
+        recorte: RecortePlataforma,
+    ) -> Snapshot:
+        """
+        Retorna o relatório filtrado da plataforma. Se houver um snapshot disponível,
+        filtra o seu DataFrame; caso contrário, consulta apenas as contas e os campos
+        pedidos, sem gerar o snapshot completo.
+        """
+        base = self._snapshot_disponivel(plataforma)
+        chave = f"{plataforma['value']}?{filtro.chave}"
+        fontes = (base.versao,) if base is not None else ()
+
+        def gerar() -> Snapshot:
+            if base is not None:
+                with medir("filtro"):
+                    df = filtro.aplicar(base.df, recorte)
+                return self.snapshots.criar(chave, df, base.criado_em, fontes)
+            inicio = time.time()
+            if filtro.sem_campos(recorte):
+                df = pd.DataFrame()  # Nenhum dos campos pedidos: não consulta a API
+            else:
+                df = self._montar_plataforma(plataforma, recorte.contas, recorte.campos)
+            with medir("filtro"):
+                df = filtro.aplicar(df, recorte)
+            return self.snapshots.criar(chave, df, inicio)
+
+        # Gerações simultâneas do mesmo recorte são agrupadas pelo próprio cache
+        return self._recortes.obter_ou_calcular("recorte", (chave, fontes), gerar)
+
+    def _obter_recorte_geral(self, filtro: FiltroRelatorio) -> Snapshot:
+        """Retorna o relatório geral filtrado, montado com os recortes das plataformas."""
+        plataformas = filtro.selecionar_plataformas(
+            self.extrator.extrair_todas_plataformas()
+        )
+        recortes = self._resolver_recortes(plataformas, filtro)
+        snapshots = self.extrator.concorrencia.mapear(
+            lambda args: self._obter_recorte_plataforma(args[0], filtro, args[1]),
+            list(zip(plataformas, recortes)),
+        )
+        chave = f"geral?{filtro.chave}"
+        fontes = tuple(snapshot.versao for snapshot in snapshots)
+
+        def combinar() -> Snapshot:
+            return self.snapshots.criar(
+                chave,
+                self._combinar_plataformas([snapshot.df for snapshot in snapshots]),
+                # A idade do geral é a do recorte de plataforma mais antigo
+                criado_em=min((s.criado_em for s in snapshots), default=None),
+                fontes=fontes,
+            )
 
-        for plataforma in plataformas:
-            # Processa cada plataforma e adiciona ao DataFrame total
-            df_plat = self._process_platform(plataforma=plataforma)
-            df_total = pd.concat([df_total, df_plat], ignore_index=True)  # Concatena
+        return self._recortes.obter_ou_calcular("recorte", (chave, fontes), combinar)
 
-        # Garante a ordem das colunas para o relatório geral
-        if not df_total.empty:
-            cols = ["Plataforma", "Conta"] + [
-                col for col in df_total.columns if col not in ["Plataforma", "Conta"]
-            ]
-            df_total = df_total[cols]  # Reordena
-        return df_total  # Retorna o DataFrame completo
-
-    def _gerar_resumo(
-        self, df: pd.DataFrame, group_by: str, resumo_plataforma: Optional[bool] = None
-    ) -> pd.DataFrame:
+    def _agregar_plataforma(
+        self,
+        plataforma: Dict[str, str],
+        snapshot: Optional[Snapshot],
+        group_cols: List[str],
+    ) -> AgregadorIncremental:
         """
-        Gera um resumo agregando os campos numéricos por 'group_by' (e 'Plataforma', se aplicável).
-        Mantém as colunas de agrupamento e preenche as demais colunas não numéricas com string vazia.
+        Agrega os campos numéricos da plataforma por 'group_cols'.
+        Usa o snapshot, se houver; caso contrário, consulta a API e incorpora os
+        insights em lotes de contas (até RESUMO_LINHAS_POR_LOTE linhas) assim que
+        chegam, sem montar o DataFrame de detalhe da plataforma inteira.
         """
-        if df.empty:
-            return pd.DataFrame(columns=[group_by])
+        agregador = AgregadorIncremental(group_cols)
+        if snapshot is not None:
+            with medir("resumo"):
+                agregador.adicionar(snapshot.df)
+            return agregador
 
-        num_cols = df.select_dtypes(include=["number"]).columns.tolist()
-
-        # Determina as colunas de agrupamento
-        if resumo_plataforma:
-            group_cols = [group_by, "Plataforma"]
-        else:
-            group_cols = [group_by]
+        platform_val = plataforma["value"]  # Valor da plataforma (ex: 'meta_ads')
+        platform_text = plataforma["text"]  # Nome da plataforma (ex: 'Facebook Ads')
+        contas, campos = self._obter_metadados(platform_val)
+
+        def agregar_lote(montador: MontadorColunar) -> None:
+            with medir("montagem"):
+                df = montador.construir()
+            LINHAS.incrementar(len(df), plataforma=platform_val)
+            with medir("resumo"):
+                agregador.adicionar(df)
+
+        # Os insights chegam na ordem das contas; o lote é agregado ao atingir o limite
+        # de linhas (a memória fica limitada ao lote e às somas parciais)
+        insights_por_conta = self._extrair_insights_contas(platform_val, contas, campos)
+        montador = MontadorColunar(campos, platform_text)
+        for conta, insights in zip(contas, insights_por_conta):
+            with medir("montagem"):
+                montador.adicionar(insights, conta["name"])
+            if montador.linhas >= RESUMO_LINHAS_POR_LOTE:
+                agregar_lote(montador)
+                montador = MontadorColunar(campos, platform_text)
+        if montador.linhas:
+            agregar_lote(montador)
+        return agregador
+
+    def _obter_snapshot_resumo(
+        self, chave: str, plataformas: List[Dict[str, str]], group_cols: List[str]
+    ) -> Snapshot:
+        """
+        Retorna o snapshot do resumo das plataformas, agregado por 'group_cols'.
+        É reaproveitado enquanto for montado a partir das mesmas versões dos snapshots
+        das plataformas (ou, sem snapshots, enquanto estiver dentro do TTL).
+        """
+        # Usa os snapshots que já existem ou estão sendo gerados (aguardando a geração);
+        # as demais plataformas são agregadas direto da API, com a memória limitada
+        disponiveis = [self._snapshot_existente(p) for p in plataformas]
+        fontes = tuple(snapshot.versao if snapshot else 0 for snapshot in disponiveis)
+
+        def valido(resumo: Optional[Snapshot]) -> bool:
+            return (
+                resumo is not None
+                and resumo.fontes == fontes
+                and (all(fontes) or not self.snapshots.expirado(resumo))
+            )
 
-        # 1. Agrupa e soma:
-        resumo = df.groupby(group_cols, as_index=False)[num_cols].sum()
+        def gerar() -> Snapshot:
+            resumo = self.snapshots.obter_ultimo(chave)
+            if valido(resumo):
+                return resumo
 
-        # 2. Garante que TODAS as colunas originais estejam presentes (preenchendo com NaN):
-        resumo = resumo.reindex(columns=df.columns)
+            inicio = time.time()
+            agregadores = self.extrator.concorrencia.mapear(
+                lambda args: self._agregar_plataforma(*args, group_cols),
+                list(zip(plataformas, disponiveis)),
+            )
+            with medir("resumo"):
+                agregador = AgregadorIncremental(group_cols)
+                for agregador_plataforma in agregadores:
+                    agregador.incorporar(agregador_plataforma)  # Na ordem das plataformas
+                df_resumo = agregador.construir()
+
+            # A idade do resumo é a dos dados mais antigos usados
+            instantes = [s.criado_em if s else inicio for s in disponiveis]
+            return self.snapshots.salvar(
+                chave,
+                df_resumo,
+                criado_em=min(instantes, default=inicio),
+                fontes=fontes,
+            )
 
-        # 3. Preenche NaN com '' APENAS nas colunas que não são numéricas
-        #    E não são colunas de agrupamento:
-        for col in resumo.columns:
-            if col not in num_cols and col not in group_cols:
-                resumo[col] = resumo[col].fillna("")
+        resumo = self.snapshots.obter_ultimo(chave)
+        if valido(resumo):
+            return resumo
+        return self._geracoes_em_andamento.executar(chave, gerar)
 
-        return resumo
+    def serializar(
+        self, relatorio: RelatorioGerado, formato: str = FORMATO_PADRAO
+    ) -> Union[str, bytes, Iterator[str], Iterator[bytes]]:
+        """
+        Serializa o relatório no formato pedido (ver utils.formatos.FORMATOS).
+        Nos formatos CSV (comprimidos ou não), uma cópia do CSV é arquivada em CSV_DIR
+        em segundo plano (uma única vez por conteúdo).
+        """
+        verificar_disponivel(formato)  # Falha antes de arquivar qualquer relatório
+
+        if formato in ("parquet", "arrow"):
+            df = relatorio.df.drop("id", axis=1, errors="ignore")  # Como no CSV
+            with medir("serializacao"):
+                df = tipos_estaveis(df)  # Mesmo esquema em todos os snapshots
+                dados = para_parquet(df) if formato == "parquet" else para_arrow(df)
+            BYTES.incrementar(len(dados), destino="resposta", formato=formato)
+            return dados
+
+        if self.arquivo is not None:
+            self.arquivo.arquivar(
+                relatorio.nome_base, relatorio.snapshot.hash_conteudo, relatorio.df
+            )
+        if CSV_STREAMING:
+            # Os blocos são serializados (e comprimidos) à medida que são enviados
+            blocos = self._gerar_csv(relatorio.df)
+            if formato != FORMATO_PADRAO:
+                blocos = comprimir(blocos, formato)
+            return self._contar_bytes(medir_blocos(blocos, "serializacao"), formato)
+
+        with medir("serializacao"):
+            dados = self._gerar_csv(relatorio.df)
+            if formato != FORMATO_PADRAO:
+                dados = b"".join(comprimir([dados], formato))  # CSV comprimido
+        BYTES.incrementar(_tamanho(dados), destino="resposta", formato=formato)
+        return dados
+
+    @staticmethod
+    def _contar_bytes(
+        blocos: Iterator[Union[str, bytes]], formato: str
+    ) -> Iterator[Union[str, bytes]]:
+        """Repassa os blocos da resposta, somando o seu tamanho em BYTES."""
+        total = 0
+        try:
+            for bloco in blocos:
+                total += _tamanho(bloco)
+                yield bloco
+        finally:
+            BYTES.incrementar(total, destino="resposta", formato=formato)
+
+    def gerar_relatorio_plataforma(
+        self, plataforma_value: str, filtro: Optional[FiltroRelatorio] = None
+    ) -> RelatorioGerado:
+        """
+        Gera relatório completo para uma plataforma.
+        Com 'filtro', retorna apenas os campos e as contas pedidos ('plataformas' é ignorado).
+        """
+        filtro = (filtro or FiltroRelatorio())._replace(plataformas=())
+        if filtro.vazio:
+            snapshot = self.obter_snapshot(plataforma_value)  # Obtém o DataFrame base
+            return RelatorioGerado(
+                snapshot.df, snapshot, f"relatorio_{plataforma_value}", "completo"
+            )
 
-    def gerar_relatorio_plataforma(self, plataforma_value: str) -> str:
-        """Gera relatório completo para uma plataforma e retorna a string CSV."""
-        df = self._gerar_relatorio_base(plataforma_value)  # Gera o DataFrame base
-        return self._gerar_e_salvar_csv(
-            df, f"relatorio_{plataforma_value}"
-        )  # Gera e salva o CSV
+        plataforma = self._buscar_plataforma(plataforma_value)
+        (recorte,) = self._resolver_recortes([plataforma], filtro)
+        snapshot = self._obter_recorte_plataforma(plataforma, filtro, recorte)
+        return RelatorioGerado(
+            snapshot.df, snapshot, f"relatorio_{plataforma_value}_filtrado", "completo"
+        )
 
-    def gerar_relatorio_plataforma_resumo(self, plataforma_value: str) -> str:
+    def gerar_relatorio_plataforma_resumo(self, plataforma_value: str) -> RelatorioGerado:
         """Gera relatório resumido por conta para uma plataforma."""
-        df = self._gerar_relatorio_base(plataforma_value)  # Gera o DataFrame base
-        resumo = self._gerar_resumo(
-            df, "Conta", resumo_plataforma=True
+        resumo = self._obter_snapshot_resumo(
+            f"resumo:{plataforma_value}",
+            [self._buscar_plataforma(plataforma_value)],
+            ["Conta", "Plataforma"],
         )  # Gera o resumo por conta
-        return self._gerar_e_salvar_csv(
-            resumo, f"relatorio_{plataforma_value}_resumo"
-        )  # Gera e salva o CSV
-
-    def gerar_relatorio_geral(self) -> str:
-        """Gera relatório geral de todas as plataformas."""
-        df = (
-            self._gerar_relatorio_base()
-        )  # Gera o DataFrame base (sem especificar plataforma)
-        return self._gerar_e_salvar_csv(df, "relatorio_geral")  # Gera e salva o CSV
-
-    def gerar_relatorio_geral_resumo(self) -> str:
+        return RelatorioGerado(
+            resumo.df, resumo, f"relatorio_{plataforma_value}_resumo", "resumo"
+        )
+
+    def gerar_relatorio_geral(
+        self, filtro: Optional[FiltroRelatorio] = None
+    ) -> RelatorioGerado:
+        """
+        Gera relatório geral de todas as plataformas.
+        Com 'filtro', retorna apenas as plataformas, os campos e as contas pedidos.
+        """
+        if filtro is not None and not filtro.vazio:
+            snapshot = self._obter_recorte_geral(filtro)
+            return RelatorioGerado(
+                snapshot.df, snapshot, "relatorio_geral_filtrado", "completo"
+            )
+
+        snapshot = (
+            self.obter_snapshot()
+        )  # Obtém o DataFrame base (sem especificar plataforma)
+        return RelatorioGerado(snapshot.df, snapshot, "relatorio_geral", "completo")
+
+    def gerar_relatorio_geral_resumo(self) -> RelatorioGerado:
         """Gera relatório geral resumido por plataforma."""
-        df = (
-            self._gerar_relatorio_base()
-        )  # Gera o DataFrame base (sem especificar plataforma)
-        resumo = self._gerar_resumo(df, "Plataforma")  # Gera o resumo por plataforma
-        return self._gerar_e_salvar_csv(
-            resumo, "relatorio_geral_resumo"
-        )  # Gera e salva o CSV
+        resumo = self._obter_snapshot_resumo(
+            "resumo:geral",
+            self.extrator.extrair_todas_plataformas(),
+            ["Plataforma"],
+        )  # Gera o resumo por plataforma
+        return RelatorioGerado(resumo.df, resumo, "relatorio_geral_resumo", "resumo")
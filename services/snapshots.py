@@ -0,0 +1,176 @@
+"""Armazenamento em memória dos relatórios base já gerados (snapshots)."""
+
+import hashlib
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, Optional, Set, Tuple
+
+import pandas as pd
+
+from services.esquema import memoria_bytes
+from utils.cache_persistente import CachePersistente
+from utils.metricas import medir
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """DataFrame base de um relatório, congelado no instante em que foi gerado."""
+
+    chave: str  # Valor da plataforma (ex: 'meta_ads') ou 'geral'
+    df: pd.DataFrame
+    versao: int  # Cresce a cada snapshot salvo, em qualquer chave
+    criado_em: float  # time.time() de quando os dados foram obtidos
+    fontes: Tuple[int, ...] = ()  # Versões dos snapshots usados para montar este
+
+    @property
+    def idade(self) -> float:
+        """Idade dos dados do snapshot, em segundos."""
+        return max(time.time() - self.criado_em, 0.0)
+
+    @cached_property
+    def hash_conteudo(self) -> str:
+        """Hash SHA-256 das colunas, dos tipos e dos valores do DataFrame (calculado uma vez)."""
+        with medir("hash_conteudo"):
+            digest = hashlib.sha256()
+            colunas = (f"{coluna}:{tipo}" for coluna, tipo in self.df.dtypes.items())
+            digest.update("\x1f".join(colunas).encode("utf-8"))
+            if not self.df.empty:
+                digest.update(
+                    pd.util.hash_pandas_object(self.df, index=False).values.tobytes()
+                )
+            return digest.hexdigest()
+
+    @cached_property
+    def memoria_bytes(self) -> int:
+        """Memória ocupada pelo DataFrame, incluindo os textos (calculada uma vez)."""
+        return memoria_bytes(self.df)
+
+
+class RepositorioSnapshots:
+    """
+    Guarda o snapshot mais recente de cada chave, válido por 'ttl_segundos'.
+
+    Com um cache persistente, os snapshots base (sem 'fontes') também são salvos em
+    disco e, após um reinício, carregados na primeira vez em que a chave é pedida.
+    Os snapshots montados a partir de outros são remontados a partir destes.
+    """
+
+    def __init__(
+        self, ttl_segundos: float, persistencia: Optional[CachePersistente] = None
+    ):
+        self.ttl_segundos = ttl_segundos
+        self.persistencia = persistencia
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._versoes = itertools.count(1)
+        self._consultadas: Set[str] = set()  # Chaves já procuradas no cache persistente
+
+    def _atual(self, chave: str) -> Optional[Snapshot]:
+        """Retorna o snapshot atual da chave, carregando-o do disco no primeiro acesso."""
+        with self._lock:
+            snapshot = self._snapshots.get(chave)
+            if snapshot is not None or self.persistencia is None:
+                return snapshot
+            if chave in self._consultadas:
+                return None
+            self._consultadas.add(chave)
+
+        salvo = self.persistencia.obter("snapshot", chave)
+        if salvo is None:
+            return None
+        df, criado_em = salvo
+        with self._lock:
+            # Um snapshot novo pode ter sido salvo durante a leitura do disco
+            snapshot = self._snapshots.get(chave)
+            if snapshot is None:
+                snapshot = self._novo(chave, df, criado_em, ())
+                self._snapshots[chave] = snapshot
+        return snapshot
+
+    def obter(self, chave: str) -> Optional[Snapshot]:
+        """Retorna o snapshot da chave, se existir e ainda estiver dentro do TTL."""
+        snapshot = self._atual(chave)
+        if snapshot is None or self.expirado(snapshot):
+            return None
+        return snapshot
+
+    def expirado(self, snapshot: Snapshot) -> bool:
+        """Indica se o snapshot já passou do TTL."""
+        return snapshot.idade >= self.ttl_segundos
+
+    def obter_ultimo(self, chave: str) -> Optional[Snapshot]:
+        """Retorna o último snapshot salvo da chave, mesmo que já esteja expirado."""
+        return self._atual(chave)
+
+    def _novo(
+        self,
+        chave: str,
+        df: pd.DataFrame,
+        criado_em: Optional[float],
+        fontes: Tuple[int, ...],
+    ) -> Snapshot:
+        """Cria um snapshot com a próxima versão (chamado com o lock adquirido)."""
+        return Snapshot(
+            chave=chave,
+            df=df,
+            versao=next(self._versoes),
+            criado_em=time.time() if criado_em is None else criado_em,
+            fontes=fontes,
+        )
+
+    def salvar(
+        self,
+        chave: str,
+        df: pd.DataFrame,
+        criado_em: Optional[float] = None,
+        fontes: Tuple[int, ...] = (),
+    ) -> Snapshot:
+        """Cria uma nova versão do snapshot da chave e a torna a atual."""
+        with self._lock:
+            snapshot = self._novo(chave, df, criado_em, fontes)
+            self._snapshots[chave] = snapshot
+        if self.persistencia is not None and not fontes:
+            self.persistencia.definir("snapshot", chave, (df, snapshot.criado_em))
+        return snapshot
+
+    def criar(
+        self,
+        chave: str,
+        df: pd.DataFrame,
+        criado_em: Optional[float] = None,
+        fontes: Tuple[int, ...] = (),
+    ) -> Snapshot:
+        """Cria um snapshot com uma nova versão, sem torná-lo o atual da chave."""
+        with self._lock:
+            return self._novo(chave, df, criado_em, fontes)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Versão, linhas, memória e idade de cada snapshot atual, e a memória total."""
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        por_chave = {
+            snapshot.chave: {
+                "versao": snapshot.versao,
+                "linhas": len(snapshot.df),
+                "memoria_bytes": snapshot.memoria_bytes,
+                "idade_segundos": round(snapshot.idade, 3),
+            }
+            for snapshot in snapshots
+        }
+        return {
+            "snapshots": por_chave,
+            "memoria_total_bytes": sum(s["memoria_bytes"] for s in por_chave.values()),
+        }
+
+    def invalidar(self, chave: Optional[str] = None) -> None:
+        """Descarta o snapshot da chave informada (ou todos, se nenhuma for informada)."""
+        with self._lock:
+            if chave is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(chave, None)
+        if self.persistencia is not None:
+            self.persistencia.invalidar("snapshot", chave)
@@ -0,0 +1,59 @@
+"""Extrator em memória usado nos testes do RelatoriosService."""
+
+from typing import Any, Dict, List
+
+from utils.concorrencia import ExecutorConcorrente
+
+PLATAFORMAS = [
+    {"value": "meta_ads", "text": "Facebook Ads"},
+    {"value": "ga4", "text": "Google Analytics"},
+]
+CAMPOS = {
+    "meta_ads": [
+        {"value": "adName", "text": "Ad Name"},
+        {"value": "clicks", "text": "Clicks"},
+        {"value": "spend", "text": "Spend"},
+    ],
+    "ga4": [
+        {"value": "adName", "text": "Ad Name"},
+        {"value": "clicks", "text": "Clicks"},
+        {"value": "cost", "text": "Spend"},
+        {"value": "sessions", "text": "Sessions"},
+    ],
+}
+
+
+class ExtratorFalso:
+    """Extrator em memória, com dados determinísticos, que conta as consultas de insights."""
+
+    def __init__(self):
+        self.concorrencia = ExecutorConcorrente(4)
+        self.insights_consultados: List[str] = []
+
+    def extrair_todas_plataformas(self) -> List[Dict[str, str]]:
+        return list(PLATAFORMAS)
+
+    def extrair_contas(self, plataforma: str) -> List[Dict[str, Any]]:
+        return [
+            {"id": str(i), "name": f"{plataforma} conta {i}", "token": "x"}
+            for i in range(3)
+        ]
+
+    def extrair_campos(self, plataforma: str) -> List[Dict[str, str]]:
+        return list(CAMPOS[plataforma])
+
+    def extrair_insights(
+        self, plataforma: str, conta: Dict[str, Any], campos: List[Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
+        self.insights_consultados.append(plataforma)
+        insights = []
+        for linha in range(4):
+            insight: Dict[str, Any] = {"id": f"{conta['id']}-{linha}"}
+            for posicao, campo in enumerate(CAMPOS[plataforma]):
+                if campo in campos:
+                    valor = int(conta["id"]) * 100 + linha * 10 + posicao
+                    insight[campo["value"]] = (
+                        f"Anúncio {linha}" if campo["value"] == "adName" else valor
+                    )
+            insights.append(insight)
+        return insights
@@ -0,0 +1,147 @@
+"""Testes do AgregadorIncremental, comparado com o groupby().sum() do DataFrame inteiro."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.agregador import AgregadorIncremental
+from services.esquema import EsquemaRelatorio
+
+
+def _resumo_esperado(df: pd.DataFrame, group_cols) -> pd.DataFrame:
+    """Resumo como era gerado a partir do DataFrame de detalhe completo."""
+    num_cols = df.select_dtypes(include=["number"]).columns.tolist()
+    resumo = df.groupby(group_cols, as_index=False)[num_cols].sum()
+    resumo = resumo.reindex(columns=df.columns)
+    for col in resumo.columns:
+        if col not in num_cols and col not in group_cols:
+            resumo[col] = resumo[col].fillna("")
+    return resumo
+
+
+def _plataforma(nome: str, contas: int, linhas: int, semente: int) -> pd.DataFrame:
+    aleatorio = np.random.default_rng(semente)
+    n = contas * linhas
+    return pd.DataFrame(
+        {
+            "Plataforma": [nome] * n,
+            "Conta": [f"Conta {i // linhas}" for i in range(n)],
+            "Ad Name": [f"Anúncio {i}" for i in range(n)],
+            "Clicks": aleatorio.integers(0, 120, n),
+            "Spend": np.round(aleatorio.uniform(0, 100, n), 2),
+            "Status": aleatorio.choice(["ACTIVE", "PAUSED"], n),
+        }
+    )
+
+
+def _compactar(df: pd.DataFrame) -> pd.DataFrame:
+    """Tipos compactos, como nos snapshots das plataformas."""
+    campos = [{"text": col} for col in df.columns if col not in ("Plataforma", "Conta")]
+    return EsquemaRelatorio.de_campos(campos).aplicar(df)
+
+
+def _csv(df: pd.DataFrame) -> str:
+    return df.to_csv(index=False)
+
+
+def test_resumo_de_um_lote_igual_ao_groupby():
+    df = _plataforma("Facebook Ads", contas=30, linhas=500, semente=1)
+    agregador = AgregadorIncremental(["Conta", "Plataforma"])
+    agregador.adicionar(_compactar(df))
+
+    esperado = _resumo_esperado(df, ["Conta", "Plataforma"])
+    assert _csv(agregador.construir()) == _csv(esperado)
+
+
+def test_reais_somados_como_no_groupby():
+    # O groupby escreve 230.27999999999997 (e não a soma exata, 230.28)
+    gastos = [17.57, 86.32, 54.15, 29.97, 42.27]
+    df = pd.DataFrame(
+        {"Plataforma": ["TikTok"] * 5, "Conta": ["Conta 0"] * 5, "Spend": gastos}
+    )
+    agregador = AgregadorIncremental(["Conta", "Plataforma"])
+    agregador.adicionar(_compactar(df))
+
+    resumo = agregador.construir()
+    assert _csv(resumo) == _csv(_resumo_esperado(df, ["Conta", "Plataforma"]))
+    assert resumo["Spend"].iloc[0] == 230.27999999999997
+
+
+def test_resumo_geral_por_plataforma_igual_ao_groupby():
+    plataformas = [
+        _plataforma("Facebook Ads", contas=10, linhas=300, semente=2),
+        _plataforma("Google Analytics", contas=5, linhas=200, semente=3).drop(
+            columns=["Status"]
+        ),
+        _plataforma("TikTok", contas=8, linhas=100, semente=4),
+    ]
+    agregador = AgregadorIncremental(["Plataforma"])
+    for df in plataformas:
+        parcial = AgregadorIncremental(["Plataforma"])
+        parcial.adicionar(_compactar(df))
+        agregador.incorporar(parcial)
+
+    esperado = _resumo_esperado(pd.concat(plataformas, ignore_index=True), ["Plataforma"])
+    assert _csv(agregador.construir()) == _csv(esperado)
+
+
+@pytest.mark.parametrize("valores", [[1, 2], [1.5, 2.5], [None, 2.5]])
+def test_lote_so_com_nulos_nao_define_o_tipo_da_coluna(valores):
+    lotes = [
+        pd.DataFrame({"Plataforma": ["A", "A"], "Conta": ["x", "y"], "Valor": valores}),
+        pd.DataFrame(
+            {"Plataforma": ["B"], "Conta": ["z"], "Valor": pd.Series([None], dtype=object)}
+        ),
+    ]
+    agregador = AgregadorIncremental(["Plataforma"])
+    for lote in lotes:
+        agregador.adicionar(lote)
+
+    resumo = agregador.construir()
+    assert resumo["Valor"].tolist() == [sum(v for v in valores if v is not None), 0]
+    assert resumo["Conta"].tolist() == ["", ""]
+
+
+def test_colunas_somadas_escolhidas_pelo_tipo():
+    lotes = [
+        pd.DataFrame(
+            {
+                "Plataforma": ["A", "A"],
+                "Codigo": [1, 2],  # Numérico aqui, texto no outro lote
+                "Ativo": [True, False],
+                "Vazio": pd.Series([None, None], dtype=object),
+                "Reais": [float("nan"), float("nan")],
+            }
+        ),
+        pd.DataFrame({"Plataforma": ["B"], "Codigo": ["X1"], "Clicks": [7]}),
+    ]
+    agregador = AgregadorIncremental(["Plataforma"])
+    for lote in lotes:
+        agregador.adicionar(lote)
+
+    resumo = agregador.construir()
+    assert list(resumo.columns) == ["Plataforma", "Codigo", "Ativo", "Vazio", "Reais", "Clicks"]
+    assert resumo["Codigo"].tolist() == ["", ""]
+    assert resumo["Ativo"].tolist() == ["", ""]
+    assert resumo["Vazio"].tolist() == ["", ""]
+    assert resumo["Reais"].tolist() == [0.0, 0.0]  # Só nulos, mas sempre numérica
+    assert resumo["Clicks"].tolist() == [0, 7]
+
+
+def test_lotes_de_contas_mantem_as_somas_inteiras():
+    df = _plataforma("TikTok", contas=40, linhas=50, semente=5)
+    agregador = AgregadorIncremental(["Conta", "Plataforma"])
+    for inicio in range(0, len(df), 250):  # Cada conta fica inteira em um lote
+        agregador.adicionar(_compactar(df.iloc[inicio : inicio + 250]))
+
+    resumo = agregador.construir()
+    esperado = _resumo_esperado(df, ["Conta", "Plataforma"])
+    assert agregador.linhas == len(df)
+    assert resumo["Clicks"].tolist() == esperado["Clicks"].tolist()
+    assert np.allclose(resumo["Spend"], esperado["Spend"])
+
+
+def test_sem_linhas():
+    agregador = AgregadorIncremental(["Plataforma"])
+    agregador.adicionar(pd.DataFrame())
+    assert list(agregador.construir().columns) == ["Plataforma"]
@@ -0,0 +1,61 @@
+"""Testes do CachePersistente (arquivo SQLite em um diretório temporário)."""
+
+import glob
+
+from utils.cache_persistente import CachePersistente
+
+
+class Relogio:
+    """Relógio que só anda quando o teste manda."""
+
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def _cache(tmp_path, ttls, relogio=None) -> CachePersistente:
+    return CachePersistente(
+        str(tmp_path / "cache.sqlite3"), 1024 * 1024, ttls, relogio or Relogio()
+    )
+
+
+def test_ttl_por_tipo(tmp_path):
+    relogio = Relogio()
+    cache = _cache(tmp_path, {"fields": 10, "snapshot": 100}, relogio)
+    cache.definir("fields", "a", [1, 2])
+    cache.definir("snapshot", "a", "df")
+    assert cache.obter("fields", "a") == [1, 2]
+
+    relogio.agora += 10
+    assert cache.obter("fields", "a") is None
+    assert cache.obter("snapshot", "a") == "df"
+    assert cache.estatisticas()["tipos"]["fields"] == {
+        "hits": 1,
+        "misses": 1,
+        "descartes": 0,
+    }
+
+
+def test_tipo_desativado_nao_e_salvo_nem_lido(tmp_path):
+    cache = _cache(tmp_path, {"fields": 10, "accounts": 0})
+    cache.definir("accounts", "a", [{"token": "segredo"}])
+    assert cache.obter("accounts", "a") is None
+    assert cache.estatisticas()["itens"] == 0
+
+
+def test_itens_de_tipos_desativados_sao_apagados_do_arquivo(tmp_path):
+    antigo = _cache(tmp_path, {"fields": 10, "accounts": 10})
+    antigo.definir("fields", "a", [{"text": "Clicks"}])
+    antigo.definir("accounts", "a", [{"id": "1", "token": "token-secreto-1"}])
+    antigo.fechar()
+
+    cache = _cache(tmp_path, {"fields": 10})  # 'accounts' não é mais salvo
+    assert cache.obter("fields", "a") == [{"text": "Clicks"}]
+    assert cache.obter("accounts", "a") is None
+    cache.fechar()
+
+    for caminho in glob.glob(str(tmp_path / "cache.sqlite3*")):
+        with open(caminho, "rb") as arquivo:
+            assert b"token-secreto-1" not in arquivo.read()
@@ -0,0 +1,72 @@
+"""Testes do ExecutorConcorrente e da ChamadaUnica."""
+
+import threading
+import time
+
+import pytest
+
+from utils.concorrencia import ChamadaUnica, ExecutorConcorrente
+from utils.limitador import PRIORIDADE_SEGUNDO_PLANO, prioridade, prioridade_atual
+
+
+def test_mapear_mantem_a_ordem_dos_itens():
+    executor = ExecutorConcorrente(4)
+
+    def dobrar(item: int) -> int:
+        time.sleep(0.001 * (10 - item))  # Os últimos terminam primeiro
+        return 2 * item
+
+    assert executor.mapear(dobrar, range(10)) == [2 * i for i in range(10)]
+
+
+def test_mapear_aninhado_usa_as_threads_compartilhadas():
+    executor = ExecutorConcorrente(2, max_threads=2)
+    threads = set()
+    lock = threading.Lock()
+
+    def folha(item: int) -> int:
+        with lock:
+            threads.add(threading.get_ident())
+        time.sleep(0.001)
+        return item
+
+    def nivel(profundidade: int):
+        def executar(item: int):
+            if profundidade == 0:
+                return folha(item)
+            return sum(executor.mapear(nivel(profundidade - 1), range(4)))
+
+        return executar
+
+    # 3 níveis de 4 itens (64 folhas): sem thread livre, quem espera executa o item
+    assert executor.mapear(nivel(2), range(4)) == [24] * 4
+    assert len(threads - {threading.get_ident()}) <= 2
+
+
+def test_mapear_propaga_a_primeira_excecao_e_descarta_o_resto():
+    executor = ExecutorConcorrente(2, max_threads=1)
+    executados = []
+
+    def falhar(item: int) -> int:
+        executados.append(item)
+        if item >= 1:
+            raise ValueError(f"item {item}")
+        return item
+
+    with pytest.raises(ValueError, match="item 1"):
+        executor.mapear(falhar, range(100))
+    time.sleep(0.05)
+    assert len(executados) < 100
+
+
+def test_mapear_iter_passa_a_prioridade_para_as_threads():
+    executor = ExecutorConcorrente(2)
+    with prioridade(PRIORIDADE_SEGUNDO_PLANO):
+        classes = list(executor.mapear_iter(lambda _: prioridade_atual(), range(6)))
+    assert classes == [PRIORIDADE_SEGUNDO_PLANO] * 6
+
+
+def test_chamada_unica_aguardar_sem_execucao_em_andamento():
+    chamadas = ChamadaUnica()
+    assert chamadas.aguardar("x", padrao="nada") == "nada"
+    assert chamadas.estatisticas() == {"execucoes": 0, "compartilhadas": 0}
@@ -0,0 +1,103 @@
+"""Testes do FiltroRelatorio e dos relatórios filtrados, com e sem snapshot em memória."""
+
+import pandas as pd
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from extrator_falso import CAMPOS, PLATAFORMAS, ExtratorFalso
+from services.filtros import FiltroRelatorio
+from services.relatorios_service import RelatoriosService
+
+
+def _csv(df: pd.DataFrame) -> str:
+    return df.drop("id", axis=1, errors="ignore").to_csv(index=False)
+
+
+def _relatorio_plataforma(
+    servico: RelatoriosService, plataforma: str, filtro: FiltroRelatorio
+) -> str:
+    """CSV do relatório filtrado da plataforma, ou a mensagem de erro do filtro."""
+    try:
+        return _csv(servico.gerar_relatorio_plataforma(plataforma, filtro).df)
+    except ValueError as e:
+        return str(e)
+
+
+def test_de_parametros_aceita_listas_e_repeticoes():
+    args = MultiDict([("fields", "spend, Clicks"), ("fields", "spend"), ("conta", "a")])
+    filtro = FiltroRelatorio.de_parametros(args)
+    assert filtro == FiltroRelatorio(campos=("spend", "Clicks"), contas=("a",))
+    assert filtro.chave == "campos=spend,Clicks&contas=a"
+    assert FiltroRelatorio().vazio
+
+
+def test_selecionar_plataformas_por_nome_ou_valor():
+    filtro = FiltroRelatorio(plataformas=("google analytics",))
+    assert filtro.selecionar_plataformas(PLATAFORMAS) == [PLATAFORMAS[1]]
+    with pytest.raises(ValueError, match="Plataforma"):
+        FiltroRelatorio(plataformas=("bing",)).selecionar_plataformas(PLATAFORMAS)
+
+
+def test_resolver_campos_contas_e_derivados():
+    extrator = ExtratorFalso()
+    filtro = FiltroRelatorio(
+        campos=("Cost Per Click", "sessions", "Impressions"), contas=("1", "nenhuma")
+    )
+    recorte = filtro.resolver(extrator.extrair_contas("ga4"), CAMPOS["ga4"])
+
+    assert [conta["name"] for conta in recorte.contas] == ["ga4 conta 1"]
+    # A coluna derivada traz os campos de que depende
+    assert [campo["value"] for campo in recorte.campos] == ["clicks", "cost", "sessions"]
+    assert recorte.colunas == ["Cost Per Click", "Sessions"]
+    assert recorte.campos_ausentes == {"Impressions"}
+    assert recorte.contas_ausentes == {"nenhuma"}
+
+
+def test_validar_so_falha_para_o_que_nenhuma_plataforma_tem():
+    filtro = FiltroRelatorio(campos=("Sessions",))
+    filtro.validar([filtro.resolver([], CAMPOS[valor]) for valor in CAMPOS])  # O GA4 tem
+
+    filtro = FiltroRelatorio(campos=("Sessions", "Reach"))
+    recortes = [filtro.resolver([], CAMPOS[valor]) for valor in CAMPOS]
+    with pytest.raises(ValueError, match="Campo\\(s\\) não encontrado\\(s\\): Reach.$"):
+        filtro.validar(recortes)
+
+
+def test_plataforma_sem_nenhum_campo_pedido_fica_vazia():
+    filtro = FiltroRelatorio(campos=("Sessions",))
+    recorte = filtro.resolver([], CAMPOS["meta_ads"])
+    df = pd.DataFrame({"Plataforma": ["Facebook Ads"], "Conta": ["c"], "Clicks": [1]})
+    assert filtro.aplicar(df, recorte).empty
+
+
+@pytest.mark.parametrize(
+    "filtro",
+    [
+        FiltroRelatorio(campos=("Sessions",)),
+        FiltroRelatorio(campos=("spend", "Ad Name")),
+        FiltroRelatorio(contas=("meta_ads conta 1", "2")),
+        FiltroRelatorio(campos=("Sessions", "Clicks"), contas=("0",), plataformas=("ga4",)),
+    ],
+)
+def test_relatorio_filtrado_nao_depende_do_que_esta_em_memoria(filtro):
+    frio = RelatoriosService(extrator=ExtratorFalso())
+    quente = RelatoriosService(extrator=ExtratorFalso())
+    for plataforma in PLATAFORMAS:  # Snapshots completos já gerados
+        quente.obter_snapshot(plataforma["value"])
+
+    esperado = frio.gerar_relatorio_geral(filtro).df
+    assert _csv(quente.gerar_relatorio_geral(filtro).df) == _csv(esperado)
+    for plataforma in PLATAFORMAS:
+        assert _relatorio_plataforma(
+            quente, plataforma["value"], filtro
+        ) == _relatorio_plataforma(frio, plataforma["value"], filtro)
+
+
+def test_plataforma_sem_os_campos_pedidos_nao_consulta_insights():
+    extrator = ExtratorFalso()
+    servico = RelatoriosService(extrator=extrator)
+    df = servico.gerar_relatorio_geral(FiltroRelatorio(campos=("Sessions",))).df
+
+    assert set(extrator.insights_consultados) == {"ga4"}
+    assert set(df["Plataforma"]) == {"Google Analytics"}
+    assert df["Sessions"].notna().all()
@@ -0,0 +1,186 @@
+"""Testes do LimitadorAdaptativo (com um relógio controlado pelo teste) e das vagas com prioridade."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.limitador import (
+    PRIORIDADE_INTERATIVA,
+    PRIORIDADE_SEGUNDO_PLANO,
+    LimitadorAdaptativo,
+    VagasPrioritarias,
+    VagasPrioritariasAsync,
+    prioridade,
+    trabalho_atual,
+)
+
+
+class Relogio:
+    """Relógio que só anda quando o teste manda."""
+
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+
+def _limitador(relogio, **opcoes) -> LimitadorAdaptativo:
+    parametros = {"taxa_max": 100, "taxa_min": 1, "rajada": 16, "relogio": relogio}
+    parametros.update(opcoes)
+    return LimitadorAdaptativo(**parametros)
+
+
+def test_rajada_de_429_reduz_uma_vez(relogio):
+    limitador = _limitador(relogio)
+    for _ in range(8):  # Respostas das requisições que estavam em andamento
+        limitador.registrar_resposta(429)
+    assert limitador.taxa == 50
+
+
+def test_429_depois_da_janela_reduz_de_novo(relogio):
+    limitador = _limitador(relogio, aumento_por_segundo=0, janela_reducao=1.0)
+    limitador.registrar_resposta(429, retry_after=2)
+    relogio.avancar(2.5)  # Ainda na janela: 2s de pausa + 1s
+    limitador.registrar_resposta(429)
+    assert limitador.taxa == 50
+    relogio.avancar(0.5)
+    limitador.registrar_resposta(429)
+    assert limitador.taxa == 25
+
+
+def test_taxa_volta_a_subir_com_o_tempo(relogio):
+    limitador = _limitador(
+        relogio, taxa_max=20, aumento_por_segundo=2, fator_reducao=0.01
+    )
+    limitador.registrar_resposta(429)
+    assert limitador.taxa == 1  # Taxa mínima
+
+    relogio.avancar(5)
+    assert limitador.estatisticas()["taxa_por_segundo"] == 11
+    relogio.avancar(60)
+    assert limitador.estatisticas()["taxa_por_segundo"] == 20  # Até a taxa máxima
+
+
+def test_pausa_nao_conta_para_a_recuperacao(relogio):
+    limitador = _limitador(relogio, aumento_por_segundo=2)
+    limitador.registrar_resposta(429, retry_after=10)
+    relogio.avancar(10)
+    assert limitador.estatisticas()["taxa_por_segundo"] == 50
+    relogio.avancar(3)
+    assert limitador.estatisticas()["taxa_por_segundo"] == 56
+
+
+def test_sem_taxa_maxima_o_limite_sai_ao_superar_a_taxa_observada(relogio):
+    limitador = _limitador(relogio, taxa_max=0, aumento_por_segundo=1)
+    for _ in range(10):
+        assert limitador.adquirir() == 0  # Sem limite até o primeiro 429
+    limitador.registrar_resposta(429)
+    assert limitador.taxa == 5  # Metade das 10 do último segundo
+
+    relogio.avancar(5)
+    assert limitador.estatisticas()["taxa_por_segundo"] == 10
+    relogio.avancar(1)
+    assert limitador.estatisticas()["taxa_por_segundo"] is None
+
+
+def test_respostas_de_sucesso_nao_alteram_a_taxa(relogio):
+    limitador = _limitador(relogio, aumento_por_segundo=0)
+    limitador.registrar_resposta(429)
+    for _ in range(100):
+        limitador.registrar_resposta(200)
+    assert limitador.taxa == 50
+
+
+def test_classe_menos_prioritaria_cede_a_vez(relogio):
+    limitador = _limitador(relogio)
+    limitador._aguardando[PRIORIDADE_INTERATIVA] += 1  # Usuário esperando uma ficha
+    with limitador._condicao:
+        assert limitador._tentar(PRIORIDADE_SEGUNDO_PLANO) > 0
+        assert limitador._tentar(PRIORIDADE_INTERATIVA) == 0
+
+
+def _aguardar_fila(vagas, classe: str, quantidade: int = 1) -> None:
+    """Espera até que 'quantidade' threads estejam na fila da classe."""
+    limite = time.monotonic() + 5
+    while sum(trabalho.classe == classe for trabalho in vagas._esperando) < quantidade:
+        assert time.monotonic() < limite, "A thread não entrou na fila."
+        time.sleep(0.001)
+
+
+def test_vaga_livre_vai_primeiro_para_a_requisicao_do_usuario():
+    vagas = VagasPrioritarias(1)
+    ordem = []
+
+    def ocupar(classe: str) -> None:
+        with prioridade(classe):
+            with vagas.reservar():
+                ordem.append(classe)
+
+    with vagas.reservar():  # A única vaga está ocupada
+        segundo_plano = threading.Thread(target=ocupar, args=(PRIORIDADE_SEGUNDO_PLANO,))
+        segundo_plano.start()
+        _aguardar_fila(vagas, PRIORIDADE_SEGUNDO_PLANO)
+        interativa = threading.Thread(target=ocupar, args=(PRIORIDADE_INTERATIVA,))
+        interativa.start()
+        _aguardar_fila(vagas, PRIORIDADE_INTERATIVA)
+    segundo_plano.join(5)
+    interativa.join(5)
+
+    assert ordem == [PRIORIDADE_INTERATIVA, PRIORIDADE_SEGUNDO_PLANO]
+
+
+def test_trabalho_elevado_passa_a_frente_enquanto_espera():
+    vagas = VagasPrioritarias(1)
+    ordem = []
+    trabalhos = {}
+
+    def ocupar(nome: str) -> None:
+        with prioridade(PRIORIDADE_SEGUNDO_PLANO):
+            trabalhos[nome] = trabalho_atual()
+            with vagas.reservar():
+                ordem.append(nome)
+
+    with vagas.reservar():
+        primeiro = threading.Thread(target=ocupar, args=("primeiro",))
+        primeiro.start()
+        _aguardar_fila(vagas, PRIORIDADE_SEGUNDO_PLANO)
+        segundo = threading.Thread(target=ocupar, args=("segundo",))
+        segundo.start()
+        _aguardar_fila(vagas, PRIORIDADE_SEGUNDO_PLANO, 2)
+        trabalhos["segundo"].elevar(PRIORIDADE_INTERATIVA)  # Um usuário passou a esperar
+    primeiro.join(5)
+    segundo.join(5)
+
+    assert ordem == ["segundo", "primeiro"]
+
+
+def test_vagas_async_com_prioridade():
+    async def cenario():
+        vagas = VagasPrioritariasAsync(1)
+        ordem = []
+
+        async def ocupar(classe: str) -> None:
+            with prioridade(classe):
+                async with vagas.reservar():
+                    ordem.append(classe)
+
+        async with vagas.reservar():
+            tarefas = [asyncio.ensure_future(ocupar(PRIORIDADE_SEGUNDO_PLANO))]
+            await asyncio.sleep(0)
+            tarefas.append(asyncio.ensure_future(ocupar(PRIORIDADE_INTERATIVA)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tarefas)
+        return ordem
+
+    assert asyncio.run(cenario()) == [PRIORIDADE_INTERATIVA, PRIORIDADE_SEGUNDO_PLANO]
@@ -0,0 +1,88 @@
+"""Testes dos resumos do RelatoriosService, com e sem os snapshots das plataformas."""
+
+import threading
+import time
+
+import pandas as pd
+
+from extrator_falso import PLATAFORMAS, ExtratorFalso
+from services.relatorios_service import RelatoriosService
+
+
+def _csv(df: pd.DataFrame) -> str:
+    return df.to_csv(index=False)
+
+
+def _aguardar(condicao) -> None:
+    """Espera (até 5 s) que a condição seja verdadeira."""
+    limite = time.monotonic() + 5
+    while not condicao():
+        assert time.monotonic() < limite, "A condição não foi atingida."
+        time.sleep(0.001)
+
+
+def test_resumo_sem_snapshot_nao_gera_o_relatorio_de_detalhe():
+    servico = RelatoriosService(extrator=ExtratorFalso())
+    servico.gerar_relatorio_geral_resumo()
+    servico.gerar_relatorio_plataforma_resumo("meta_ads")
+
+    for plataforma in PLATAFORMAS:
+        assert servico.snapshots.obter_ultimo(plataforma["value"]) is None
+
+
+def test_resumo_igual_com_e_sem_snapshot():
+    frio = RelatoriosService(extrator=ExtratorFalso())
+    quente = RelatoriosService(extrator=ExtratorFalso())
+    for plataforma in PLATAFORMAS:
+        quente.obter_snapshot(plataforma["value"])
+
+    assert _csv(quente.gerar_relatorio_geral_resumo().df) == _csv(
+        frio.gerar_relatorio_geral_resumo().df
+    )
+    for plataforma in PLATAFORMAS:
+        assert _csv(quente.gerar_relatorio_plataforma_resumo(plataforma["value"]).df) == _csv(
+            frio.gerar_relatorio_plataforma_resumo(plataforma["value"]).df
+        )
+
+
+def test_resumo_com_snapshot_nao_consulta_insights():
+    extrator = ExtratorFalso()
+    servico = RelatoriosService(extrator=extrator)
+    snapshot = servico.obter_snapshot("meta_ads")
+    extrator.insights_consultados.clear()
+
+    resumo = servico.gerar_relatorio_plataforma_resumo("meta_ads")
+    assert extrator.insights_consultados == []
+    assert resumo.snapshot.fontes == (snapshot.versao,)
+
+
+def test_resumo_aguarda_o_snapshot_em_geracao():
+    extrator = ExtratorFalso()
+    servico = RelatoriosService(extrator=extrator)
+    liberar = threading.Event()
+    consultar = extrator.extrair_insights
+
+    def extrair_insights(*args):
+        liberar.wait(5)  # Segura a geração do snapshot completo
+        return consultar(*args)
+
+    extrator.extrair_insights = extrair_insights
+    geracao = threading.Thread(target=servico.obter_snapshot, args=("meta_ads",))
+    geracao.start()
+    geracoes = servico._geracoes_em_andamento
+    _aguardar(lambda: geracoes.estatisticas()["execucoes"] == 1)
+
+    resumos = []
+    resumo = threading.Thread(
+        target=lambda: resumos.append(servico.gerar_relatorio_plataforma_resumo("meta_ads"))
+    )
+    resumo.start()
+    _aguardar(lambda: geracoes.estatisticas()["compartilhadas"] == 1)  # Resumo esperando
+    liberar.set()
+    geracao.join(5)
+    resumo.join(5)
+
+    (relatorio,) = resumos
+    snapshot = servico.snapshots.obter("meta_ads")
+    assert relatorio.snapshot.fontes == (snapshot.versao,)
+    assert len(extrator.insights_consultados) == 3  # Só a geração do snapshot consultou
@@ -0,0 +1,120 @@
+"""Cache em memória com expiração por tipo de recurso e descarte LRU."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.concorrencia import ChamadaUnica
+
+_AUSENTE = object()  # Sentinela para diferenciar "não encontrado" de um valor None
+
+
+class CacheTTL:
+    """
+    Cache seguro entre threads, com TTL configurável por tipo de recurso.
+    Quando o número de itens passa de 'max_itens', descarta os menos usados (LRU).
+    Misses simultâneos da mesma chave em 'obter_ou_calcular' são calculados uma única vez.
+    """
+
+    def __init__(
+        self,
+        max_itens: int,
+        ttls: Dict[str, float],
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.max_itens = max_itens
+        self.ttls = dict(ttls)  # TTL em segundos por tipo (<= 0 desativa o cache do tipo)
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        # Chave (tipo, chave) -> (instante de expiração, valor)
+        self._itens: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # Cálculos em andamento em 'obter_ou_calcular', por (tipo, chave)
+        self._calculos = ChamadaUnica()
+
+    def _contar(self, tipo: str, evento: str) -> None:
+        """Atualiza as estatísticas do tipo (chamado com o lock adquirido)."""
+        stats = self._stats.setdefault(tipo, {"hits": 0, "misses": 0, "descartes": 0})
+        stats[evento] += 1
+
+    def _buscar(self, tipo: str, chave: Hashable) -> Any:
+        """Retorna o valor válido ou _AUSENTE (chamado com o lock adquirido)."""
+        item = self._itens.get((tipo, chave))
+        if item is not None and item[0] > self._relogio():
+            self._itens.move_to_end((tipo, chave))  # Marca como usado recentemente
+            return item[1]
+        if item is not None:
+            del self._itens[(tipo, chave)]  # Remove o item expirado
+        return _AUSENTE
+
+    def obter(self, tipo: str, chave: Hashable = None, padrao: Any = None) -> Any:
+        """Retorna o valor armazenado, ou 'padrao' se não existir ou estiver expirado."""
+        with self._lock:
+            valor = self._buscar(tipo, chave)
+            self._contar(tipo, "misses" if valor is _AUSENTE else "hits")
+            return padrao if valor is _AUSENTE else valor
+
+    def definir(self, tipo: str, chave: Hashable, valor: Any) -> None:
+        """Armazena um valor com o TTL do seu tipo."""
+        ttl = self.ttls.get(tipo, 0)
+        if ttl <= 0 or self.max_itens <= 0:
+            return  # Cache desativado para este tipo
+
+        with self._lock:
+            self._itens[(tipo, chave)] = (self._relogio() + ttl, valor)
+            self._itens.move_to_end((tipo, chave))
+            while len(self._itens) > self.max_itens:
+                (tipo_descartado, _), _ = self._itens.popitem(last=False)
+                self._contar(tipo_descartado, "descartes")
+
+    def obter_ou_calcular(
+        self, tipo: str, chave: Hashable, calcular: Callable[[], Any]
+    ) -> Any:
+        """
+        Retorna o valor em cache ou o calcula (fora do lock) e o armazena.
+        Chamadas simultâneas com a mesma chave esperam um único cálculo.
+        """
+        valor = self.obter(tipo, chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+
+        def calcular_e_definir() -> Any:
+            # Outra chamada pode ter armazenado o valor enquanto esta esperava
+            with self._lock:
+                valor = self._buscar(tipo, chave)
+            if valor is _AUSENTE:
+                valor = calcular()
+                self.definir(tipo, chave, valor)
+            return valor
+
+        return self._calculos.executar((tipo, chave), calcular_e_definir)
+
+    def invalidar(self, tipo: Optional[str] = None, chave: Hashable = _AUSENTE) -> None:
+        """
+        Remove itens do cache.
+        Sem argumentos limpa tudo; com 'tipo' limpa o tipo; com 'tipo' e 'chave', um item.
+        """
+        with self._lock:
+            if tipo is None:
+                self._itens.clear()
+            elif chave is not _AUSENTE:
+                self._itens.pop((tipo, chave), None)
+            else:
+                for item in [k for k in self._itens if k[0] == tipo]:
+                    del self._itens[item]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """
+        Retorna hits, misses e descartes por tipo, além do tamanho atual e de quantos
+        cálculos foram feitos e compartilhados em 'obter_ou_calcular'.
+        """
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "tipos": {tipo: dict(stats) for tipo, stats in self._stats.items()},
+                "calculos": self._calculos.estatisticas(),
+            }
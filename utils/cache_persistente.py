@@ -0,0 +1,183 @@
+"""Cache em disco (SQLite), com expiração por tipo e limite de tamanho, que sobrevive a reinícios."""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS itens (
+    tipo TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    expira_em REAL NOT NULL,
+    acessado_em REAL NOT NULL,
+    tamanho INTEGER NOT NULL,
+    valor BLOB NOT NULL,
+    PRIMARY KEY (tipo, chave)
+);
+CREATE INDEX IF NOT EXISTS itens_acessado_em ON itens (acessado_em);
+"""
+
+
+class CachePersistente:
+    """
+    Cache em um arquivo SQLite, seguro entre threads (e entre processos, pelo SQLite),
+    com TTL configurável por tipo de recurso, como o CacheTTL.
+    Quando o total armazenado passa de 'max_bytes', descarta primeiro os itens
+    expirados e depois os menos usados (LRU).
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        max_bytes: int,
+        ttls: Dict[str, float],
+        relogio: Callable[[], float] = time.time,  # Relógio de parede: vale entre execuções
+    ):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls)  # TTL em segundos por tipo (<= 0 desativa o cache do tipo)
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        # Uma conexão compartilhada (protegida pelo lock), em modo autocommit
+        self._conexao = sqlite3.connect(
+            caminho, check_same_thread=False, isolation_level=None
+        )
+        self._conexao.execute("PRAGMA journal_mode=WAL")  # Leitores não bloqueiam a escrita
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_ESQUEMA)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._descartar_desativados()
+
+    def _ativo(self, tipo: str) -> bool:
+        """Indica se o cache está ativo para o tipo (TTL configurado e maior que zero)."""
+        return self.ttls.get(tipo, 0) > 0 and self.max_bytes > 0
+
+    def _descartar_desativados(self) -> None:
+        """
+        Remove do arquivo os itens dos tipos desativados (ex: gravados por outra
+        configuração ou versão), sobrescrevendo o seu conteúdo no disco.
+        """
+        ativos = [tipo for tipo in self.ttls if self._ativo(tipo)]
+        marcadores = ", ".join("?" * len(ativos))
+        with self._lock:
+            self._conexao.execute("PRAGMA secure_delete=ON")
+            removidos = self._conexao.execute(
+                f"DELETE FROM itens WHERE tipo NOT IN ({marcadores})", ativos
+            ).rowcount
+            if removidos:
+                # Leva as páginas sobrescritas do WAL para o arquivo principal
+                self._conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conexao.execute("PRAGMA secure_delete=OFF")
+
+    def _contar(self, tipo: str, evento: str, quantidade: int = 1) -> None:
+        """Atualiza as estatísticas do tipo (chamado com o lock adquirido)."""
+        stats = self._stats.setdefault(tipo, {"hits": 0, "misses": 0, "descartes": 0})
+        stats[evento] += quantidade
+
+    def obter(self, tipo: str, chave: str, padrao: Any = None) -> Any:
+        """
+        Retorna o valor armazenado, ou 'padrao' se não existir, estiver expirado ou
+        o cache estiver desativado para o tipo.
+        """
+        if not self._ativo(tipo):
+            return padrao
+        agora = self._relogio()
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT expira_em, valor FROM itens WHERE tipo = ? AND chave = ?",
+                (tipo, chave),
+            ).fetchone()
+            if linha is None or linha[0] <= agora:
+                if linha is not None:  # Remove o item expirado
+                    self._conexao.execute(
+                        "DELETE FROM itens WHERE tipo = ? AND chave = ?", (tipo, chave)
+                    )
+                self._contar(tipo, "misses")
+                return padrao
+            self._conexao.execute(
+                "UPDATE itens SET acessado_em = ? WHERE tipo = ? AND chave = ?",
+                (agora, tipo, chave),
+            )
+            self._contar(tipo, "hits")
+        return pickle.loads(linha[1])  # Desserializa fora do lock
+
+    def definir(self, tipo: str, chave: str, valor: Any) -> None:
+        """Armazena um valor com o TTL do seu tipo."""
+        if not self._ativo(tipo):
+            return  # Cache desativado para este tipo
+        ttl = self.ttls[tipo]
+
+        blob = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return  # Não cabe no cache
+        agora = self._relogio()
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO itens VALUES (?, ?, ?, ?, ?, ?)",
+                (tipo, chave, agora + ttl, agora, len(blob), blob),
+            )
+            self._descartar_excedente(agora)
+
+    def _descartar_excedente(self, agora: float) -> None:
+        """Mantém o total armazenado dentro de 'max_bytes' (chamado com o lock adquirido)."""
+        (total,) = self._conexao.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM itens"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        # Primeiro os expirados, depois os acessados há mais tempo
+        linhas = self._conexao.execute(
+            "SELECT tipo, chave, tamanho FROM itens "
+            "ORDER BY expira_em > ?, acessado_em",
+            (agora,),
+        )
+        descartar = []
+        for tipo, chave, tamanho in linhas:
+            if total <= self.max_bytes:
+                break
+            descartar.append((tipo, chave))
+            total -= tamanho
+        linhas.close()
+        self._conexao.executemany(
+            "DELETE FROM itens WHERE tipo = ? AND chave = ?", descartar
+        )
+        for tipo, _ in descartar:
+            self._contar(tipo, "descartes")
+
+    def invalidar(self, tipo: Optional[str] = None, chave: Optional[str] = None) -> None:
+        """
+        Remove itens do cache.
+        Sem argumentos limpa tudo; com 'tipo' limpa o tipo; com 'tipo' e 'chave', um item.
+        """
+        with self._lock:
+            if tipo is None:
+                self._conexao.execute("DELETE FROM itens")
+            elif chave is None:
+                self._conexao.execute("DELETE FROM itens WHERE tipo = ?", (tipo,))
+            else:
+                self._conexao.execute(
+                    "DELETE FROM itens WHERE tipo = ? AND chave = ?", (tipo, chave)
+                )
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna hits, misses e descartes por tipo, além do tamanho atual."""
+        with self._lock:
+            itens, total = self._conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM itens"
+            ).fetchone()
+            return {
+                "itens": itens,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "tipos": {tipo: dict(stats) for tipo, stats in self._stats.items()},
+            }
+
+    def fechar(self) -> None:
+        """Fecha a conexão com o arquivo do cache."""
+        with self._lock:
+            self._conexao.close()
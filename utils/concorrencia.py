@@ -0,0 +1,276 @@
+"""Utilitários de concorrência para chamadas de E/S à API."""
+
+import asyncio
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from utils.limitador import (
+    Prioridade,
+    VagasPrioritarias,
+    no_trabalho,
+    prioridade_atual,
+)
+
+
+def _no_contexto_atual(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Envolve 'func' para rodar, em outras threads, com as variáveis de contexto de
+    quem chamou (ex: a prioridade do trabalho, ver utils.limitador).
+    """
+    contexto = contextvars.copy_context()
+
+    def executar(item: Any) -> Any:
+        return contexto.copy().run(func, item)  # Uma cópia por chamada simultânea
+
+    return executar
+
+
+async def _com_contexto(corrotina: Awaitable[Any], contexto: contextvars.Context) -> Any:
+    """Aguarda a corrotina com as variáveis de contexto de quem a agendou."""
+    for variavel, valor in contexto.items():
+        variavel.set(valor)  # Só afeta a tarefa atual (que tem o próprio contexto)
+    return await corrotina
+
+
+class _Tarefa:
+    """
+    Um item de ExecutorConcorrente.mapear_iter, executado uma única vez: por uma
+    thread auxiliar ou, se nenhuma o iniciou ainda, por quem espera o resultado.
+    """
+
+    def __init__(self, func: Callable[[Any], Any], item: Any):
+        self._func = func
+        self._item = item
+        self._lock = threading.Lock()
+        self._iniciada = False
+        self.futuro: Future = Future()
+
+    def _iniciar(self) -> bool:
+        """Marca a tarefa como iniciada; retorna False se outra thread já a iniciou."""
+        with self._lock:
+            if self._iniciada:
+                return False
+            self._iniciada = True
+            return True
+
+    def executar(self) -> None:
+        """Executa o item, a menos que outra thread já o tenha iniciado."""
+        if not self._iniciar():
+            return
+        self.futuro.set_running_or_notify_cancel()
+        try:
+            self.futuro.set_result(self._func(self._item))
+        except BaseException as e:
+            self.futuro.set_exception(e)
+
+    def cancelar(self) -> None:
+        """Descarta o item, se ele ainda não foi iniciado."""
+        if self._iniciar():
+            self.futuro.cancel()
+
+
+class ExecutorConcorrente:
+    """
+    Distribui chamadas de E/S entre threads, limitando as chamadas simultâneas.
+    As threads auxiliares são compartilhadas por todas as chamadas (no máximo
+    'max_threads'), mesmo quando 'mapear' é chamado dentro de outro 'mapear'
+    (ex: plataformas -> contas -> insights): sem thread livre, cada item é
+    executado pela própria thread que espera o resultado.
+    """
+
+    def __init__(self, max_simultaneas: int, max_threads: Optional[int] = None):
+        if max_simultaneas < 1:
+            raise ValueError("max_simultaneas deve ser maior ou igual a 1.")
+        self.max_simultaneas = max_simultaneas
+        # As vagas livres vão primeiro para os trabalhos mais prioritários
+        self._vagas = VagasPrioritarias(max_simultaneas)
+        # Threads além das vagas, para quem espera uma vaga ou monta os resultados
+        self.max_threads = max_threads or 2 * max_simultaneas
+        self._threads = ThreadPoolExecutor(
+            max_workers=self.max_threads, thread_name_prefix="concorrencia"
+        )
+
+    def limite(self) -> ContextManager[None]:
+        """
+        Reserva uma das vagas de execução enquanto o bloco estiver ativo, pela
+        prioridade do trabalho atual (ver utils.limitador).
+        """
+        return self._vagas.reservar()
+
+    def mapear(self, func: Callable[[Any], Any], itens: Iterable[Any]) -> List[Any]:
+        """Aplica 'func' a cada item em paralelo, devolvendo os resultados na ordem dos itens."""
+        itens = list(itens)
+        if len(itens) <= 1:
+            return [func(item) for item in itens]  # Não vale a pena usar threads
+        # Propaga a primeira exceção, na ordem dos itens, descartando os não iniciados
+        return list(self.mapear_iter(func, itens))
+
+    def mapear_iter(self, func: Callable[[Any], Any], itens: Iterable[Any]) -> Iterator[Any]:
+        """
+        Como 'mapear', mas produz cada resultado assim que ele (e os anteriores) fica pronto.
+        No máximo 'max_simultaneas' itens ficam em andamento ou aguardando consumo.
+        """
+        itens = iter(itens)
+        func = _no_contexto_atual(func)
+        pendentes: Deque[_Tarefa] = deque()
+
+        def submeter(item: Any) -> None:
+            tarefa = _Tarefa(func, item)
+            self._threads.submit(tarefa.executar)
+            pendentes.append(tarefa)
+
+        for item in islice(itens, self.max_simultaneas):
+            submeter(item)
+        try:
+            while pendentes:
+                tarefa = pendentes.popleft()
+                tarefa.executar()  # Ainda na fila das threads: executa aqui mesmo
+                for proxima in pendentes:
+                    if tarefa.futuro.done():
+                        break
+                    proxima.executar()  # Adianta os próximos enquanto espera
+                resultado = tarefa.futuro.result()
+                for item in islice(itens, 1):  # Repõe a vaga liberada
+                    submeter(item)
+                yield resultado
+        finally:
+            for tarefa in pendentes:  # Consumo interrompido: descarta o que não começou
+                tarefa.cancelar()
+
+
+class ChamadaUnica:
+    """
+    Agrupa chamadas simultâneas com a mesma chave em uma única execução.
+    Quem chega enquanto a chave está em andamento espera e recebe o mesmo resultado
+    (ou a mesma exceção). Nada é guardado depois que a execução termina.
+    A execução roda com a prioridade mais alta entre as de quem a espera
+    (ver utils.limitador): uma requisição de usuário que se junta a uma
+    atualização em segundo plano não fica atrás das demais requisições.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[Hashable, Tuple[Future, Prioridade]] = {}
+        self._contadores = {"execucoes": 0, "compartilhadas": 0}
+
+    def executar(self, chave: Hashable, func: Callable[[], Any]) -> Any:
+        """Executa 'func' uma única vez por chave entre as chamadas simultâneas."""
+        with self._lock:
+            em_andamento = self._em_andamento.get(chave)
+            lider = em_andamento is None
+            if lider:
+                futuro, trabalho = Future(), Prioridade(prioridade_atual())
+                self._em_andamento[chave] = (futuro, trabalho)
+                self._contadores["execucoes"] += 1
+            else:
+                futuro, trabalho = em_andamento
+                trabalho.elevar(prioridade_atual())
+                self._contadores["compartilhadas"] += 1
+
+        if not lider:
+            return futuro.result()  # Aguarda a execução em andamento
+
+        try:
+            with no_trabalho(trabalho):
+                resultado = func()
+        except BaseException as e:
+            self._finalizar(chave)
+            futuro.set_exception(e)  # Repassa o erro para todos que estão esperando
+            raise
+        self._finalizar(chave)
+        futuro.set_result(resultado)
+        return resultado
+
+    def aguardar(self, chave: Hashable, padrao: Any = None) -> Any:
+        """
+        Aguarda a execução em andamento da chave e retorna o seu resultado, sem
+        iniciar uma nova: se não houver nenhuma em andamento, retorna 'padrao'.
+        """
+        with self._lock:
+            em_andamento = self._em_andamento.get(chave)
+            if em_andamento is None:
+                return padrao
+            futuro, trabalho = em_andamento
+            trabalho.elevar(prioridade_atual())
+            self._contadores["compartilhadas"] += 1
+        return futuro.result()
+
+    def _finalizar(self, chave: Hashable) -> None:
+        """Remove a chave, para que a próxima chamada inicie uma nova execução."""
+        with self._lock:
+            del self._em_andamento[chave]
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna quantas execuções ocorreram e quantas chamadas foram compartilhadas."""
+        with self._lock:
+            return dict(self._contadores)
+
+
+class LacoEventos:
+    """
+    Laço de eventos asyncio em uma thread própria, compartilhado por todas as threads
+    do servidor. As corrotinas de E/S de todas as requisições rodam nele, de modo que
+    as chamadas simultâneas à API não precisam de uma thread cada.
+    """
+
+    def __init__(self, nome: str = "laco-eventos"):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name=nome, daemon=True
+        )
+        self._thread.start()
+
+    def submeter(self, corrotina: Awaitable[Any]) -> Future:
+        """Agenda a corrotina no laço e retorna um Future (seguro entre threads)."""
+        contexto = contextvars.copy_context()
+        return asyncio.run_coroutine_threadsafe(
+            _com_contexto(corrotina, contexto), self._loop
+        )
+
+    def executar(self, corrotina: Awaitable[Any]) -> Any:
+        """Executa a corrotina no laço e aguarda o resultado (não chamar de dentro do laço)."""
+        return self.submeter(corrotina).result()
+
+    def mapear_iter(
+        self,
+        func: Callable[[Any], Awaitable[Any]],
+        itens: Iterable[Any],
+        max_pendentes: int,
+    ) -> Iterator[Any]:
+        """
+        Como ExecutorConcorrente.mapear_iter, para funções assíncronas: produz os
+        resultados na ordem dos itens, com no máximo 'max_pendentes' em andamento.
+        """
+        itens = iter(itens)
+        pendentes = deque(self.submeter(func(item)) for item in islice(itens, max_pendentes))
+        try:
+            while pendentes:
+                resultado = pendentes.popleft().result()
+                for item in islice(itens, 1):  # Repõe a vaga liberada
+                    pendentes.append(self.submeter(func(item)))
+                yield resultado
+        finally:
+            for futuro in pendentes:  # Consumo interrompido: cancela o que sobrou
+                futuro.cancel()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """Encerra o laço de eventos e aguarda a sua thread."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
@@ -0,0 +1,127 @@
+"""Formatos de saída dos relatórios e negociação de conteúdo."""
+
+import io
+import zlib
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+
+import pandas as pd
+from werkzeug.datastructures import MIMEAccept
+
+
+class Formato(NamedTuple):
+    """Descrição de um formato de saída suportado."""
+
+    nome: str
+    mimetype: str
+    extensao: str
+
+
+FORMATOS: Dict[str, Formato] = {
+    "csv": Formato("csv", "text/csv", "csv"),
+    "csv.gz": Formato("csv.gz", "application/gzip", "csv.gz"),
+    "csv.zst": Formato("csv.zst", "application/zstd", "csv.zst"),
+    "parquet": Formato("parquet", "application/vnd.apache.parquet", "parquet"),
+    "arrow": Formato("arrow", "application/vnd.apache.arrow.stream", "arrow"),
+}
+FORMATO_PADRAO = "csv"
+
+# Nomes alternativos aceitos em '?format='
+_APELIDOS = {"gzip": "csv.gz", "gz": "csv.gz", "zstd": "csv.zst", "zst": "csv.zst"}
+
+# Tipos aceitos no cabeçalho 'Accept' (além dos tipos principais de FORMATOS)
+_MIMETYPES = {formato.mimetype: nome for nome, formato in FORMATOS.items()}
+_MIMETYPES.update(
+    {
+        "application/x-parquet": "parquet",
+        "application/vnd.apache.arrow.file": "arrow",
+        "application/x-gzip": "csv.gz",
+    }
+)
+
+
+class FormatoInvalido(ValueError):
+    """O formato pedido não existe."""
+
+
+class FormatoIndisponivel(RuntimeError):
+    """O formato existe, mas a biblioteca necessária não está instalada."""
+
+
+def negociar_formato(formato: Optional[str], accept: MIMEAccept) -> str:
+    """
+    Escolhe o formato da resposta: '?format=' tem prioridade sobre o cabeçalho 'Accept'.
+    Sem preferência reconhecida, usa CSV.
+    """
+    if formato:
+        nome = formato.strip().lower()
+        nome = _APELIDOS.get(nome, nome)
+        if nome not in FORMATOS:
+            raise FormatoInvalido(
+                f"Formato '{formato}' não suportado. Use: {', '.join(FORMATOS)}."
+            )
+        return nome
+
+    # Em empates (ex: '*/*'), vale a ordem de _MIMETYPES, que começa pelo CSV
+    melhor = accept.best_match(list(_MIMETYPES), default=None)
+    return _MIMETYPES[melhor] if melhor else FORMATO_PADRAO
+
+
+def _importar_pyarrow():
+    """Importa o pyarrow sob demanda (dependência opcional)."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401 (registra o submódulo)
+    except ImportError:
+        raise FormatoIndisponivel(
+            "Os formatos parquet e arrow exigem a biblioteca 'pyarrow'."
+        ) from None
+    return pyarrow
+
+
+def para_parquet(df: pd.DataFrame) -> bytes:
+    """Serializa o DataFrame no formato Parquet."""
+    _importar_pyarrow()
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def para_arrow(df: pd.DataFrame) -> bytes:
+    """Serializa o DataFrame no formato Arrow IPC (stream)."""
+    pa = _importar_pyarrow()
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as writer:
+        writer.write_table(tabela)
+    return sink.getvalue().to_pybytes()
+
+
+def _compressor(formato: str):
+    """Cria o compressor incremental do formato (gzip ou zstd)."""
+    if formato == "csv.gz":
+        return zlib.compressobj(wbits=31)  # wbits=31 produz o formato gzip
+    try:
+        import zstandard
+    except ImportError:
+        raise FormatoIndisponivel(
+            "O formato csv.zst exige a biblioteca 'zstandard'."
+        ) from None
+    return zstandard.ZstdCompressor().compressobj()
+
+
+def verificar_disponivel(formato: str) -> None:
+    """Lança FormatoIndisponivel se a biblioteca do formato não estiver instalada."""
+    if formato in ("parquet", "arrow"):
+        _importar_pyarrow()
+    elif formato == "csv.zst":
+        _compressor(formato)
+
+
+def comprimir(blocos: Iterable[str], formato: str) -> Iterator[bytes]:
+    """Comprime os blocos de texto à medida que são produzidos."""
+    compressor = _compressor(formato)
+    for bloco in blocos:
+        dados = compressor.compress(bloco.encode("utf-8"))
+        if dados:
+            yield dados
+    yield compressor.flush()
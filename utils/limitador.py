@@ -0,0 +1,387 @@
+"""Limite adaptativo de requisições à API, com prioridade entre classes de trabalho."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+# Classes de trabalho, da mais para a menos prioritária
+PRIORIDADE_INTERATIVA = "interativa"  # Requisições HTTP dos usuários
+PRIORIDADE_SEGUNDO_PLANO = "segundo_plano"  # Atualizações e pré-aquecimento
+PRIORIDADES = (PRIORIDADE_INTERATIVA, PRIORIDADE_SEGUNDO_PLANO)
+
+
+class Prioridade:
+    """
+    Classe de prioridade de um trabalho, compartilhada por todas as threads e
+    corrotinas dele. Pode ser elevada enquanto o trabalho roda (ex: quando uma
+    requisição de usuário passa a esperar uma atualização em segundo plano).
+    """
+
+    __slots__ = ("classe",)
+
+    def __init__(self, classe: str):
+        if classe not in PRIORIDADES:
+            raise ValueError(
+                f"Prioridade '{classe}' inválida. Use: {', '.join(PRIORIDADES)}."
+            )
+        self.classe = classe
+
+    def elevar(self, classe: str) -> None:
+        """Passa a usar 'classe', se ela for mais prioritária que a atual."""
+        if PRIORIDADES.index(classe) < PRIORIDADES.index(self.classe):
+            self.classe = classe
+
+
+# Prioridade do trabalho em andamento; propagada às threads de ExecutorConcorrente
+_prioridade_atual: ContextVar[Prioridade] = ContextVar(
+    "prioridade", default=Prioridade(PRIORIDADE_INTERATIVA)
+)
+
+
+def prioridade_atual() -> str:
+    """Retorna a classe de prioridade do trabalho em andamento."""
+    return _prioridade_atual.get().classe
+
+
+def trabalho_atual() -> Prioridade:
+    """Retorna a prioridade (elevável) do trabalho em andamento."""
+    return _prioridade_atual.get()
+
+
+@contextmanager
+def no_trabalho(trabalho: Prioridade) -> Iterator[Prioridade]:
+    """Executa o bloco como parte do trabalho informado (com a prioridade dele)."""
+    token = _prioridade_atual.set(trabalho)
+    try:
+        yield trabalho
+    finally:
+        _prioridade_atual.reset(token)
+
+
+def prioridade(classe: str) -> ContextManager[Prioridade]:
+    """Executa o bloco como um novo trabalho, com a classe de prioridade informada."""
+    return no_trabalho(Prioridade(classe))
+
+
+def _mais_prioritarias(classe: str) -> Tuple[str, ...]:
+    """Classes mais prioritárias que 'classe'."""
+    return PRIORIDADES[: PRIORIDADES.index(classe)]
+
+
+class _FilaPorClasse:
+    """Vagas livres e os trabalhos que esperam por elas."""
+
+    def __init__(self, vagas: int):
+        if vagas < 1:
+            raise ValueError("O número de vagas deve ser maior ou igual a 1.")
+        self.vagas = vagas
+        self._livres = vagas
+        self._esperando: List[Prioridade] = []
+
+    def _tentar(self, trabalho: Prioridade) -> bool:
+        """
+        Ocupa uma vaga se houver uma livre e nenhum trabalho de uma classe mais
+        prioritária esperando. A classe de cada trabalho é lida a cada tentativa,
+        pois pode ter sido elevada durante a espera.
+        """
+        mais_prioritarias = _mais_prioritarias(trabalho.classe)
+        if self._livres < 1 or any(
+            outro.classe in mais_prioritarias for outro in self._esperando
+        ):
+            return False
+        self._livres -= 1
+        return True
+
+
+class VagasPrioritarias(_FilaPorClasse):
+    """
+    Semáforo entre threads em que uma vaga livre só é entregue a uma classe quando
+    não há ninguém esperando em uma classe mais prioritária: as requisições dos
+    usuários passam à frente das atualizações em segundo plano.
+    """
+
+    def __init__(self, vagas: int):
+        super().__init__(vagas)
+        self._condicao = threading.Condition()
+
+    @contextmanager
+    def reservar(self) -> Iterator[None]:
+        """Ocupa uma vaga (pela prioridade do trabalho atual) enquanto o bloco estiver ativo."""
+        trabalho = trabalho_atual()
+        with self._condicao:
+            self._esperando.append(trabalho)
+            try:
+                while not self._tentar(trabalho):
+                    self._condicao.wait()
+            finally:
+                self._esperando.remove(trabalho)
+                self._condicao.notify_all()  # Libera as classes menos prioritárias
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._livres += 1
+                self._condicao.notify_all()
+
+
+class VagasPrioritariasAsync(_FilaPorClasse):
+    """Como VagasPrioritarias, para corrotinas de um mesmo laço de eventos."""
+
+    def __init__(self, vagas: int):
+        super().__init__(vagas)
+        self._condicao: Optional[asyncio.Condition] = None  # Criada no laço em uso
+
+    @asynccontextmanager
+    async def reservar(self) -> AsyncIterator[None]:
+        """Ocupa uma vaga (pela prioridade do trabalho atual) enquanto o bloco estiver ativo."""
+        if self._condicao is None:
+            self._condicao = asyncio.Condition()
+        trabalho = trabalho_atual()
+        async with self._condicao:
+            self._esperando.append(trabalho)
+            try:
+                while not self._tentar(trabalho):
+                    await self._condicao.wait()
+            finally:
+                self._esperando.remove(trabalho)
+                self._condicao.notify_all()
+        try:
+            yield
+        finally:
+            async with self._condicao:
+                self._livres += 1
+                self._condicao.notify_all()
+
+
+class LimitadorAdaptativo:
+    """
+    Balde de fichas (token bucket) compartilhado por todas as requisições à API.
+
+    Sem 'taxa_max' (0), não há limite até o primeiro 429: a taxa passa a ser a
+    metade da observada naquele momento e, quando volta a superá-la, o limite sai.
+    A taxa se adapta às respostas: cai pela metade com um 429 (e pausa tudo pelo
+    'Retry-After', se houver) e volta a subir com o tempo, 'aumento_por_segundo'
+    a cada segundo sem pausa. Os 429 que chegam até 'janela_reducao' segundos depois
+    do fim da pausa são das requisições feitas antes da redução (ou logo depois
+    dela) e não reduzem a taxa de novo.
+    Uma ficha só é entregue a uma classe quando não há ninguém esperando em uma
+    classe mais prioritária, de modo que as requisições dos usuários passam à
+    frente das atualizações em segundo plano.
+    """
+
+    def __init__(
+        self,
+        taxa_max: float,
+        taxa_min: float,
+        rajada: float,
+        aumento_por_segundo: float = 5.0,
+        fator_reducao: float = 0.5,
+        janela_reducao: float = 2.0,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        if taxa_min <= 0 or 0 < taxa_max < taxa_min:
+            raise ValueError(
+                "As taxas devem satisfazer 0 < taxa_min <= taxa_max (ou taxa_max = 0)."
+            )
+        self.taxa_max = taxa_max
+        self.taxa_min = taxa_min
+        self.rajada = max(rajada, 1.0)
+        self.aumento_por_segundo = aumento_por_segundo
+        self.fator_reducao = fator_reducao
+        self.janela_reducao = janela_reducao
+        self._relogio = relogio
+
+        self._condicao = threading.Condition()
+        # Requisições por segundo permitidas no momento (None: sem limite)
+        self.taxa: Optional[float] = taxa_max if taxa_max > 0 else None
+        # Sem 'taxa_max': taxa observada no primeiro 429, acima da qual o limite sai
+        self._taxa_livre = 0.0
+        self._liberacoes: Deque[float] = deque()  # Instantes do último segundo
+        self._fichas = self.rajada
+        self._atualizado_em = relogio()
+        self._pausado_ate = 0.0
+        self._reducao_ate = 0.0  # Fim da janela da última redução
+        self._recuperado_em = self._atualizado_em  # Último aumento da taxa
+        self._aguardando = {classe: 0 for classe in PRIORIDADES}
+        self._stats = {
+            classe: {"liberadas": 0, "espera_total": 0.0, "espera_max": 0.0}
+            for classe in PRIORIDADES
+        }
+
+    def _repor(self, agora: float) -> None:
+        """Repõe as fichas pelo tempo decorrido (chamado com o lock adquirido)."""
+        decorrido = max(agora - max(self._atualizado_em, self._pausado_ate), 0.0)
+        if self.taxa is not None:
+            self._fichas = min(self.rajada, self._fichas + decorrido * self.taxa)
+        self._atualizado_em = max(agora, self._atualizado_em)
+
+    def _recuperar(self, agora: float) -> None:
+        """
+        Aumenta a taxa pelo tempo decorrido desde o último aumento, sem contar as
+        pausas (chamado com o lock adquirido, depois de _repor).
+        """
+        decorrido = max(agora - max(self._recuperado_em, self._pausado_ate), 0.0)
+        self._recuperado_em = max(agora, self._recuperado_em)
+        if self.taxa is None or not decorrido:
+            return
+        # Aumento aditivo, até a taxa máxima (ou até sair o limite)
+        self.taxa += self.aumento_por_segundo * decorrido
+        if self.taxa_max > 0:
+            self.taxa = min(self.taxa_max, self.taxa)
+        elif self.taxa > self._taxa_livre:
+            self.taxa = None
+
+    def _liberar(self, agora: float) -> float:
+        """Registra uma ficha entregue (chamado com o lock adquirido); retorna 0."""
+        self._liberacoes.append(agora)
+        while self._liberacoes[0] < agora - 1.0:
+            self._liberacoes.popleft()
+        return 0.0
+
+    def _tentar(self, classe: str) -> float:
+        """
+        Tenta retirar uma ficha para a classe (chamado com o lock adquirido).
+        Retorna 0 se conseguiu ou quantos segundos esperar antes de tentar de novo.
+        """
+        agora = self._relogio()
+        if agora < self._pausado_ate:
+            return self._pausado_ate - agora
+        self._repor(agora)
+        self._recuperar(agora)
+        if self.taxa is None:
+            return self._liberar(agora)  # Sem limite (nenhum 429 até agora)
+
+        if any(self._aguardando[c] for c in _mais_prioritarias(classe)):
+            return 1 / self.taxa  # Cede a vez (ou aguarda o aviso de que a fila andou)
+        if self._fichas >= 1:
+            self._fichas -= 1
+            return self._liberar(agora)
+        return (1 - self._fichas) / self.taxa
+
+    def _registrar_espera(self, classe: str, espera: float) -> None:
+        """Atualiza as estatísticas da classe (chamado com o lock adquirido)."""
+        stats = self._stats[classe]
+        stats["liberadas"] += 1
+        stats["espera_total"] += espera
+        stats["espera_max"] = max(stats["espera_max"], espera)
+
+    def _reclassificar(self, classe: str, trabalho: Prioridade) -> str:
+        """
+        Move a espera para a classe atual do trabalho, se ela foi elevada
+        (chamado com o lock adquirido). Retorna a classe atual.
+        """
+        if trabalho.classe != classe:
+            self._aguardando[classe] -= 1
+            self._aguardando[trabalho.classe] += 1
+        return trabalho.classe
+
+    def adquirir(self, classe: Optional[str] = None) -> float:
+        """Aguarda uma ficha (bloqueando a thread) e retorna o tempo de espera."""
+        trabalho = Prioridade(classe) if classe else trabalho_atual()
+        inicio = self._relogio()
+        with self._condicao:
+            classe = trabalho.classe
+            self._aguardando[classe] += 1
+            try:
+                while True:
+                    classe = self._reclassificar(classe, trabalho)
+                    espera = self._tentar(classe)
+                    if espera <= 0:
+                        break
+                    self._condicao.wait(espera)
+            finally:
+                self._aguardando[classe] -= 1
+                self._condicao.notify_all()  # Libera as classes menos prioritárias
+            espera_total = self._relogio() - inicio
+            self._registrar_espera(classe, espera_total)
+        return espera_total
+
+    async def adquirir_async(self, classe: Optional[str] = None) -> float:
+        """Como 'adquirir', mas aguarda com asyncio.sleep, sem bloquear o laço de eventos."""
+        trabalho = Prioridade(classe) if classe else trabalho_atual()
+        inicio = self._relogio()
+        with self._condicao:
+            classe = trabalho.classe
+            self._aguardando[classe] += 1
+        try:
+            while True:
+                with self._condicao:
+                    classe = self._reclassificar(classe, trabalho)
+                    espera = self._tentar(classe)
+                if espera <= 0:
+                    break
+                await asyncio.sleep(espera)
+        finally:
+            with self._condicao:
+                self._aguardando[classe] -= 1
+                self._condicao.notify_all()
+        espera_total = self._relogio() - inicio
+        with self._condicao:
+            self._registrar_espera(classe, espera_total)
+        return espera_total
+
+    def registrar_resposta(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        """
+        Ajusta a taxa a partir do resultado de uma requisição: um 429 fora da janela
+        da última redução reduz a taxa e, com 'Retry-After', pausa todas as classes.
+        """
+        if status_code != 429:
+            return  # A taxa volta a subir com o tempo (ver _recuperar)
+        with self._condicao:
+            agora = self._relogio()
+            self._repor(agora)
+            self._recuperar(agora)
+            if agora < self._reducao_ate:
+                return  # Já reduzida por um 429 das requisições feitas na mesma época
+
+            # Redução multiplicativa; 'Retry-After' pausa todas as classes
+            if self.taxa is None:  # Primeiro 429: parte da taxa observada
+                recentes = sum(1 for t in self._liberacoes if t >= agora - 1.0)
+                self._taxa_livre = max(float(recentes), self.taxa_min)
+                self.taxa = self._taxa_livre
+            self.taxa = max(self.taxa_min, self.taxa * self.fator_reducao)
+            self._fichas = min(self._fichas, 0.0)
+            if retry_after:
+                self._pausado_ate = max(self._pausado_ate, agora + retry_after)
+            self._reducao_ate = max(self._pausado_ate, agora) + self.janela_reducao
+            self._condicao.notify_all()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna a taxa atual e, por classe, a fila e os tempos de espera."""
+        with self._condicao:
+            agora = self._relogio()
+            self._repor(agora)
+            self._recuperar(agora)
+            pausa = max(self._pausado_ate - agora, 0.0)
+            classes = {}
+            for classe in PRIORIDADES:
+                stats = self._stats[classe]
+                liberadas = stats["liberadas"]
+                classes[classe] = {
+                    "na_fila": self._aguardando[classe],
+                    "liberadas": liberadas,
+                    "espera_media_segundos": round(
+                        stats["espera_total"] / liberadas if liberadas else 0.0, 4
+                    ),
+                    "espera_max_segundos": round(stats["espera_max"], 4),
+                }
+            return {
+                "taxa_por_segundo": None if self.taxa is None else round(self.taxa, 3),
+                "pausa_restante_segundos": round(pausa, 3),
+                "classes": classes,
+            }
@@ -0,0 +1,282 @@
+"""Métricas da aplicação (formato texto do Prometheus) e perfil de tempo por requisição."""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Limites (em segundos) dos buckets dos histogramas de duração
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escapar(valor: Any) -> str:
+    """Escapa o valor de um rótulo no formato do Prometheus."""
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Tuple[str, ...], valores: Tuple[Any, ...]) -> str:
+    """Monta '{nome="valor",...}' (ou '' sem rótulos)."""
+    if not nomes:
+        return ""
+    pares = ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores))
+    return "{" + pares + "}"
+
+
+def _formatar_numero(valor: float) -> str:
+    """Formata um número como o Prometheus espera (inteiros sem casas decimais)."""
+    if valor == float("inf"):
+        return "+Inf"
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class _Metrica:
+    """Base das métricas: nome, descrição, rótulos e valores por combinação de rótulos."""
+
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._valores: Dict[Tuple[Any, ...], Any] = {}
+
+    def _chave(self, rotulos: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Valores dos rótulos, na ordem declarada."""
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(
+                f"A métrica '{self.nome}' exige os rótulos: {', '.join(self.rotulos)}."
+            )
+        return tuple(rotulos[nome] for nome in self.rotulos)
+
+    def exportar(self) -> List[str]:
+        """Linhas da métrica no formato texto do Prometheus."""
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            valores = sorted(self._valores.items(), key=lambda item: tuple(map(str, item[0])))
+            linhas.extend(self._exportar_valores(valores))
+        return linhas
+
+    def _exportar_valores(self, valores) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    """Contador que só cresce (ex: linhas, bytes e páginas)."""
+
+    tipo = "counter"
+
+    def incrementar(self, valor: float = 1, **rotulos: Any) -> None:
+        """Soma 'valor' ao contador da combinação de rótulos."""
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def _exportar_valores(self, valores) -> Iterator[str]:
+        for chave, total in valores:
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            yield f"{self.nome}{rotulos} {_formatar_numero(total)}"
+
+
+class Histograma(_Metrica):
+    """Histograma de durações, com buckets cumulativos, soma e contagem."""
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = BUCKETS_SEGUNDOS,
+    ):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observar(self, valor: float, **rotulos: Any) -> None:
+        """Registra uma observação na combinação de rótulos."""
+        chave = self._chave(rotulos)
+        with self._lock:
+            contagens, soma = self._valores.get(chave) or ([0] * len(self.buckets), 0.0)
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[i] += 1
+            self._valores[chave] = (contagens, soma + valor)
+
+    def _exportar_valores(self, valores) -> Iterator[str]:
+        nomes = self.rotulos + ("le",)
+        for chave, (contagens, soma) in valores:
+            for limite, contagem in zip(self.buckets, contagens):
+                rotulos = _formatar_rotulos(nomes, chave + (_formatar_numero(limite),))
+                yield f"{self.nome}_bucket{rotulos} {contagem}"
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            yield f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}"
+            yield f"{self.nome}_count{rotulos} {contagens[-1]}"
+
+
+class RegistroMetricas:
+    """Conjunto das métricas da aplicação, exportado pela rota /metrics."""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def _registrar(self, metrica: _Metrica) -> Any:
+        if metrica.nome in self._metricas:
+            raise ValueError(f"A métrica '{metrica.nome}' já foi registrada.")
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()) -> Contador:
+        """Cria e registra um contador."""
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def histograma(
+        self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()
+    ) -> Histograma:
+        """Cria e registra um histograma de durações (em segundos)."""
+        return self._registrar(Histograma(nome, ajuda, rotulos))
+
+    def exportar(self) -> str:
+        """Todas as métricas no formato texto do Prometheus (version=0.0.4)."""
+        linhas: List[str] = []
+        for metrica in self._metricas.values():
+            linhas.extend(metrica.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+# Métricas da aplicação
+registro = RegistroMetricas()
+ETAPAS = registro.histograma(
+    "stract_etapa_segundos",
+    "Duração das etapas de geração dos relatórios.",
+    ("etapa",),
+)
+API_REQUISICOES = registro.histograma(
+    "stract_api_requisicao_segundos",
+    "Duração das requisições à API da Stract (cada tentativa).",
+    ("endpoint", "plataforma"),
+)
+API_PAGINAS = registro.contador(
+    "stract_api_paginas_total",
+    "Páginas (respostas de sucesso) recebidas da API da Stract.",
+    ("endpoint", "plataforma"),
+)
+LINHAS = registro.contador(
+    "stract_linhas_total",
+    "Linhas de insights montadas nos DataFrames das plataformas.",
+    ("plataforma",),
+)
+BYTES = registro.contador(
+    "stract_bytes_total",
+    "Bytes de relatórios serializados (resposta) e gravados em disco (arquivo).",
+    ("destino", "formato"),
+)
+
+
+class PerfilRequisicao:
+    """Tempo gasto em cada etapa de uma requisição (ativado com '?profile=1')."""
+
+    def __init__(self):
+        self._inicio = time.perf_counter()
+        self._lock = threading.Lock()
+        # (etapa, rótulos) -> [chamadas, segundos, máximo]; etapas na ordem de aparição
+        self._etapas: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], List[float]] = {}
+
+    def registrar(self, etapa: str, segundos: float, rotulos: Dict[str, Any]) -> None:
+        """Soma a duração à etapa (chamado de qualquer thread)."""
+        chave = (etapa, tuple(sorted(rotulos.items())))
+        with self._lock:
+            totais = self._etapas.setdefault(chave, [0, 0.0, 0.0])
+            totais[0] += 1
+            totais[1] += segundos
+            totais[2] = max(totais[2], segundos)
+
+    def resumo(self) -> Dict[str, Any]:
+        """Duração total e, por etapa, chamadas, tempo somado e maior duração."""
+        with self._lock:
+            etapas = [
+                {
+                    "etapa": etapa,
+                    **dict(rotulos),
+                    "chamadas": int(chamadas),
+                    "segundos": round(segundos, 6),
+                    "max_segundos": round(maximo, 6),
+                }
+                for (etapa, rotulos), (chamadas, segundos, maximo) in self._etapas.items()
+            ]
+        return {
+            "total_segundos": round(time.perf_counter() - self._inicio, 6),
+            "etapas": etapas,
+        }
+
+
+# Perfil da requisição em andamento (None fora do modo '?profile=1'); propagado às
+# threads de ExecutorConcorrente e às corrotinas de LacoEventos
+_perfil_atual: ContextVar[Optional[PerfilRequisicao]] = ContextVar("perfil", default=None)
+
+
+def perfil_atual() -> Optional[PerfilRequisicao]:
+    """Retorna o perfil da requisição em andamento, se houver."""
+    return _perfil_atual.get()
+
+
+def iniciar_perfil() -> Any:
+    """Ativa um novo perfil no contexto atual; retorna o token para 'encerrar_perfil'."""
+    return _perfil_atual.set(PerfilRequisicao())
+
+
+def encerrar_perfil(token: Any) -> None:
+    """Desativa o perfil ativado por 'iniciar_perfil'."""
+    _perfil_atual.reset(token)
+
+
+def _registrar(
+    etapa: str, segundos: float, histograma: Optional[Histograma], rotulos: Dict[str, Any]
+) -> None:
+    """Registra a duração no histograma e no perfil da requisição (se houver)."""
+    if histograma is None:
+        ETAPAS.observar(segundos, etapa=etapa)
+    else:
+        histograma.observar(segundos, **rotulos)
+    perfil = _perfil_atual.get()
+    if perfil is not None:
+        perfil.registrar(etapa, segundos, rotulos)
+
+
+@contextmanager
+def medir(
+    etapa: str, histograma: Optional[Histograma] = None, **rotulos: Any
+) -> Iterator[None]:
+    """
+    Mede a duração do bloco. Sem 'histograma', registra em ETAPAS (rotulado pela
+    etapa); caso contrário, no histograma informado, com os 'rotulos' dados.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registrar(etapa, time.perf_counter() - inicio, histograma, rotulos)
+
+
+def medir_blocos(blocos: Iterable[T], etapa: str) -> Iterator[T]:
+    """
+    Como 'medir', para um gerador (ex: CSV em streaming): soma o tempo gasto
+    produzindo os blocos e registra uma única duração quando ele termina.
+    """
+    iterador = iter(blocos)
+    decorrido = 0.0
+    try:
+        while True:
+            inicio = time.perf_counter()
+            try:
+                bloco = next(iterador)
+            except StopIteration:
+                return
+            finally:
+                decorrido += time.perf_counter() - inicio
+            yield bloco
+    finally:
+        _registrar(etapa, decorrido, None, {})
@@ -1,15 +1,81 @@
-from flask import Blueprint, jsonify, make_response, abort
+from flask import Blueprint, jsonify, make_response, abort, request
 from app import relatorios_service
+from services.relatorios_service import RelatorioGerado
+from utils.metricas import PerfilRequisicao, perfil_atual
+from utils.formatos import (
+    FORMATOS,
+    FormatoIndisponivel,
+    FormatoInvalido,
+    negociar_formato,
+    verificar_disponivel,
+)
 
 
-def _criar_resposta_csv(conteudo_csv: str):
-    """Função auxiliar para criar a resposta HTTP com o CSV."""
-    response = make_response(conteudo_csv)
-    response.headers["Content-Disposition"] = "attachment; filename=relatorio.csv"
-    response.headers["Content-Type"] = "text/csv"
+def _criar_resposta_relatorio(relatorio: RelatorioGerado):
+    """
+    Função auxiliar para criar a resposta HTTP com o relatório.
+    O formato vem de '?format=' ou do cabeçalho 'Accept' (CSV por padrão). Se o
+    cliente já tiver a versão atual ('If-None-Match'), responde 304 sem serializar.
+    """
+    try:
+        formato = negociar_formato(request.args.get("format"), request.accept_mimetypes)
+        verificar_disponivel(formato)
+    except FormatoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except FormatoIndisponivel as e:
+        return jsonify({"error": str(e)}), 406
+
+    perfil = perfil_atual()
+    if perfil is not None:
+        return _criar_resposta_perfil(relatorio, formato, perfil)
+
+    etag = relatorio.etag(formato)
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)  # O cliente já tem este conteúdo
+    else:
+        # Se o conteúdo for um gerador, a resposta é enviada em blocos (streaming)
+        response = make_response(relatorios_service.serializar(relatorio, formato))
+        descricao = FORMATOS[formato]
+        response.headers["Content-Disposition"] = (
+            f"attachment; filename=relatorio.{descricao.extensao}"
+        )
+        response.headers["Content-Type"] = descricao.mimetype
+
+    response.set_etag(etag)  # ETag forte
+    response.vary.add("Accept")  # O formato pode depender do cabeçalho 'Accept'
+    # Informa há quanto tempo (em segundos) os dados do relatório foram obtidos
+    response.headers["X-Snapshot-Age"] = f"{relatorio.snapshot.idade:.3f}"
+    response.headers["X-Snapshot-Version"] = str(relatorio.snapshot.versao)
     return response
 
 
+def _criar_resposta_perfil(
+    relatorio: RelatorioGerado, formato: str, perfil: PerfilRequisicao
+):
+    """
+    Resposta do modo '?profile=1': serializa o relatório por completo (sem enviá-lo)
+    e retorna, em JSON, o tempo gasto em cada etapa da requisição.
+    """
+    conteudo = relatorios_service.serializar(relatorio, formato)
+    blocos = [conteudo] if isinstance(conteudo, (str, bytes)) else conteudo
+    tamanho = sum(
+        len(bloco.encode("utf-8") if isinstance(bloco, str) else bloco) for bloco in blocos
+    )  # Consome o streaming, para que a serialização também seja medida
+    return jsonify(
+        {
+            "formato": formato,
+            "linhas": len(relatorio.df),
+            "bytes": tamanho,
+            "snapshot": {
+                "versao": relatorio.snapshot.versao,
+                "idade_segundos": round(relatorio.snapshot.idade, 3),
+                "memoria_bytes": relatorio.snapshot.memoria_bytes,
+            },
+            "perfil": perfil.resumo(),
+        }
+    )
+
+
 def get_valid_platforms() -> list:
     """
     Retorna uma lista com as plataformas válidas obtidas a partir do extrator.